@@ -0,0 +1,208 @@
+"""Frame decoding and reply encoding throughput.
+
+Compares the chunk decoder with the former byte loop and the cached
+reply header encoder with building and serializing a HartFrame per reply.
+
+    python -m benchmarks.bench_framing
+"""
+import timeit
+from functools import reduce
+
+from hartsim.framingutils import (ADDRESS_MASK, BURST_MODE_MASK, DELIMITER_MASK,
+                                  LONG_ADDRESS_MASK, MAX_FRAME_SIZE, PRIMARY_MASTER_MASK,
+                                  FrameType, HartFrame, HartFrameBuilder, reply_header)
+
+FRAME_COUNT = 1000
+DATA_SIZES = [4, 64]
+CHUNK_SIZES = [16, 256, 4096, None]
+REPEAT = 5
+REPLY_COUNT = 10000
+REPLY_PREAMBLES = 3
+
+
+class LegacyHartFrameBuilder:
+    """Byte-at-a-time state machine HartFrameBuilder.collect() used to be."""
+
+    def __init__(self):
+        self.queue = []
+        self.reset()
+
+    def reset(self):
+        self.state = 'UNKNOWN'
+        self.number_of_preambles = 0
+        self.long_address_length = 0
+
+    def collect(self, iterator):
+        for item in iterator:
+            if self.state == 'UNKNOWN':
+                if item == 0xFF:
+                    self.number_of_preambles += 1
+                else:
+                    self.number_of_preambles = 0
+                if self.number_of_preambles >= 2:
+                    self.state = 'PREAMBLES'
+            elif self.state == 'PREAMBLES':
+                if item != 0xFF:
+                    masked_item = item & DELIMITER_MASK
+                    if FrameType.has_value(masked_item):
+                        self.type = FrameType(masked_item)
+                        self.is_long_address = (
+                            item & LONG_ADDRESS_MASK) == LONG_ADDRESS_MASK
+                        self.state = 'LONG_ADDRESS' if self.is_long_address else 'SHORT_ADDRESS'
+                        self.long_address = 0
+                        self.short_address = 0
+                        self.long_address_length = 0
+                    else:
+                        self.state = 'UNKNOWN'
+            elif self.state == 'SHORT_ADDRESS':
+                self.short_address = item & ADDRESS_MASK
+                self.is_primary_master = (
+                    item & PRIMARY_MASTER_MASK) == PRIMARY_MASTER_MASK
+                self.is_burst = (item & BURST_MODE_MASK) == BURST_MODE_MASK
+                self.state = 'COMMAND_NUMBER'
+            elif self.state == 'LONG_ADDRESS':
+                if self.long_address_length == 0:
+                    self.long_address = item & ADDRESS_MASK
+                    self.is_primary_master = (
+                        item & PRIMARY_MASTER_MASK) == PRIMARY_MASTER_MASK
+                    self.is_burst = (item & BURST_MODE_MASK) == BURST_MODE_MASK
+                else:
+                    self.long_address = (self.long_address << 8) | item
+                self.long_address_length += 1
+                if self.long_address_length == 5:
+                    self.state = 'COMMAND_NUMBER'
+            elif self.state == 'COMMAND_NUMBER':
+                self.command_number = item
+                self.state = 'BYTE_COUNT'
+            elif self.state == 'BYTE_COUNT':
+                self.byte_count = item
+                self.state = 'DATA' if self.byte_count > 0 else 'CHECK_SUM'
+                self.payload = bytearray()
+            elif self.state == 'DATA':
+                self.payload.append(item)
+                if len(self.payload) == self.byte_count:
+                    self.state = 'CHECK_SUM'
+            elif self.state == 'CHECK_SUM':
+                self.queue.append(HartFrame(self.type,
+                                            self.command_number,
+                                            self.is_long_address,
+                                            self.short_address,
+                                            self.long_address,
+                                            self.is_primary_master,
+                                            self.is_burst,
+                                            self.payload,
+                                            item))
+                self.reset()
+
+
+def make_stream(count: int, data_size: int) -> bytes:
+    stream = bytearray()
+    for index in range(count):
+        if index % 2:
+            frame = HartFrame(FrameType.STX, 3, short_address=index % 16)
+        else:
+            frame = HartFrame(FrameType.STX, 9,
+                              is_long_address=True,
+                              long_address=0x2606000000 + index,
+                              data=bytearray(range(data_size)))
+        stream.extend(b'\xff' * 5)
+        stream.extend(frame.serialize())
+    return bytes(stream)
+
+
+def chunks(stream: bytes, size: int | None) -> list[bytes]:
+    if size is None:
+        return [stream]
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def decode_legacy(parts: list[bytes]) -> int:
+    builder = LegacyHartFrameBuilder()
+    for part in parts:
+        builder.collect(iter(part))
+    return len(builder.queue)
+
+
+def decode_chunked(parts: list[bytes]) -> int:
+    builder = HartFrameBuilder()
+    count = 0
+    for part in parts:
+        count += len(builder.feed(part))
+    return count
+
+
+def serialize_legacy(frame: HartFrame) -> bytearray:
+    """HartFrame.serialize() as it was before reply headers were cached."""
+    encoded = bytearray()
+    encoded.append(frame.type.value | LONG_ADDRESS_MASK
+                   if frame.is_long_address else frame.type.value)
+    if frame.is_long_address:
+        first_byte = frame.long_address >> 32
+        if frame.is_primary_master:
+            first_byte |= PRIMARY_MASTER_MASK
+        if frame.is_burst:
+            first_byte |= BURST_MODE_MASK
+        encoded.append(first_byte)
+        encoded.append((frame.long_address >> 24) & 0xFF)
+        encoded.append((frame.long_address >> 16) & 0xFF)
+        encoded.append((frame.long_address >> 8) & 0xFF)
+        encoded.append(frame.long_address & 0xFF)
+    else:
+        first_byte = frame.short_address
+        if frame.is_primary_master:
+            first_byte |= PRIMARY_MASTER_MASK
+        if frame.is_burst:
+            first_byte |= BURST_MODE_MASK
+        encoded.append(first_byte)
+    encoded.append(frame.command_number)
+    encoded.append(len(frame.data))
+    encoded.extend(frame.data)
+    check_sum = reduce(lambda x, y: x ^ y, encoded)
+    frame.check_sum = check_sum
+    encoded.append(check_sum)
+    return encoded
+
+
+def encode_legacy(payloads: list[bytes]) -> int:
+    size = 0
+    for payload in payloads:
+        reply = HartFrame(FrameType.ACK, 3, True, 0, 0x2606123456, True, False, payload)
+        reply_data = bytearray([0xFF] * REPLY_PREAMBLES)
+        reply_data.extend(serialize_legacy(reply))
+        size += len(reply_data)
+    return size
+
+
+def encode_into(payloads: list[bytes]) -> int:
+    buffer = bytearray(MAX_FRAME_SIZE)
+    size = 0
+    for payload in payloads:
+        header = reply_header(FrameType.ACK, True, 0x2606123456, True, False, REPLY_PREAMBLES)
+        size += header.encode_into(buffer, 3, payload)
+    return size
+
+
+def main():
+    for data_size in DATA_SIZES:
+        stream = make_stream(FRAME_COUNT, data_size)
+        print(f'{FRAME_COUNT} frames, {len(stream)} bytes')
+        for size in CHUNK_SIZES:
+            parts = chunks(stream, size)
+            assert decode_legacy(parts) == decode_chunked(parts) == FRAME_COUNT
+            legacy = min(timeit.repeat(lambda: decode_legacy(parts), number=1, repeat=REPEAT))
+            chunked = min(timeit.repeat(lambda: decode_chunked(parts), number=1, repeat=REPEAT))
+            label = 'whole' if size is None else f'{size} B'
+            print(f'  chunk {label:>7}: byte loop {legacy * 1e3:7.2f} ms, '
+                  f'chunked {chunked * 1e3:7.2f} ms, x{legacy / chunked:.1f}')
+
+    for data_size in DATA_SIZES:
+        payloads = [bytes(range(index % 8, index % 8 + data_size)) for index in range(REPLY_COUNT)]
+        assert encode_legacy(payloads) == encode_into(payloads)
+        legacy = min(timeit.repeat(lambda: encode_legacy(payloads), number=1, repeat=REPEAT))
+        cached = min(timeit.repeat(lambda: encode_into(payloads), number=1, repeat=REPEAT))
+        print(f'{REPLY_COUNT} replies, {data_size} data bytes: HartFrame + serialize '
+              f'{legacy * 1e3:7.2f} ms, encode_into {cached * 1e3:7.2f} ms, x{legacy / cached:.1f}')
+
+
+if __name__ == '__main__':
+    main()
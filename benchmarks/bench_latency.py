@@ -0,0 +1,155 @@
+"""Request to reply latency and fleet throughput over PTY pairs.
+
+Compares the asyncio SerialLink with the former loop polling
+`port.in_waiting` every 10 ms. The in-process master writes Cmd0 requests
+on the slave end of a PTY pair and waits for each reply. The fleet run
+drives many pairs served by one event loop at once.
+
+    python -m benchmarks.bench_latency
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from hartsim.framingutils import FrameType, HartFrame, HartFrameBuilder
+from hartsim.profiles import create_devices
+from hartsim.simulator import DeviceSimulator
+from hartsim.transport import SerialLink, serve_links
+
+if sys.platform != 'win32':
+    from hartsim.loopback import open_pty_pairs
+
+REQUEST_COUNT = 200
+POLL_INTERVAL = 0.01
+# pause between a reply and the next request, like a master turning around
+REQUEST_GAP = 0.002
+FLEET_SIZE = 64
+FLEET_REQUESTS = 100
+
+
+def make_request() -> bytes:
+    frame = HartFrame(FrameType.STX, 0, short_address=0, is_primary_master=True)
+    return b'\xff' * 5 + bytes(frame.serialize())
+
+
+def run_master(master: int, count: int) -> list[float]:
+    request = make_request()
+    builder = HartFrameBuilder()
+    latencies = []
+    for _ in range(count):
+        time.sleep(REQUEST_GAP)
+        start = time.perf_counter()
+        os.write(master, request)
+        while not builder.feed(os.read(master, 512)):
+            pass
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def serve_polling(port, simulator: DeviceSimulator, stop: threading.Event):
+    """Busy-poll loop hartsim.py used to run."""
+    builder = HartFrameBuilder()
+    while not stop.is_set():
+        if port.in_waiting:
+            for frame in builder.feed(port.read(port.in_waiting)):
+                reply = simulator.handle(frame)
+                if reply is not None:
+                    port.write(reply)
+        else:
+            time.sleep(POLL_INTERVAL)
+
+
+def measure_polling() -> list[float]:
+    pair = open_pty_pairs(1)[0]
+    simulator = DeviceSimulator(create_devices(), verbose=False)
+    stop = threading.Event()
+    server = threading.Thread(target=serve_polling, args=(pair.port, simulator, stop))
+    server.start()
+    try:
+        return run_master(pair.slave_fd, REQUEST_COUNT)
+    finally:
+        stop.set()
+        server.join()
+        pair.close()
+
+
+async def measure_event_driven() -> list[float]:
+    pair = open_pty_pairs(1)[0]
+    simulator = DeviceSimulator(create_devices(), verbose=False)
+    link = SerialLink(pair.port, simulator.handle, key_dtr=False)
+    serving = asyncio.ensure_future(link.serve())
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, run_master, pair.slave_fd, REQUEST_COUNT)
+    finally:
+        link.close()
+        await serving
+        pair.close()
+
+
+async def measure_fleet() -> float:
+    """Seconds for every pair of the fleet to answer its requests."""
+    loop = asyncio.get_running_loop()
+    pairs = open_pty_pairs(FLEET_SIZE)
+    links = [SerialLink(pair.port,
+                        DeviceSimulator(create_devices(['3051']), verbose=False).handle,
+                        key_dtr=False)
+             for pair in pairs]
+    request = make_request()
+    remaining = {pair.slave_fd: FLEET_REQUESTS for pair in pairs}
+    done = loop.create_future()
+
+    def on_reply(master: int, builder: HartFrameBuilder):
+        for _ in builder.feed(os.read(master, 512)):
+            remaining[master] -= 1
+            if remaining[master]:
+                os.write(master, request)
+            else:
+                loop.remove_reader(master)
+                del remaining[master]
+                if not remaining:
+                    done.set_result(None)
+
+    serving = asyncio.ensure_future(serve_links(links))
+    start = time.perf_counter()
+    for pair in pairs:
+        loop.add_reader(pair.slave_fd, on_reply, pair.slave_fd, HartFrameBuilder())
+        os.write(pair.slave_fd, request)
+    try:
+        await done
+        return time.perf_counter() - start
+    finally:
+        for link in links:
+            link.close()
+        await serving
+        for pair in pairs:
+            pair.close()
+
+
+def report(label: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    mean = sum(latencies) / len(latencies)
+    median = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f'{label:>14}: mean {mean * 1e6:8.1f} us, median {median * 1e6:8.1f} us, '
+          f'p99 {p99 * 1e6:8.1f} us')
+
+
+def main():
+    if sys.platform == 'win32':
+        print('PTY pairs are not available on Windows')
+        return
+    print(f'{REQUEST_COUNT} Cmd0 requests over a PTY pair')
+    report('10 ms polling', measure_polling())
+    report('asyncio reader', asyncio.run(measure_event_driven()))
+
+    elapsed = asyncio.run(measure_fleet())
+    total = FLEET_SIZE * FLEET_REQUESTS
+    print(f'{FLEET_SIZE} PTY pairs x {FLEET_REQUESTS} requests: {elapsed * 1e3:.1f} ms, '
+          f'{total / elapsed:.0f} replies/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Memory and construction time of devices and replies.
+
+Measures the heap held by 10k simulated devices, by one DeviceVariable and
+by the reply payloads built for a fleet poll, the heap a request
+allocates with and without reply pools, the heap of 10k devices kept in
+a columnar DeviceFleet and the time and heap of 5k devices instantiated
+from a template, with tracemalloc.
+
+    python -m benchmarks.bench_memory
+"""
+import gc
+import timeit
+import tracemalloc
+from unittest import mock
+
+from hartsim import commands, payloads
+from hartsim.devices import DeviceVariable
+from hartsim.fleet import DeviceFleet
+from hartsim.payloads import F32, U8, U24, PackedAscii
+from hartsim.profiles import create_device_3051, device_template
+
+from .bench_payloads import make_device, make_replies
+
+DEVICES = 10_000
+VARIABLES = 10_000
+TEMPLATE_DEVICES = 5_000
+NUMBER = 20_000
+REPEAT = 5
+REQUESTS = 2_000
+# command number and request data of the pooled requests measured
+POOLED_REQUESTS = ((3, b''), (48, b''), (162, bytes([1])), (230, b''), (235, b''))
+
+
+def allocated(factory, count: int) -> tuple[list, int]:
+    """Objects created by `factory` and the bytes they hold."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return objects, after - before
+
+
+def make_variable() -> DeviceVariable:
+    return DeviceVariable(U8(12), U8(12), F32(1.2345), F32(0), F32(0),
+                          F32(250), F32(0), U8(65), U8(192))
+
+
+def request_heap(device, number: int, data: bytes, count: int) -> float:
+    """Average peak heap one request allocates, with the reply cache bypassed."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(count):
+            device.touch()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            commands.handle_request(device, number, data)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / count
+
+
+def bench_pools(device):
+    for number, data in POOLED_REQUESTS:
+        pooled = request_heap(device, number, data, REQUESTS)
+        with mock.patch.dict(payloads.POOLS, clear=True), mock.patch.object(payloads, 'POOL_SIZE', 0):
+            unpooled = request_heap(device, number, data, REQUESTS)
+        statistics = payloads.payload_pool(getattr(commands, f'Cmd{number}Reply')).statistics()
+        print(f'Cmd{number:<4} request heap: {pooled:6.0f} B pooled, {unpooled:6.0f} B unpooled, '
+              f'pool {statistics}')
+
+
+def make_fleet(count: int) -> DeviceFleet:
+    """Fleet of `count` 3051 devices at distinct unique addresses."""
+    fleet = DeviceFleet()
+    for index in range(count):
+        device = create_device_3051()
+        device.long_address += index
+        device.polling_address.set_value(index % 64)
+        fleet.add(device)
+    return fleet
+
+
+def bench_fleet():
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fleet = make_fleet(DEVICES)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    print(f'{DEVICES} fleet devices: {size / 2**20:7.1f} MiB, {size / DEVICES:8.0f} B per device')
+
+    device = create_device_3051()
+    view = fleet[DEVICES // 2]
+    for name, target in (('device', device), ('fleet view', view)):
+        seconds = min(timeit.repeat(lambda: commands.handle_request(target, 3, b''),
+                                    number=NUMBER, repeat=REPEAT))
+        print(f'{name:>15} Cmd3: {seconds / NUMBER * 1e6:6.2f} us')
+    address = view.long_address
+    seconds = min(timeit.repeat(lambda: fleet.find_unique(address), number=NUMBER, repeat=REPEAT))
+    print(f'{"fleet":>15} unique address lookup: {seconds / NUMBER * 1e6:6.2f} us')
+
+
+def instantiate(count: int) -> list:
+    """`count` 3051 devices from the template, with their own identities."""
+    template = device_template('3051')
+    address = create_device_3051().long_address
+    return [template.instantiate(long_address=address + index, device_id=U24(index),
+                                 polling_address=U8(index % 64),
+                                 hart_tag=PackedAscii(8, f'PT{index:06}'))
+            for index in range(count)]
+
+
+def bench_templates():
+    device_template('3051')
+    seconds = min(timeit.repeat(lambda: instantiate(TEMPLATE_DEVICES), number=1, repeat=REPEAT))
+    _, size = allocated(lambda: instantiate(TEMPLATE_DEVICES), 1)
+    print(f'{TEMPLATE_DEVICES} template devices: {seconds * 1e3:6.1f} ms, '
+          f'{size / 2**20:7.1f} MiB, {size / TEMPLATE_DEVICES:8.0f} B per device')
+    seconds = min(timeit.repeat(lambda: [create_device_3051() for _ in range(TEMPLATE_DEVICES)],
+                                number=1, repeat=REPEAT))
+    print(f'{TEMPLATE_DEVICES} HartDevices:      {seconds * 1e3:6.1f} ms')
+
+    device, instance = create_device_3051(), instantiate(1)[0]
+    for name, target in (('device', device), ('template device', instance)):
+        seconds = min(timeit.repeat(lambda: commands.handle_request(target, 3, b''),
+                                    number=NUMBER, repeat=REPEAT))
+        print(f'{name:>15} Cmd3: {seconds / NUMBER * 1e6:6.2f} us')
+    print(f'template device overrides after polling: {len(instance.overrides)}')
+
+
+def main():
+    _, size = allocated(create_device_3051, DEVICES)
+    print(f'{DEVICES} devices: {size / 2**20:7.1f} MiB, {size / DEVICES:8.0f} B per device')
+
+    _, size = allocated(make_variable, VARIABLES)
+    print(f'DeviceVariable: {size / VARIABLES:8.0f} B')
+
+    device = make_device()
+    count = len(make_replies(device))
+    _, size = allocated(lambda: make_replies(device), 100)
+    print(f'{count} reply kinds: {size / 100 / count:8.0f} B per reply on average')
+
+    for name, factory in (('U8', lambda: U8(1)), ('F32', lambda: F32(1.0)),
+                          ('DeviceVariable', make_variable),
+                          ('Cmd3Reply', lambda: commands.Cmd3Reply.create(device).release())):
+        seconds = min(timeit.repeat(factory, number=NUMBER, repeat=REPEAT))
+        print(f'{name:>15} construction: {seconds / NUMBER * 1e6:6.2f} us')
+
+    bench_pools(device)
+    bench_fleet()
+    bench_templates()
+
+
+if __name__ == '__main__':
+    main()
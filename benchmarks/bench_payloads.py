@@ -0,0 +1,152 @@
+"""Reply payload serialization and request parsing throughput.
+
+Compares PayloadSequence.pack() with walking the fields byte by byte the way
+PayloadSequence.__iter__ used to, for every reply defined in commands.py,
+decode_from() with per-byte deserialize() for every request, F32Array
+packing and decoding by array size, and the construction of every reply.
+
+    python -m benchmarks.bench_payloads
+"""
+import inspect
+import sys
+import timeit
+from itertools import chain
+
+from hartsim import commands, payloads
+from hartsim.devices import DeviceVariable, HartDevice
+from hartsim.layouts import LayoutReply
+from hartsim.payloads import F32, U8, F32Array, PayloadSequence
+
+NUMBER = 2000
+REPEAT = 5
+
+
+def make_device() -> HartDevice:
+    return HartDevice(
+        device_variables={
+            code: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min),
+                                 F32(sys.float_info.max), F32(250), F32(0), U8(65), U8(192))
+            for code in range(6)
+        },
+        dynamic_variables={0: 0, 1: 1, 2: 2, 3: 3},
+        waveform_lin_x=[float(i) for i in range(10)],
+        waveform_lin_y=[float(i) for i in range(10)],
+        waveform_kp_x=[float(i) for i in range(5)],
+        waveform_kp_y=[float(i) for i in range(5)],
+        waveform_sen_x=[float(i) for i in range(10)],
+        waveform_sen_y=[float(i) for i in range(10)],
+        waveform_yt=[float(i) for i in range(20)],
+        waveform_ro_yt=[float(i) for i in range(20)])
+
+
+def make_replies(device: HartDevice) -> dict[str, PayloadSequence]:
+    replies = {}
+    for name, cls in inspect.getmembers(commands, inspect.isclass):
+        if not name.endswith('Reply') or not issubclass(cls, PayloadSequence):
+            continue
+        parameters = inspect.signature(cls.create).parameters.values()
+        arguments = []
+        for parameter in parameters:
+            annotation = parameter.annotation
+            if isinstance(annotation, str):
+                annotation = getattr(commands, annotation, None)
+            if annotation is HartDevice:
+                arguments.append(device)
+            elif annotation is U8:
+                arguments.append(U8(0))
+            elif inspect.isclass(annotation):
+                arguments.append(annotation())
+            else:
+                break
+        else:
+            replies[name] = cls.create(*arguments)
+    for entry in commands.COMMANDS.entries.values():
+        if isinstance(entry.handler, LayoutReply):
+            request = entry.request_class() if entry.request_class else None
+            replies[entry.handler.name] = entry.handler(device, request)
+    return replies
+
+
+def payload_classes(suffix: str) -> list[tuple[str, type[PayloadSequence]]]:
+    """Payload classes of commands.py and its layout table named *suffix."""
+    classes = dict(inspect.getmembers(commands, inspect.isclass))
+    classes.update((name, commands.LAYOUTS.payload_class(name))
+                   for name in commands.LAYOUTS.layouts)
+    return sorted((name, cls) for name, cls in classes.items()
+                  if name.endswith(suffix) and issubclass(cls, PayloadSequence))
+
+
+def serialize_legacy(payload: PayloadSequence) -> bytes:
+    """Per-field byte iteration PayloadSequence.__iter__ used to do."""
+    return bytes(chain.from_iterable(
+        value for name, value in payload._fields()
+        if not (value.is_optional() and value.is_skipped())))
+
+
+def bench_requests():
+    total_iterated = 0.
+    total_decoded = 0.
+    count = 0
+    for name, cls in payload_classes('Request'):
+        request = cls()
+        data = memoryview(request.pack() + bytes(8))
+        iterated = min(timeit.repeat(lambda: cls().deserialize(iter(data)),
+                                     number=NUMBER, repeat=REPEAT))
+        decoded = min(timeit.repeat(lambda: cls().decode_from(data),
+                                    number=NUMBER, repeat=REPEAT))
+        total_iterated += iterated
+        total_decoded += decoded
+        count += 1
+        print(f'{name:>22} {len(data):3} B: deserialize {iterated / NUMBER * 1e6:6.2f} us, '
+              f'decode_from {decoded / NUMBER * 1e6:6.2f} us, x{iterated / decoded:.1f}')
+    print(f'{count} requests: deserialize {total_iterated / NUMBER * 1e6:7.2f} us, '
+          f'decode_from {total_decoded / NUMBER * 1e6:7.2f} us, x{total_iterated / total_decoded:.1f}')
+
+
+def bench_f32_arrays():
+    """F32Array packing and decoding by size, NumPy backed when installed."""
+    backend = 'numpy' if payloads.numpy is not None else 'struct'
+    for count in (10, 100, 1000):
+        source = F32Array(count, [float(index) for index in range(count)])
+        data = source._serialize()
+        packed = min(timeit.repeat(source._serialize, number=NUMBER, repeat=REPEAT))
+        decoded = min(timeit.repeat(lambda: F32Array(count).decode_from(data),
+                                    number=NUMBER, repeat=REPEAT))
+        print(f'{count:>5} floats ({backend}): pack {packed / NUMBER * 1e6:6.2f} us, '
+              f'decode_from {decoded / NUMBER * 1e6:6.2f} us')
+
+
+def bench_construction():
+    """Reply instances made with their defaults, which they clone or copy on read."""
+    total = 0.
+    fields = 0
+    classes = payload_classes('Reply')
+    for name, cls in classes:
+        total += min(timeit.repeat(cls, number=NUMBER, repeat=REPEAT))
+        fields += len(cls._get_defaults())
+    print(f'{len(classes)} replies constructed: {total / NUMBER * 1e6:7.2f} us, '
+          f'{total / NUMBER / fields * 1e9:4.0f} ns per field')
+
+
+def main():
+    device = make_device()
+    replies = make_replies(device)
+    total_legacy = 0.
+    total_packed = 0.
+    for name, reply in sorted(replies.items()):
+        assert serialize_legacy(reply) == reply.pack(), name
+        legacy = min(timeit.repeat(lambda: serialize_legacy(reply), number=NUMBER, repeat=REPEAT))
+        packed = min(timeit.repeat(lambda: reply.pack(), number=NUMBER, repeat=REPEAT))
+        total_legacy += legacy
+        total_packed += packed
+        print(f'{name:>22} {len(reply.pack()):3} B: byte walk {legacy / NUMBER * 1e6:6.2f} us, '
+              f'pack {packed / NUMBER * 1e6:6.2f} us, x{legacy / packed:.1f}')
+    print(f'{len(replies)} replies: byte walk {total_legacy / NUMBER * 1e6:7.2f} us, '
+          f'pack {total_packed / NUMBER * 1e6:7.2f} us, x{total_legacy / total_packed:.1f}')
+    bench_requests()
+    bench_f32_arrays()
+    bench_construction()
+
+
+if __name__ == '__main__':
+    main()
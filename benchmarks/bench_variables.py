@@ -0,0 +1,73 @@
+"""Variable updates of a device fleet.
+
+Compares every device running `update_variables()` on its own with one
+`VariableEngine` updating the whole fleet, and the time a Cmd3 poll of
+every device takes with each. The engine polls are served within one tick.
+Also times volume lookups in strapping tables of thousands of points, and
+a Cmd159 point set written in place against rebuilding the table.
+
+    python -m benchmarks.bench_variables
+"""
+import timeit
+from itertools import count
+
+from hartsim.commands import handle_request
+from hartsim.engine import VariableEngine
+from hartsim.payloads import numpy
+from hartsim.profiles import create_device_3051
+from hartsim.tanks import StrappingTable
+
+FLEET_SIZES = (100, 1_000, 10_000)
+STRAPPING_SIZES = (100, 1_000, 10_000)
+LOOKUPS = 10_000
+REPEAT = 5
+
+
+def bench_fleet(size: int):
+    devices = [create_device_3051() for _ in range(size)]
+    # one update_variables() pass over the whole fleet
+    device_loop = min(timeit.repeat(
+        lambda: [device.update_variables() for device in devices], number=1, repeat=REPEAT))
+    poll = min(timeit.repeat(
+        lambda: [handle_request(device, 3, b'') for device in devices], number=1, repeat=REPEAT))
+
+    ticks = count()
+    fleet = VariableEngine(devices, tick=1)
+    engine = min(timeit.repeat(lambda: fleet.update(next(ticks)), number=1, repeat=REPEAT))
+
+    def poll_tick():
+        # a tick update, then the polls served from it
+        fleet.update(next(ticks))
+        for device in devices:
+            handle_request(device, 3, b'')
+    engine_poll = min(timeit.repeat(poll_tick, number=1, repeat=REPEAT))
+    print(f'{size:6} devices: update {device_loop * 1e3:8.2f} ms device loop, '
+          f'{engine * 1e3:7.2f} ms engine; Cmd3 poll {poll * 1e3:8.2f} ms, '
+          f'{engine_poll * 1e3:8.2f} ms with engine')
+
+
+def bench_strapping(size: int):
+    levels = [float(index) for index in range(size)]
+    volumes = [level * 1.5 for level in levels]
+    table = StrappingTable(levels, volumes)
+    queries = [(index * 7919 % (size * 10)) / 10 for index in range(LOOKUPS)]
+    lookup = min(timeit.repeat(lambda: [table.volume(level) for level in queries], number=1, repeat=REPEAT))
+    batch = min(timeit.repeat(lambda: table.volumes_of(queries), number=1, repeat=REPEAT))
+    point_set = [levels[4:8], volumes[4:8]]
+    write = min(timeit.repeat(lambda: table.write(4, *point_set), number=100, repeat=REPEAT)) / 100
+    rebuild = min(timeit.repeat(lambda: StrappingTable(levels, volumes), number=10, repeat=REPEAT)) / 10
+    print(f'{size:6} strapping points: {lookup / LOOKUPS * 1e9:6.0f} ns per lookup, '
+          f'{batch / LOOKUPS * 1e9:6.0f} ns batched; point set written {write * 1e6:7.2f} us, '
+          f'rebuilt {rebuild * 1e6:9.2f} us')
+
+
+def main():
+    print(f'NumPy: {"yes" if numpy is not None else "no"}')
+    for size in FLEET_SIZES:
+        bench_fleet(size)
+    for size in STRAPPING_SIZES:
+        bench_strapping(size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+MAX_ENTRIES = 256
+
+
+class ReplyCache:
+    """Serialized replies of one device, valid for a single state version.
+
+    Entries are keyed by command number and request data. A lookup with a
+    different state version drops everything cached so far.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.__entries: dict[tuple[int, bytes], bytes] = {}
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, version: int, command_number: int, data: bytes) -> bytes | None:
+        if version != self.version:
+            self.__entries.clear()
+            self.version = version
+        reply = self.__entries.get((command_number, data))
+        if reply is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return reply
+
+    def put(self, version: int, command_number: int, data: bytes, reply: bytes):
+        if version != self.version:
+            return
+        if len(self.__entries) >= self.max_entries:
+            self.__entries.clear()
+        self.__entries[(command_number, data)] = reply
+
+    def clear(self):
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,204 +1,335 @@
+import struct
 from dataclasses import dataclass
-from .payloads import F32, F32Array, U16, U24, U32, U8, Ascii, GreedyU8Array, PackedAscii
-from .payloads import PayloadSequence
+from .payloads import F32, F32Array, U16, U24, U32, U8, Ascii
+from .payloads import PayloadSequence, RepeatedGroup
 from .devices import HartDevice
+from .layouts import LayoutReply, LayoutTable, register_layouts
+from .registry import CommandEntry, CommandRegistry
+
+COMMANDS = CommandRegistry()
+command = COMMANDS.register
+# 16-bit commands carried by the command 31 wrapper
+EXTENDED_COMMANDS = CommandRegistry()
+extended_command = EXTENDED_COMMANDS.register
+
+INVALID_SELECTION = 2
+TOO_FEW_DATA_BYTES = 5
+COMMAND_NOT_IMPLEMENTED = 64
+
+EXTENDED_COMMAND = 31
+EXTENDED_NUMBER = struct.Struct('>H')
+# keeps replies of extended commands apart from 8-bit ones in the reply cache
+EXTENDED_CACHE_KEY = 0x10000
 
 
 def handle_request(device: HartDevice, command_number: int, data: bytearray)\
-        -> bytearray:
-    is_extended_command = command_number == 31
-    if is_extended_command:
-        request = Cmd31Request()
-        request.deserialize(iter(data))
-        command_number = request.extended_command_number
-        data = request.request_data
-
-    try:
-        payload = _dispatch_command(device, command_number, data)
-    except StopIteration:
-        payload = ErrorReply.create(device, U8(5))
-
-    if is_extended_command:
-        payload = Cmd31Reply.create(
-            device,
-            payload.response_code,
-            command_number,
-            # skip Response Code and Device Status
-            GreedyU8Array(bytearray(payload)[2:]))
-        command_number = 31
-
-    return list(payload)
-
-
-def _dispatch_command(device: HartDevice, command_number: int, data: bytearray):
-    if command_number == 0:
-        # TODO move logic to HartDevice class
-        if device.universal_revision.get_value() == 5:
-            payload = Cmd0Hart5Reply.create(device)
-        else:
-            payload = Cmd0Hart7Reply.create(device)
-    elif command_number == 1:
-        payload = Cmd1Reply.create(device)
-    elif command_number == 2:
-        payload = Cmd2Reply.create(device)
-    elif command_number == 3:
-        payload = Cmd3Reply.create(device)
-    elif command_number == 7 and device.universal_revision.get_value() >= 6:
-        payload = Cmd7Reply.create(device)
-    elif command_number == 8 and device.universal_revision.get_value() >= 6:
-        payload = Cmd8Reply.create(device)
-    elif command_number == 9 and device.universal_revision.get_value() >= 6:
-        request = Cmd9Request()
-        request.deserialize(iter(data))
-        payload = Cmd9Reply.create(device, request)
-    elif command_number == 12:
-        payload = Cmd12Reply.create(device)
-    elif command_number == 13:
-        payload = Cmd13Reply.create(device)
-    elif command_number == 15:
-        payload = Cmd15Reply.create(device)
-    elif command_number == 20 and device.universal_revision.get_value() >= 6:
-        payload = Cmd20Reply.create(device)
-    elif command_number == 33:
-        request = Cmd33Request()
-        request.deserialize(iter(data))
-        payload = Cmd33Reply.create(device, request)
-    elif command_number == 34:
-        request = Cmd34Request()
-        request.deserialize(iter(data))
-        if device.simulate_invalid_selection:
-            payload = Cmd34InvalidSelectionReply.create(device, request)
-        else:
-            payload = Cmd34Reply.create(device, request)
-        device.simulate_invalid_selection = not device.simulate_invalid_selection
-    elif command_number == 36:
-        payload = Cmd36Reply.create(device)
-    elif command_number == 37:
-        payload = Cmd37Reply.create(device)
-    elif command_number == 40:
-        request = Cmd40Request()
-        request.deserialize(iter(data))
-        payload = Cmd40Reply.create(device, request)
-    elif command_number == 45:
-        request = Cmd45Request()
-        request.deserialize(iter(data))
-        payload = Cmd45Reply.create(device, request)
-    elif command_number == 46:
-        request = Cmd46Request()
-        request.deserialize(iter(data))
-        payload = Cmd46Reply.create(device, request)
-    elif command_number == 48:
-        payload = Cmd48Reply.create(device)
-    elif command_number == 50:
-        payload = Cmd50Reply.create(device)
-    elif command_number == 51:
-        request = Cmd51Request()
-        request.deserialize(iter(data))
-        payload = Cmd51Reply.create(device, request)
-    elif command_number == 53:
-        request = Cmd53Request()
-        request.deserialize(iter(data))
-        payload = Cmd53Reply.create(device, request)
-    elif command_number == 54:
-        request = Cmd54Request()
-        request.deserialize(iter(data))
-        payload = Cmd54Reply.create(device, request)
-    elif command_number == 72:
-        payload = Cmd72Reply.create(device)
-    elif command_number == 76:
-        payload = Cmd76Reply.create(device)
-    elif command_number == 79:
-        request = Cmd79Request()
-        request.deserialize(iter(data))
-        payload = Cmd79Reply.create(device, request)
-    elif command_number == 90:
-        payload = Cmd90Reply.create(device)
-    elif command_number == 105:
-        payload = Cmd105Reply.create(device)
-    elif command_number == 128:
-        payload = Cmd128Reply.create(device)
-    elif command_number == 133:
-        payload = Cmd133Reply.create(device)
-    elif command_number == 136:
-        request = Cmd136Request()
-        request.deserialize(iter(data))
-        payload = Cmd136Reply.create(device, request)
-    elif command_number == 137:
-        payload = Cmd137Reply.create(device)
-    elif command_number == 142:
-        payload = Cmd142Reply.create(device)
-    elif command_number == 140:
-        request = Cmd140Request()
-        request.deserialize(iter(data))
-        payload = Cmd140Reply.create(device, request)
-    elif command_number == 148:
-        payload = Cmd148Reply.create(device)
-    elif command_number == 157:
-        payload = Cmd157Reply.create(device)
-    elif command_number == 158:
-        request = Cmd158Request()
-        request.deserialize(iter(data))
-        payload = Cmd158Reply.create(device, request)
-    elif command_number == 159:
-        request = Cmd159Request()
-        request.deserialize(iter(data))
-        payload = Cmd159Reply.create(device, request)
-    elif command_number == 160:
-        payload = Cmd160Reply.create(device)
-    elif command_number == 161:
-        payload = Cmd161Reply.create(device)
-    elif command_number == 162:
-        request = Cmd162Request()
-        request.deserialize(iter(data))
-        payload = Cmd162Reply.create(device, request)
-    elif command_number == 177:
-        payload = Cmd177Reply.create(device)
-    elif command_number == 196:
-        payload = Cmd196Reply.create(device)
-    elif command_number == 200:
-        payload = Cmd200Reply.create(device)
-    elif command_number == 202:
-        request = Cmd202Request()
-        request.deserialize(iter(data))
-        payload = Cmd202Reply.create(device, request)
-    elif command_number == 203:
-        request = Cmd203Request()
-        request.deserialize(iter(data))
-        payload = Cmd203Reply.create(device, request)
-    elif command_number == 216:
-        payload = Cmd216Reply.create(device)
-    elif command_number == 217:
-        payload = Cmd217Reply.create(device)
-    elif command_number == 218:
-        payload = Cmd218Reply.create(device)
-    elif command_number == 220:
-        payload = Cmd220Reply.create(device)
-    elif command_number == 222:
-        payload = Cmd222Reply.create(device)
-    elif command_number == 230:
-        payload = Cmd230Reply.create(device)
-    elif command_number == 231:
-        request = Cmd231Request()
-        request.deserialize(iter(data))
-        payload = Cmd231Reply.create(device, request)
-    elif command_number == 232:
-        payload = Cmd232Reply.create(device)
-    elif command_number == 233:
-        payload = Cmd233Reply.create(device)
-    elif command_number == 234:
-        request = Cmd234Request()
-        request.deserialize(iter(data))
-        payload = Cmd234Reply.create(device, request)
-    elif command_number == 235:
-        payload = Cmd235Reply.create(device)
-    elif command_number == 236:
-        request = Cmd236Request()
-        request.deserialize(iter(data))
-        payload = Cmd236Reply.create(device, request)
+        -> bytes:
+    if command_number != EXTENDED_COMMAND:
+        return _dispatch_command(COMMANDS, device, command_number, data)
+    if len(data) < EXTENDED_NUMBER.size:
+        return _wrap_reply(ErrorReply.create(device, TOO_FEW_DATA_BYTES), EXTENDED_COMMAND, False)
+    extended_number, = EXTENDED_NUMBER.unpack_from(data)
+    # the inner request is a view of the wrapper data
+    return _dispatch_command(EXTENDED_COMMANDS, device, extended_number,
+                             memoryview(data)[EXTENDED_NUMBER.size:], is_extended=True)
+
+
+def _dispatch_command(registry: CommandRegistry, device: HartDevice, command_number: int,
+                      data: bytearray, is_extended: bool = False) -> bytes:
+    entry = registry.lookup(device, command_number)
+    if entry is None:
+        return _wrap_reply(ErrorReply.create(device, COMMAND_NOT_IMPLEMENTED),
+                           command_number, is_extended)
+
+    if entry.cacheable:
+        data = bytes(data)
+        cache = device.reply_cache
+        key = EXTENDED_CACHE_KEY | command_number if is_extended else command_number
+        reply = cache.get(device.state_version, key, data)
+        if reply is None:
+            reply = _pack_reply(entry, device, data, is_extended)
+            cache.put(device.state_version, key, data, reply)
     else:
-        payload = ErrorReply.create(device, U8(64))
-
-    return payload
+        reply = _pack_reply(entry, device, data, is_extended)
+
+    if entry.writes:
+        device.touch()
+    return reply
+
+
+def _pack_reply(entry: CommandEntry, device: HartDevice, data, is_extended: bool = False) -> bytes:
+    payload = entry.handle(device, data)
+    if payload is None:
+        payload = ErrorReply.create(device, TOO_FEW_DATA_BYTES)
+    return _wrap_reply(payload, entry.number, is_extended)
+
+
+def _wrap_reply(payload: PayloadSequence, command_number: int, is_extended: bool) -> bytes:
+    """Serialized `payload`, inside the command 31 wrapper if `is_extended`.
+
+    `payload` goes back to its pool once packed. The wrapper is the inner
+    response code and device status followed by the extended command
+    number and the rest of the inner reply: the inner reply is packed once,
+    two bytes into the wrapper, and its first two bytes are moved to the
+    front.
+    """
+    if not is_extended:
+        reply = payload.pack()
+        payload.release()
+        return reply
+    reply = payload.pack(reserve=EXTENDED_NUMBER.size)
+    payload.release()
+    reply[0:2] = reply[2:4]
+    EXTENDED_NUMBER.pack_into(reply, 2, command_number)
+    # cached replies are shared, so they are handed out immutable
+    return bytes(reply)
+
+
+# Payloads described as data (see layouts.py), built the first time a
+# command using them is handled
+REPLY_HEADER = [
+    {'name': 'response_code', 'type': 'U8'},
+    {'name': 'device_status', 'type': 'U8', 'from': 'device.device_status'},
+]
+STRAPPING_POINTS = 10
+# strapping points written per Cmd159 point set
+STRAPPING_WRITE_POINTS = 4
+
+LAYOUTS = LayoutTable({
+    'Cmd9Request': [
+        {'name': 'device_variable_codes', 'type': 'RepeatedGroup', 'min': 1, 'max': 8, 'fields': [
+            {'name': 'code', 'type': 'U8'},
+        ]},
+    ],
+    'Cmd9Reply': [
+        *REPLY_HEADER,
+        {'name': 'extended_device_status', 'type': 'U8', 'from': 'device.extended_device_status'},
+        {'name': 'device_variables', 'type': 'RepeatedGroup', 'min': 1, 'max': 8, 'fields': [
+            {'name': 'code', 'type': 'U8'},
+            {'name': 'classification', 'type': 'U8'},
+            {'name': 'units', 'type': 'U8'},
+            {'name': 'value', 'type': 'F32'},
+            {'name': 'status', 'type': 'U8'},
+        ]},
+        {'name': 'timestamp', 'type': 'U32'},
+    ],
+    'Cmd12Reply': [
+        *REPLY_HEADER,
+        {'name': 'hart_message', 'type': 'PackedAscii', 'size': 32, 'from': 'device.hart_message'},
+    ],
+    'Cmd13Reply': [
+        *REPLY_HEADER,
+        {'name': 'hart_tag', 'type': 'PackedAscii', 'size': 8, 'from': 'device.hart_tag'},
+        {'name': 'hart_descriptor', 'type': 'PackedAscii', 'size': 16, 'from': 'device.hart_descriptor'},
+        {'name': 'hart_date', 'type': 'U24', 'from': 'device.hart_date'},
+    ],
+    'Cmd20Reply': [
+        *REPLY_HEADER,
+        {'name': 'long_tag', 'type': 'Ascii', 'size': 32, 'from': 'device.hart_long_tag'},
+    ],
+    'StatusReply': REPLY_HEADER,
+    'LoopCurrentRequest': [
+        {'name': 'loop_current', 'type': 'F32'},
+    ],
+    'LoopCurrentReply': [
+        *REPLY_HEADER,
+        {'name': 'loop_current', 'type': 'F32', 'from': 'request.loop_current'},
+    ],
+    'Cmd72Reply': [
+        *REPLY_HEADER,
+        {'name': 'control_code', 'type': 'U8'},
+    ],
+    'Cmd76Reply': [
+        *REPLY_HEADER,
+        {'name': 'lock_status', 'type': 'U8'},
+    ],
+    'Cmd90Reply': [
+        *REPLY_HEADER,
+        {'name': 'year', 'type': 'U8'},
+        {'name': 'current_time', 'type': 'U32'},
+        {'name': 'day_clock_last_set', 'type': 'U8'},
+        {'name': 'month_clock_last_set', 'type': 'U8'},
+        {'name': 'year_clock_last_set', 'type': 'U8'},
+        {'name': 'time_clock_last_set', 'type': 'U32'},
+        {'name': 'rtc_flags', 'type': 'U8'},
+    ],
+    'Cmd105Reply': [
+        *REPLY_HEADER,
+        {'name': 'burst_mode_control_code', 'type': 'U8'},
+        {'name': 'burst_command_number_expansion_flag', 'type': 'U8'},
+        {'name': 'device_variable_code_slots', 'type': 'RepeatedGroup', 'min': 8, 'fields': [
+            {'name': 'code', 'type': 'U8'},
+        ]},
+        {'name': 'burst_message', 'type': 'U8'},
+        {'name': 'number_of_burst_messages', 'type': 'U8'},
+        {'name': 'extended_command_number', 'type': 'U16'},
+        {'name': 'update_period', 'type': 'U32'},
+        {'name': 'maximum_update_period', 'type': 'U32'},
+        {'name': 'burst_trigger_mode', 'type': 'U8'},
+        {'name': 'classification', 'type': 'U8'},
+        {'name': 'units_code', 'type': 'U8'},
+        {'name': 'trigger_level', 'type': 'U32'},
+    ],
+    'Cmd128Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'Ascii', 'size': 31, 'value': '\0' * 31},
+    ],
+    'Cmd133Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'U24'},
+    ],
+    'Cmd136Request': [
+        {'name': 'display_parameters', 'type': 'U16'},
+    ],
+    'Cmd136Reply': [
+        *REPLY_HEADER,
+        {'name': 'display_parameters', 'type': 'U16', 'from': 'device.display_parameters'},
+    ],
+    'Cmd137Reply': [
+        *REPLY_HEADER,
+        {'name': 'glcd_adjustment', 'type': 'U8', 'value': 0x12},
+        {'name': 'segment_display_language', 'type': 'U8', 'value': 0x34},
+        {'name': 'display_parameters', 'type': 'U16', 'from': 'device.display_parameters'},
+    ],
+    'Cmd140Request': [
+        {'name': 'alarm_saturation_setting', 'type': 'U8'},
+        {'name': 'high_alarm_level', 'type': 'F32'},
+        {'name': 'low_alarm_level', 'type': 'F32'},
+        {'name': 'high_saturation_level', 'type': 'F32'},
+        {'name': 'low_saturation_level', 'type': 'F32'},
+    ],
+    'AlarmSaturationReply': [
+        *REPLY_HEADER,
+        {'name': 'alarm_saturation_setting', 'type': 'U8', 'from': 'device.alarm_saturation_setting'},
+        {'name': 'high_alarm_level', 'type': 'F32', 'from': 'device.high_alarm_level'},
+        {'name': 'low_alarm_level', 'type': 'F32', 'from': 'device.low_alarm_level'},
+        {'name': 'high_saturation_level', 'type': 'F32', 'from': 'device.high_saturation_level'},
+        {'name': 'low_saturation_level', 'type': 'F32', 'from': 'device.low_saturation_level'},
+    ],
+    'Cmd148Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'PackedAscii', 'size': 32},
+    ],
+    'Cmd157Reply': [
+        *REPLY_HEADER,
+        {'name': 'levelUnits', 'type': 'U8', 'from': 'device.device_variables.4.units'},
+        {'name': 'pressureUnits', 'type': 'U8', 'from': 'device.device_variables.0.units'},
+        {'name': 'levelSetupMaxLevel', 'type': 'F32', 'value': -100},
+        {'name': 'levelSetupPressureAtMaxLevel', 'type': 'F32', 'value': -100},
+        {'name': 'levelSetupMinLevel', 'type': 'F32', 'value': 500},
+        {'name': 'levelSetupPressureAtMinLevel', 'type': 'F32', 'value': 500},
+        {'name': 'levelUsl', 'type': 'F32', 'value': 500},
+        {'name': 'levelLsl', 'type': 'F32', 'value': -100},
+        {'name': 'levelAdjustment', 'type': 'F32', 'value': 0},
+    ],
+    'Cmd158Request': [
+        {'name': 'volumeSetupNumStrapWritePoints', 'type': 'U8'},
+        {'name': 'volumeSetupTankWriteType', 'type': 'U8'},
+        {'name': 'volumeSetupTankWriteLength', 'type': 'F32'},
+        {'name': 'volumeSetupTankWriteRadius', 'type': 'F32'},
+    ],
+    'Cmd158Reply': [
+        *REPLY_HEADER,
+        {'name': 'volumeSetupNumStrapWritePoints', 'type': 'U8', 'from': 'device.volumeSetupNumStrapWritePoints'},
+        {'name': 'volumeSetupTankWriteType', 'type': 'U8', 'from': 'device.volumeSetupTankWriteType'},
+        {'name': 'volumeSetupTankWriteLength', 'type': 'F32', 'from': 'device.volumeSetupTankWriteLength'},
+        {'name': 'volumeSetupTankWriteRadius', 'type': 'F32', 'from': 'device.volumeSetupTankWriteRadius'},
+    ],
+    'Cmd161Reply': [
+        *REPLY_HEADER,
+        {'name': 'levelUnits', 'type': 'U8', 'from': 'device.device_variables.4.units'},
+        {'name': 'volumeUnits', 'type': 'U8', 'from': 'device.device_variables.5.units'},
+        {'name': 'volumeSetupNumStrapReadPoints', 'type': 'U8', 'from': 'device.volumeSetupNumStrapWritePoints'},
+        {'name': 'volumeSetupTankReadType', 'type': 'U8', 'from': 'device.volumeSetupTankWriteType'},
+        {'name': 'volumeSetupTankReadLength', 'type': 'F32', 'from': 'device.volumeSetupTankWriteLength'},
+        {'name': 'volumeSetupTankReadRadius', 'type': 'F32', 'from': 'device.volumeSetupTankWriteRadius'},
+        {'name': 'volumeUsl', 'type': 'F32', 'value': 500},
+    ],
+    'Cmd162Request': [
+        {'name': 'readStrappingPointSet', 'type': 'U8'},
+    ],
+    'Cmd162Reply': [
+        *REPLY_HEADER,
+        {'name': 'readStrappingPointSet', 'type': 'U8', 'from': 'request.readStrappingPointSet'},
+        {'name': 'levelUnits', 'type': 'U8', 'from': 'device.device_variables.4.units'},
+        {'name': 'volumeUnits', 'type': 'U8', 'from': 'device.device_variables.5.units'},
+        {'name': 'levels', 'type': 'F32Array', 'size': STRAPPING_POINTS},
+        {'name': 'volumes', 'type': 'F32Array', 'size': STRAPPING_POINTS},
+    ],
+    'Cmd177Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'Ascii', 'size': 86, 'value': '\0' * 86},
+    ],
+    'Reserved16Reply': [
+        *REPLY_HEADER,
+        *({'name': f'reserved_{index}', 'type': 'U32'} for index in range(4)),
+    ],
+    'Cmd200Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'Ascii', 'size': 50, 'value': '\0' * 50},
+    ],
+    'Reserved4Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'U32'},
+    ],
+    'Cmd220Reply': [
+        *REPLY_HEADER,
+        {'name': 'reserved_0', 'type': 'U32'},
+        {'name': 'reserved_1', 'type': 'U32'},
+        {'name': 'reserved_2', 'type': 'U8'},
+    ],
+})
+
+register_layouts(COMMANDS, LAYOUTS, {
+    12: {'reply': 'Cmd12Reply'},
+    13: {'reply': 'Cmd13Reply'},
+    20: {'reply': 'Cmd20Reply', 'min_revision': 6},
+    36: {'reply': 'StatusReply'},
+    37: {'reply': 'StatusReply'},
+    40: {'request': 'LoopCurrentRequest', 'reply': 'LoopCurrentReply'},
+    45: {'request': 'LoopCurrentRequest', 'reply': 'LoopCurrentReply'},
+    46: {'request': 'LoopCurrentRequest', 'reply': 'LoopCurrentReply'},
+    72: {'reply': 'Cmd72Reply'},
+    76: {'reply': 'Cmd76Reply'},
+    90: {'reply': 'Cmd90Reply'},
+    105: {'reply': 'Cmd105Reply'},
+    128: {'reply': 'Cmd128Reply'},
+    133: {'reply': 'Cmd133Reply'},
+    136: {'request': 'Cmd136Request', 'reply': 'Cmd136Reply', 'writes': True,
+          'assign': {'device.display_parameters': 'request.display_parameters'}},
+    137: {'reply': 'Cmd137Reply'},
+    140: {'request': 'Cmd140Request', 'reply': 'AlarmSaturationReply', 'writes': True,
+          'assign': {f'device.{name}': f'request.{name}' for name in (
+              'alarm_saturation_setting', 'high_alarm_level', 'low_alarm_level',
+              'high_saturation_level', 'low_saturation_level')}},
+    142: {'reply': 'AlarmSaturationReply'},
+    148: {'reply': 'Cmd148Reply'},
+    157: {'reply': 'Cmd157Reply', 'cacheable': False},
+    158: {'request': 'Cmd158Request', 'reply': 'Cmd158Reply', 'writes': True,
+          'assign': {f'device.{name}': f'request.{name}' for name in (
+              'volumeSetupNumStrapWritePoints', 'volumeSetupTankWriteType',
+              'volumeSetupTankWriteLength', 'volumeSetupTankWriteRadius')}},
+    160: {'reply': 'StatusReply'},
+    161: {'reply': 'Cmd161Reply', 'cacheable': False},
+    177: {'reply': 'Cmd177Reply'},
+    196: {'reply': 'Reserved16Reply'},
+    200: {'reply': 'Cmd200Reply'},
+    216: {'reply': 'Reserved16Reply'},
+    217: {'reply': 'Reserved4Reply'},
+    218: {'reply': 'Reserved4Reply'},
+    220: {'reply': 'Cmd220Reply'},
+    222: {'reply': 'Reserved4Reply'},
+})
+
+CMD9_REPLY = LayoutReply(LAYOUTS, 'Cmd9Reply')
+CMD162_REPLY = LayoutReply(LAYOUTS, 'Cmd162Reply')
+
+
+def __getattr__(name: str):
+    """Payload classes of LAYOUTS, generated on first access."""
+    if name in LAYOUTS:
+        return LAYOUTS.payload_class(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 @dataclass
@@ -217,7 +348,7 @@ class Cmd0Hart5Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
             expanded_device_type=device.expanded_device_type,
             device_id=device.device_id,
@@ -247,7 +378,7 @@ class Cmd0Hart7Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
             expanded_device_type=device.expanded_device_type,
             device_id=device.device_id,
@@ -258,6 +389,14 @@ class Cmd0Hart7Reply (PayloadSequence):
             private_label_distributor=device.private_label_distributor)
 
 
+@command(0)
+def _cmd0(device: HartDevice):
+    if device.universal_revision.get_value() == 5:
+        return Cmd0Hart5Reply.create(device)
+    return Cmd0Hart7Reply.create(device)
+
+
+@command(1, cacheable=False)
 @dataclass
 class Cmd1Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -267,13 +406,14 @@ class Cmd1Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        device.update_variables()
-        return cls(
+        device.update_variables((device.dynamic_variables[device.pv_selection.get_value()],))
+        return cls.acquire(
             device_status=device.device_status,
             pv_units=device.device_variables[device.dynamic_variables[device.pv_selection.get_value()]].units,
             pv_value=device.device_variables[device.dynamic_variables[device.pv_selection.get_value()]].value,)
 
 
+@command(2, cacheable=False)
 @dataclass
 class Cmd2Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -283,13 +423,14 @@ class Cmd2Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        device.update_variables()
-        return cls(
+        device.update_loop_current()
+        return cls.acquire(
             device_status=device.device_status,
             loop_current=device.loop_current,
             percent_of_range=device.percent_of_range)
 
 
+@command(3, cacheable=False)
 @dataclass
 class Cmd3Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -306,20 +447,25 @@ class Cmd3Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        device.update_variables()
-        return cls(
+        codes = device.dynamic_variable_codes()
+        device.update_loop_current()
+        device.update_variables(codes)
+        variables = device.device_variables
+        pv, sv, tv, qv = (variables[code] for code in codes)
+        return cls.acquire(
             device_status=device.device_status,
             loop_current=device.loop_current,
-            pv_units=device.device_variables[device.dynamic_variables[device.pv_selection.get_value()]].units,
-            pv_value=device.device_variables[device.dynamic_variables[device.pv_selection.get_value()]].value,
-            sv_units=device.device_variables[device.dynamic_variables[device.sv_selection.get_value()]].units,
-            sv_value=device.device_variables[device.dynamic_variables[device.sv_selection.get_value()]].value,
-            tv_units=device.device_variables[device.dynamic_variables[device.tv_selection.get_value()]].units,
-            tv_value=device.device_variables[device.dynamic_variables[device.tv_selection.get_value()]].value,
-            qv_units=device.device_variables[device.dynamic_variables[device.qv_selection.get_value()]].units,
-            qv_value=device.device_variables[device.dynamic_variables[device.qv_selection.get_value()]].value)
+            pv_units=pv.units,
+            pv_value=pv.value,
+            sv_units=sv.units,
+            sv_value=sv.value,
+            tv_units=tv.units,
+            tv_value=tv.value,
+            qv_units=qv.units,
+            qv_value=qv.value)
 
 
+@command(7, min_revision=6)
 @dataclass
 class Cmd7Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -329,12 +475,13 @@ class Cmd7Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
             polling_address=device.polling_address,
             loop_current_mode=device.loop_current_mode)
 
 
+@command(8, min_revision=6)
 @dataclass
 class Cmd8Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -346,337 +493,46 @@ class Cmd8Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            pv_classification=device.device_variables[device.dynamic_variables[device.pv_selection.get_value()]].classification,
-            sv_classification=device.device_variables[device.dynamic_variables[device.sv_selection.get_value()]].classification,
-            tv_classification=device.device_variables[device.dynamic_variables[device.tv_selection.get_value()]].classification,
-            qv_classification=device.device_variables[device.dynamic_variables[device.qv_selection.get_value()]].classification)
-
-
-@dataclass
-class Cmd9Request (PayloadSequence):
-    device_variable_code_1: U8 = U8()
-    device_variable_code_2: U8 = U8(is_optional=True)
-    device_variable_code_3: U8 = U8(is_optional=True)
-    device_variable_code_4: U8 = U8(is_optional=True)
-    device_variable_code_5: U8 = U8(is_optional=True)
-    device_variable_code_6: U8 = U8(is_optional=True)
-    device_variable_code_7: U8 = U8(is_optional=True)
-    device_variable_code_8: U8 = U8(is_optional=True)
-
-
-@dataclass
-class Cmd9Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    extended_device_status: U8 = U8()
-    device_variable_code_1: U8 = U8()
-    device_variable_classification_1: U8 = U8()
-    device_variable_units_1: U8 = U8()
-    device_variable_value_1: F32 = F32()
-    device_variable_status_1: U8 = U8()
-    device_variable_code_2: U8 = U8(is_optional=True)
-    device_variable_classification_2: U8 = U8(is_optional=True)
-    device_variable_units_2: U8 = U8(is_optional=True)
-    device_variable_value_2: F32 = F32(is_optional=True)
-    device_variable_status_2: U8 = U8(is_optional=True)
-    device_variable_code_3: U8 = U8(is_optional=True)
-    device_variable_classification_3: U8 = U8(is_optional=True)
-    device_variable_units_3: U8 = U8(is_optional=True)
-    device_variable_value_3: F32 = F32(is_optional=True)
-    device_variable_status_3: U8 = U8(is_optional=True)
-    device_variable_code_4: U8 = U8(is_optional=True)
-    device_variable_classification_4: U8 = U8(is_optional=True)
-    device_variable_units_4: U8 = U8(is_optional=True)
-    device_variable_value_4: F32 = F32(is_optional=True)
-    device_variable_status_4: U8 = U8(is_optional=True)
-    device_variable_code_5: U8 = U8(is_optional=True)
-    device_variable_classification_5: U8 = U8(is_optional=True)
-    device_variable_units_5: U8 = U8(is_optional=True)
-    device_variable_value_5: F32 = F32(is_optional=True)
-    device_variable_status_5: U8 = U8(is_optional=True)
-    device_variable_code_6: U8 = U8(is_optional=True)
-    device_variable_classification_6: U8 = U8(is_optional=True)
-    device_variable_units_6: U8 = U8(is_optional=True)
-    device_variable_value_6: F32 = F32(is_optional=True)
-    device_variable_status_6: U8 = U8(is_optional=True)
-    device_variable_code_7: U8 = U8(is_optional=True)
-    device_variable_classification_7: U8 = U8(is_optional=True)
-    device_variable_units_7: U8 = U8(is_optional=True)
-    device_variable_value_7: F32 = F32(is_optional=True)
-    device_variable_status_7: U8 = U8(is_optional=True)
-    device_variable_code_8: U8 = U8(is_optional=True)
-    device_variable_classification_8: U8 = U8(is_optional=True)
-    device_variable_units_8: U8 = U8(is_optional=True)
-    device_variable_value_8: F32 = F32(is_optional=True)
-    device_variable_status_8: U8 = U8(is_optional=True)
-    timestamp: U32 = U32()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd9Request):
-        device.update_variables()
-
-        payload = cls(
+        variables = device.device_variables
+        pv, sv, tv, qv = (variables[code] for code in device.dynamic_variable_codes())
+        return cls.acquire(
             device_status=device.device_status,
-            extended_device_status=device.extended_device_status)
-
-        payload.device_variable_code_1.set_value(
-            request.device_variable_code_1.get_value())
-
-        payload.device_variable_classification_1.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].classification.get_value())
-        payload.device_variable_units_1.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].units.get_value())
-        payload.device_variable_value_1.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].value.get_value())
-        payload.device_variable_status_1.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].status.get_value())
-
-        new_units = device.device_variables[request.device_variable_code_1.get_value(
-        )].alternate_units.get_value()
-        device.device_variables[request.device_variable_code_1.get_value()].alternate_units.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].units.get_value())
-        device.device_variables[request.device_variable_code_1.get_value(
-        )].units.set_value(new_units)
-
-        if request.device_variable_code_2.is_skipped():
-            payload.device_variable_code_2.skip()
-            payload.device_variable_classification_2.skip()
-            payload.device_variable_units_2.skip()
-            payload.device_variable_value_2.skip()
-            payload.device_variable_status_2.skip()
-        else:
-            payload.device_variable_code_2.set_value(
-                request.device_variable_code_2.get_value())
-            payload.device_variable_code_2.include()
-            payload.device_variable_classification_2.include()
-            payload.device_variable_classification_2.set_value(
-                device.device_variables[request.device_variable_code_2.get_value()].classification.get_value())
-            payload.device_variable_units_2.include()
-            payload.device_variable_units_2.set_value(
-                device.device_variables[request.device_variable_code_2.get_value()].units.get_value())
-            payload.device_variable_value_2.include()
-            payload.device_variable_value_2.set_value(
-                device.device_variables[request.device_variable_code_2.get_value()].value.get_value())
-            payload.device_variable_status_2.include()
-            payload.device_variable_status_2.set_value(
-                device.device_variables[request.device_variable_code_2.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_2.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_2.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_2.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_2.get_value(
-            )].units.set_value(new_units)
-        if request.device_variable_code_3.is_skipped():
-            payload.device_variable_code_3.skip()
-            payload.device_variable_classification_3.skip()
-            payload.device_variable_units_3.skip()
-            payload.device_variable_value_3.skip()
-            payload.device_variable_status_3.skip()
-        else:
-            payload.device_variable_code_3.set_value(
-                request.device_variable_code_3.get_value())
-            payload.device_variable_code_3.include()
-            payload.device_variable_classification_3.include()
-            payload.device_variable_classification_3.set_value(
-                device.device_variables[request.device_variable_code_3.get_value()].classification.get_value())
-            payload.device_variable_units_3.include()
-            payload.device_variable_units_3.set_value(
-                device.device_variables[request.device_variable_code_3.get_value()].units.get_value())
-            payload.device_variable_value_3.include()
-            payload.device_variable_value_3.set_value(
-                device.device_variables[request.device_variable_code_3.get_value()].value.get_value())
-            payload.device_variable_status_3.include()
-            payload.device_variable_status_3.set_value(
-                device.device_variables[request.device_variable_code_3.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_3.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_3.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_3.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_3.get_value(
-            )].units.set_value(new_units)
-        if request.device_variable_code_4.is_skipped():
-            payload.device_variable_code_4.skip()
-            payload.device_variable_classification_4.skip()
-            payload.device_variable_units_4.skip()
-            payload.device_variable_value_4.skip()
-            payload.device_variable_status_4.skip()
-        else:
-            payload.device_variable_code_4.set_value(
-                request.device_variable_code_4.get_value())
-            payload.device_variable_code_4.include()
-            payload.device_variable_classification_4.include()
-            payload.device_variable_classification_4.set_value(
-                device.device_variables[request.device_variable_code_4.get_value()].classification.get_value())
-            payload.device_variable_units_4.include()
-            payload.device_variable_units_4.set_value(
-                device.device_variables[request.device_variable_code_4.get_value()].units.get_value())
-            payload.device_variable_value_4.include()
-            payload.device_variable_value_4.set_value(
-                device.device_variables[request.device_variable_code_4.get_value()].value.get_value())
-            payload.device_variable_status_4.include()
-            payload.device_variable_status_4.set_value(
-                device.device_variables[request.device_variable_code_4.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_4.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_4.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_4.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_4.get_value(
-            )].units.set_value(new_units)
-        if request.device_variable_code_5.is_skipped():
-            payload.device_variable_code_5.skip()
-            payload.device_variable_classification_5.skip()
-            payload.device_variable_units_5.skip()
-            payload.device_variable_value_5.skip()
-            payload.device_variable_status_5.skip()
-        else:
-            payload.device_variable_code_5.set_value(
-                request.device_variable_code_5.get_value())
-            payload.device_variable_code_5.include()
-            payload.device_variable_classification_5.include()
-            payload.device_variable_classification_5.set_value(
-                device.device_variables[request.device_variable_code_5.get_value()].classification.get_value())
-            payload.device_variable_units_5.include()
-            payload.device_variable_units_5.set_value(
-                device.device_variables[request.device_variable_code_5.get_value()].units.get_value())
-            payload.device_variable_value_5.include()
-            payload.device_variable_value_5.set_value(
-                device.device_variables[request.device_variable_code_5.get_value()].value.get_value())
-            payload.device_variable_status_5.include()
-            payload.device_variable_status_5.set_value(
-                device.device_variables[request.device_variable_code_5.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_5.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_5.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_5.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_5.get_value(
-            )].units.set_value(new_units)
-        if request.device_variable_code_6.is_skipped():
-            payload.device_variable_code_6.skip()
-            payload.device_variable_classification_6.skip()
-            payload.device_variable_units_6.skip()
-            payload.device_variable_value_6.skip()
-            payload.device_variable_status_6.skip()
-        else:
-            payload.device_variable_code_6.set_value(
-                request.device_variable_code_6.get_value())
-            payload.device_variable_code_6.include()
-            payload.device_variable_classification_6.include()
-            payload.device_variable_classification_6.set_value(
-                device.device_variables[request.device_variable_code_6.get_value()].classification.get_value())
-            payload.device_variable_units_6.include()
-            payload.device_variable_units_6.set_value(
-                device.device_variables[request.device_variable_code_6.get_value()].units.get_value())
-            payload.device_variable_value_6.include()
-            payload.device_variable_value_6.set_value(
-                device.device_variables[request.device_variable_code_6.get_value()].value.get_value())
-            payload.device_variable_status_6.include()
-            payload.device_variable_status_6.set_value(
-                device.device_variables[request.device_variable_code_6.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_6.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_6.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_6.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_6.get_value(
-            )].units.set_value(new_units)
-        if request.device_variable_code_7.is_skipped():
-            payload.device_variable_code_7.skip()
-            payload.device_variable_classification_7.skip()
-            payload.device_variable_units_7.skip()
-            payload.device_variable_value_7.skip()
-            payload.device_variable_status_7.skip()
-        else:
-            payload.device_variable_code_7.set_value(
-                request.device_variable_code_7.get_value())
-            payload.device_variable_code_7.include()
-            payload.device_variable_classification_7.include()
-            payload.device_variable_classification_7.set_value(
-                device.device_variables[request.device_variable_code_7.get_value()].classification.get_value())
-            payload.device_variable_units_7.include()
-            payload.device_variable_units_7.set_value(
-                device.device_variables[request.device_variable_code_7.get_value()].units.get_value())
-            payload.device_variable_value_7.include()
-            payload.device_variable_value_7.set_value(
-                device.device_variables[request.device_variable_code_7.get_value()].value.get_value())
-            payload.device_variable_status_7.include()
-            payload.device_variable_status_7.set_value(
-                device.device_variables[request.device_variable_code_7.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_7.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_7.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_7.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_7.get_value(
-            )].units.set_value(new_units)
-        if request.device_variable_code_8.is_skipped():
-            payload.device_variable_code_8.skip()
-            payload.device_variable_classification_8.skip()
-            payload.device_variable_units_8.skip()
-            payload.device_variable_value_8.skip()
-            payload.device_variable_status_8.skip()
-        else:
-            payload.device_variable_code_8.set_value(
-                request.device_variable_code_8.get_value())
-            payload.device_variable_code_8.include()
-            payload.device_variable_classification_8.include()
-            payload.device_variable_classification_8.set_value(
-                device.device_variables[request.device_variable_code_8.get_value()].classification.get_value())
-            payload.device_variable_units_8.include()
-            payload.device_variable_units_8.set_value(
-                device.device_variables[request.device_variable_code_8.get_value()].units.get_value())
-            payload.device_variable_value_8.include()
-            payload.device_variable_value_8.set_value(
-                device.device_variables[request.device_variable_code_8.get_value()].value.get_value())
-            payload.device_variable_status_8.include()
-            payload.device_variable_status_8.set_value(
-                device.device_variables[request.device_variable_code_8.get_value()].status.get_value())
-
-            new_units = device.device_variables\
-                [request.device_variable_code_8.get_value()].alternate_units.get_value()
-            device.device_variables[request.device_variable_code_8.get_value()].alternate_units.set_value(
-                device.device_variables[request.device_variable_code_8.get_value()].units.get_value())
-            device.device_variables[request.device_variable_code_8.get_value(
-            )].units.set_value(new_units)
-
-        return payload
-
-
-@dataclass
-class Cmd12Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    hart_message: PackedAscii = PackedAscii(32)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            hart_message=device.hart_message)
-
-
-@dataclass
-class Cmd13Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    hart_tag: PackedAscii = PackedAscii(8)
-    hart_descriptor: PackedAscii = PackedAscii(16)
-    hart_date: U24 = U24()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            hart_tag=device.hart_tag,
-            hart_descriptor=device.hart_descriptor,
-            hart_date=device.hart_date)
+            pv_classification=pv.classification,
+            sv_classification=sv.classification,
+            tv_classification=tv.classification,
+            qv_classification=qv.classification)
+
+
+def _toggle_units(variable):
+    """Swap the units of `variable` with its alternate ones after a read.
+
+    Polls toggle the units without a new state version, so the replies
+    carrying variable units are not cached.
+    """
+    new_units = variable.alternate_units.get_value()
+    variable.alternate_units.set_value(variable.units.get_value())
+    variable.units.set_value(new_units)
+
+
+@command(9, LAYOUTS.factory('Cmd9Request'), min_revision=6, cacheable=False)
+def _cmd9(device: HartDevice, request: PayloadSequence):
+    codes = [code for code, in request.device_variable_codes.get_value()]
+    device.update_variables(codes)
+    payload = CMD9_REPLY(device, request)
+    slots = []
+    for code in codes:
+        variable = device.device_variables[code]
+        slots.append((code,
+                      variable.classification.get_value(),
+                      variable.units.get_value(),
+                      variable.value.get_value(),
+                      variable.status.get_value()))
+        _toggle_units(variable)
+    payload.device_variables.set_value(slots)
+    return payload
 
 
+@command(15, cacheable=False)
 @dataclass
 class Cmd15Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -692,7 +548,7 @@ class Cmd15Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
             units=device.device_variables[device.pv_selection.get_value()].units,
             lrv=device.device_variables[device.pv_selection.get_value()].lrv,
@@ -701,108 +557,41 @@ class Cmd15Reply (PayloadSequence):
 
 
 @dataclass
-class Cmd20Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    long_tag: Ascii = Ascii(32)
+class DeviceVariableCode (PayloadSequence):
+    code: U8 = U8()
 
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            long_tag=device.hart_long_tag)
 
 @dataclass
 class Cmd33Request (PayloadSequence):
-    device_variable_code_1: U8 = U8()
-    device_variable_code_2: U8 = U8()
-    device_variable_code_3: U8 = U8()
-    device_variable_code_4: U8 = U8()
+    device_variable_codes: RepeatedGroup = RepeatedGroup(DeviceVariableCode, 4)
 
 
+@dataclass
+class Cmd33Slot (PayloadSequence):
+    code: U8 = U8()
+    units: U8 = U8()
+    value: F32 = F32()
+
+
+@command(33, Cmd33Request, cacheable=False)
 @dataclass
 class Cmd33Reply (PayloadSequence):
     response_code: U8 = U8()
     device_status: U8 = U8()
-    device_variable_code_1: U8 = U8()
-    device_variable_units_1: U8 = U8()
-    device_variable_value_1: F32 = F32()
-    device_variable_code_2: U8 = U8()
-    device_variable_units_2: U8 = U8()
-    device_variable_value_2: F32 = F32()
-    device_variable_code_3: U8 = U8()
-    device_variable_units_3: U8 = U8()
-    device_variable_value_3: F32 = F32()
-    device_variable_code_4: U8 = U8()
-    device_variable_units_4: U8 = U8()
-    device_variable_value_4: F32 = F32()
+    device_variables: RepeatedGroup = RepeatedGroup(Cmd33Slot, 4)
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd33Request):
-        device.update_variables()
-
-        payload = cls(device_status=device.device_status)
-
-        payload.device_variable_code_1.set_value(
-            request.device_variable_code_1.get_value())
-
-        payload.device_variable_units_1.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].units.get_value())
-        payload.device_variable_value_1.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].value.get_value())
-
-        new_units = device.device_variables[request.device_variable_code_1.get_value(
-        )].alternate_units.get_value()
-        device.device_variables[request.device_variable_code_1.get_value()].alternate_units.set_value(
-            device.device_variables[request.device_variable_code_1.get_value()].units.get_value())
-        device.device_variables[request.device_variable_code_1.get_value(
-        )].units.set_value(new_units)
-
-        payload.device_variable_code_2.set_value(
-            request.device_variable_code_2.get_value())
-
-        payload.device_variable_units_2.set_value(
-            device.device_variables[request.device_variable_code_2.get_value()].units.get_value())
-        payload.device_variable_value_2.set_value(
-            device.device_variables[request.device_variable_code_2.get_value()].value.get_value())
-
-        new_units = device.device_variables[request.device_variable_code_2.get_value(
-        )].alternate_units.get_value()
-        device.device_variables[request.device_variable_code_2.get_value()].alternate_units.set_value(
-            device.device_variables[request.device_variable_code_2.get_value()].units.get_value())
-        device.device_variables[request.device_variable_code_2.get_value(
-        )].units.set_value(new_units)
-
-        payload.device_variable_code_3.set_value(
-            request.device_variable_code_3.get_value())
-
-        payload.device_variable_units_3.set_value(
-            device.device_variables[request.device_variable_code_3.get_value()].units.get_value())
-        payload.device_variable_value_3.set_value(
-            device.device_variables[request.device_variable_code_3.get_value()].value.get_value())
-
-        new_units = device.device_variables[request.device_variable_code_3.get_value(
-        )].alternate_units.get_value()
-        device.device_variables[request.device_variable_code_3.get_value()].alternate_units.set_value(
-            device.device_variables[request.device_variable_code_3.get_value()].units.get_value())
-        device.device_variables[request.device_variable_code_3.get_value(
-        )].units.set_value(new_units)
-
-        payload.device_variable_code_4.set_value(
-            request.device_variable_code_4.get_value())
-
-        payload.device_variable_units_4.set_value(
-            device.device_variables[request.device_variable_code_4.get_value()].units.get_value())
-        payload.device_variable_value_4.set_value(
-            device.device_variables[request.device_variable_code_4.get_value()].value.get_value())
-
-        new_units = device.device_variables[request.device_variable_code_4.get_value(
-        )].alternate_units.get_value()
-        device.device_variables[request.device_variable_code_4.get_value()].alternate_units.set_value(
-            device.device_variables[request.device_variable_code_4.get_value()].units.get_value())
-        device.device_variables[request.device_variable_code_4.get_value(
-        )].units.set_value(new_units)
-
+        codes = [code for code, in request.device_variable_codes.get_value()]
+        device.update_variables(codes)
+
+        payload = cls.acquire(device_status=device.device_status)
+        slots = []
+        for code in codes:
+            variable = device.device_variables[code]
+            slots.append((code, variable.units.get_value(), variable.value.get_value()))
+            _toggle_units(variable)
+        payload.device_variables.set_value(slots)
         return payload
 
 @dataclass
@@ -816,7 +605,7 @@ class Cmd34InvalidSelectionReply(PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd34Request):
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
         )
     
@@ -829,79 +618,21 @@ class Cmd34Reply(PayloadSequence):
     @classmethod
     def create(cls, device: HartDevice, request: Cmd34Request):
         device.pv_damping.set_value(request.pv_damping.get_value())
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
         pv_damping=request.pv_damping)
 
-@dataclass
-class Cmd36Reply(PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-@dataclass
-class Cmd37Reply(PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-@dataclass
-class Cmd40Request (PayloadSequence):
-    loop_current: F32 = F32()
-
-
-@dataclass
-class Cmd40Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    loop_current: F32 = F32()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd40Request):
-        return cls(
-            device_status=device.device_status,
-            loop_current=F32(request.loop_current.get_value()))
-
-@dataclass
-class Cmd45Request(PayloadSequence):
-    loop_current: F32 = F32()
-
-@dataclass
-class Cmd45Reply(PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    loop_current: F32 = F32()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd45Request):
-        return cls(
-            device_status=device.device_status,
-            loop_current=F32(request.loop_current.get_value()))
 
-@dataclass
-class Cmd46Request(PayloadSequence):
-    loop_current: F32 = F32()
-
-@dataclass
-class Cmd46Reply(PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    loop_current: F32 = F32()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd46Request):
-        return cls(
-            device_status=device.device_status,
-            loop_current=F32(request.loop_current.get_value()))
+@command(34, Cmd34Request, writes=True)
+def _cmd34(device: HartDevice, request: Cmd34Request):
+    if device.simulate_invalid_selection:
+        payload = Cmd34InvalidSelectionReply.create(device, request)
+    else:
+        payload = Cmd34Reply.create(device, request)
+    device.simulate_invalid_selection = not device.simulate_invalid_selection
+    return payload
 
+@command(48, writes=True)
 @dataclass
 class Cmd48Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -919,7 +650,7 @@ class Cmd48Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        payload = cls(
+        payload = cls.acquire(
             device_status=device.device_status)
 
         payload.device_specific_status_0.set_value(
@@ -933,6 +664,7 @@ class Cmd48Reply (PayloadSequence):
 
         return payload
 
+@command(50)
 @dataclass
 class Cmd50Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -944,7 +676,7 @@ class Cmd50Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        payload = cls(
+        payload = cls.acquire(
             device_status=device.device_status,
             pv_selection=device.pv_selection,
             sv_selection=device.sv_selection,
@@ -960,6 +692,7 @@ class Cmd51Request (PayloadSequence):
     qv_selection: U8 = U8()
 
 
+@command(51, Cmd51Request, writes=True)
 @dataclass
 class Cmd51Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -975,7 +708,7 @@ class Cmd51Reply (PayloadSequence):
         device.sv_selection.set_value(request.sv_selection.get_value())
         device.tv_selection.set_value(request.tv_selection.get_value())
         device.qv_selection.set_value(request.qv_selection.get_value())
-        payload = cls(
+        payload = cls.acquire(
             device_status=device.device_status,
             pv_selection=device.pv_selection,
             sv_selection=device.sv_selection,
@@ -988,6 +721,7 @@ class Cmd53Request (PayloadSequence):
     device_variable_code: U8 = U8()
     device_variable_units: U8 = U8()
 
+@command(53, Cmd53Request, writes=True)
 @dataclass
 class Cmd53Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1001,7 +735,7 @@ class Cmd53Reply(PayloadSequence):
             request.device_variable_units.get_value())
         device.device_variables[request.device_variable_code.get_value()].alternate_units.set_value(
             request.device_variable_units.get_value())
-        return cls(
+        return cls.acquire(
             device_status=device.device_status,
             device_variable_code=request.device_variable_code,
             device_variable_units=request.device_variable_units)
@@ -1011,6 +745,7 @@ class Cmd54Request (PayloadSequence):
     device_variable_code: U8 = U8()
 
 
+@command(54, Cmd54Request, cacheable=False)
 @dataclass
 class Cmd54Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -1029,7 +764,7 @@ class Cmd54Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd54Request):
-        payload = cls(device_status=device.device_status)
+        payload = cls.acquire(device_status=device.device_status)
 
         payload.device_variable_code.set_value(
             request.device_variable_code.get_value())
@@ -1043,29 +778,10 @@ class Cmd54Reply (PayloadSequence):
         payload.device_variable_damping.set_value(
             device.pv_damping.get_value())
 
-        return payload
-
-@dataclass
-class Cmd72Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    control_code: U8 = U8()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-@dataclass
-class Cmd76Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    lock_status: U8 = U8()
+        payload.device_variable_update_period.set_value(
+            device.device_variables[request.device_variable_code.get_value()].update_period.get_value())
 
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
+        return payload
 
 @dataclass
 class Cmd79Request (PayloadSequence):
@@ -1076,6 +792,7 @@ class Cmd79Request (PayloadSequence):
     digital_status: U8 = U8()
 
 
+@command(79, Cmd79Request, writes=True)
 @dataclass
 class Cmd79Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -1088,17 +805,14 @@ class Cmd79Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd79Request):
-        payload = cls(device_status=device.device_status)
+        payload = cls.acquire(device_status=device.device_status)
 
         variableCode = request.device_variable_code.get_value()
 
         if request.simulated.get_value() != 0:
-            if variableCode not in device.simulated_variables.keys():
-                device.simulated_variables[variableCode] = device.device_variables[variableCode].value.get_value()
-            device.device_variables[variableCode].value.set_value(request.digital_value.get_value())
-        elif variableCode in device.simulated_variables.keys():
-            device.device_variables[variableCode].value.set_value(device.simulated_variables[variableCode])
-            device.simulated_variables.pop(variableCode)
+            device.simulate_variable(variableCode, request.digital_value.get_value())
+        else:
+            device.release_variable(variableCode)
 
         payload.device_variable_code.set_value(
             request.device_variable_code.get_value())
@@ -1118,223 +832,6 @@ class Cmd79Reply (PayloadSequence):
         return payload
 
 
-@dataclass
-class Cmd90Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    year: U8 = U8()
-    current_time: U32 = U32()
-    day_clock_last_set: U8 = U8()
-    month_clock_last_set: U8 = U8()
-    year_clock_last_set: U8 = U8()
-    time_clock_last_set: U32 = U32()
-    rtc_flags: U8 = U8()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd105Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    burst_mode_control_code: U8 = U8()
-    burst_command_number_expansion_flag: U8 = U8()
-    device_variable_code_slot_0: U8 = U8()
-    device_variable_code_slot_1: U8 = U8()
-    device_variable_code_slot_2: U8 = U8()
-    device_variable_code_slot_3: U8 = U8()
-    device_variable_code_slot_4: U8 = U8()
-    device_variable_code_slot_5: U8 = U8()
-    device_variable_code_slot_6: U8 = U8()
-    device_variable_code_slot_7: U8 = U8()
-    burst_message: U8 = U8()
-    number_of_burst_messages: U8 = U8()
-    extended_command_number: U16 = U16()
-    update_period: U32 = U32()
-    maximum_update_period: U32 = U32()
-    burst_trigger_mode: U8 = U8()
-    classification: U8 = U8()
-    units_code: U8 = U8()
-    trigger_level: F32 = U32()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd128Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: Ascii = Ascii(31)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        payload = cls(
-            device_status=device.device_status)
-        payload.reserved_0.set_value('\0' * 31)
-        return payload
-
-
-@dataclass
-class Cmd133Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U24 = U24()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-@dataclass
-class Cmd136Request (PayloadSequence):
-    display_parameters: U16 = U16()
-
-
-@dataclass
-class Cmd136Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    display_parameters: U16 = U16()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd136Request):
-        device.display_parameters.set_value(request.display_parameters.get_value())
-        payload = cls(device_status=device.device_status,display_parameters=device.display_parameters)
-        return payload
-
-@dataclass
-class Cmd137Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    glcd_adjustment: U8 = U8(0x12)
-    segment_display_language: U8 = U8(0x34)
-    display_parameters: U16 = U16()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        payload = cls(device_status=device.device_status,display_parameters=device.display_parameters)
-        return payload
-
-@dataclass
-class Cmd140Request (PayloadSequence):
-    alarm_saturation_setting: U8 = U8()
-    high_alarm_level: F32 = F32()
-    low_alarm_level: F32 = F32()
-    high_saturation_level: F32 = F32()
-    low_saturation_level: F32 = F32()
-
-@dataclass
-class Cmd140Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    alarm_saturation_setting: U8 = U8()
-    high_alarm_level: F32 = F32()
-    low_alarm_level: F32 = F32()
-    high_saturation_level: F32 = F32()
-    low_saturation_level: F32 = F32()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd140Request):
-        device.alarm_saturation_setting.set_value(request.alarm_saturation_setting.get_value())
-        device.high_alarm_level.set_value(request.high_alarm_level.get_value())
-        device.low_alarm_level.set_value(request.low_alarm_level.get_value())
-        device.high_saturation_level.set_value(request.high_saturation_level.get_value())
-        device.low_saturation_level.set_value(request.low_saturation_level.get_value())
-        return cls(
-            device_status=device.device_status,
-            alarm_saturation_setting=device.alarm_saturation_setting,
-            high_alarm_level=device.high_alarm_level,
-            low_alarm_level=device.low_alarm_level,
-            high_saturation_level=device.high_saturation_level,
-            low_saturation_level=device.low_saturation_level)
-
-@dataclass
-class Cmd142Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    alarm_saturation_setting: U8 = U8()
-    high_alarm_level: F32 = F32()
-    low_alarm_level: F32 = F32()
-    high_saturation_level: F32 = F32()
-    low_saturation_level: F32 = F32()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            alarm_saturation_setting=device.alarm_saturation_setting,
-            high_alarm_level=device.high_alarm_level,
-            low_alarm_level=device.low_alarm_level,
-            high_saturation_level=device.high_saturation_level,
-            low_saturation_level=device.low_saturation_level)
-
-@dataclass
-class Cmd148Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: PackedAscii = PackedAscii(32)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-@dataclass
-class Cmd157Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    levelUnits: U8 = U8()
-    pressureUnits: U8 = U8()
-    levelSetupMaxLevel: F32 = F32(-100)
-    levelSetupPressureAtMaxLevel: F32 = F32(-100)
-    levelSetupMinLevel: F32 = F32(500)
-    levelSetupPressureAtMinLevel: F32 = F32(500)
-    levelUsl: F32 = F32(500)
-    levelLsl: F32 = F32(-100)
-    levelAdjustment: F32 = F32(0)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            levelUnits=device.device_variables[4].units,
-            pressureUnits=device.device_variables[0].units)
-
-@dataclass
-class Cmd158Request (PayloadSequence):
-    volumeSetupNumStrapWritePoints: U8 = U8()
-    volumeSetupTankWriteType: U8 = U8()
-    volumeSetupTankWriteLength: F32 = F32()
-    volumeSetupTankWriteRadius: F32 = F32()
-
-@dataclass
-class Cmd158Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    volumeSetupNumStrapWritePoints: U8 = U8()
-    volumeSetupTankWriteType: U8 = U8()
-    volumeSetupTankWriteLength: F32 = F32()
-    volumeSetupTankWriteRadius: F32 = F32()
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd158Request):
-        device.volumeSetupNumStrapWritePoints.set_value(request.volumeSetupNumStrapWritePoints.get_value())
-        device.volumeSetupTankWriteType.set_value(request.volumeSetupTankWriteType.get_value())
-        device.volumeSetupTankWriteLength.set_value(request.volumeSetupTankWriteLength.get_value())
-        device.volumeSetupTankWriteRadius.set_value(request.volumeSetupTankWriteRadius.get_value())
-        return cls(
-            device_status=device.device_status,
-            volumeSetupNumStrapWritePoints=device.volumeSetupNumStrapWritePoints,
-            volumeSetupTankWriteType=device.volumeSetupTankWriteType,
-            volumeSetupTankWriteLength=device.volumeSetupTankWriteLength,
-            volumeSetupTankWriteRadius=device.volumeSetupTankWriteRadius)
-
 @dataclass
 class Cmd159Request (PayloadSequence):
     writeStrappingPointSet: U8 = U8()
@@ -1349,6 +846,7 @@ class Cmd159Request (PayloadSequence):
     volumeC: F32 = F32()
     volumeD: F32 = F32()
 
+@command(159, Cmd159Request, writes=True)
 @dataclass
 class Cmd159Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -1367,15 +865,13 @@ class Cmd159Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd159Request):
-        device.strappingTableLevel[request.writeStrappingPointSet.get_value() * 4 + 0] = request.levelA.get_value()
-        device.strappingTableLevel[request.writeStrappingPointSet.get_value() * 4 + 1] = request.levelB.get_value()
-        device.strappingTableLevel[request.writeStrappingPointSet.get_value() * 4 + 2] = request.levelC.get_value()
-        device.strappingTableLevel[request.writeStrappingPointSet.get_value() * 4 + 3] = request.levelD.get_value()
-        device.strappingTableVolume[request.writeStrappingPointSet.get_value() * 4 + 0] = request.volumeA.get_value()
-        device.strappingTableVolume[request.writeStrappingPointSet.get_value() * 4 + 1] = request.volumeB.get_value()
-        device.strappingTableVolume[request.writeStrappingPointSet.get_value() * 4 + 2] = request.volumeC.get_value()
-        device.strappingTableVolume[request.writeStrappingPointSet.get_value() * 4 + 3] = request.volumeD.get_value()
-        return cls(
+        device.write_strapping_points(
+            request.writeStrappingPointSet.get_value() * STRAPPING_WRITE_POINTS,
+            (request.levelA.get_value(), request.levelB.get_value(),
+             request.levelC.get_value(), request.levelD.get_value()),
+            (request.volumeA.get_value(), request.volumeB.get_value(),
+             request.volumeC.get_value(), request.volumeD.get_value()))
+        return cls.acquire(
             device_status=device.device_status,
             writeStrappingPointSet=request.writeStrappingPointSet,
             levelConfigUnits=request.levelConfigUnits,
@@ -1389,146 +885,28 @@ class Cmd159Reply (PayloadSequence):
             volumeC=request.volumeC,
             volumeD=request.volumeD)
 
-@dataclass
-class Cmd160Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd161Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    levelUnits: U8 = U8()
-    volumeUnits: U8 = U8()
-    volumeSetupNumStrapReadPoints: U8 = U8()
-    volumeSetupTankReadType: U8 = U8()
-    volumeSetupTankReadLength: F32 = F32()
-    volumeSetupTankReadRadius: F32 = F32()
-    volumeUsl: F32 = F32(500)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        payload = cls(
-            device_status=device.device_status,
-            levelUnits=device.device_variables[4].units,
-            volumeUnits=device.device_variables[5].units,
-            volumeSetupNumStrapReadPoints=device.volumeSetupNumStrapWritePoints,
-            volumeSetupTankReadType=device.volumeSetupTankWriteType,
-            volumeSetupTankReadLength=device.volumeSetupTankWriteLength,
-            volumeSetupTankReadRadius=device.volumeSetupTankWriteRadius)
-        return payload
-
-
-@dataclass
-class Cmd162Request (PayloadSequence):
-    readStrappingPointSet: U8 = U8()
-
-@dataclass
-class Cmd162Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    readStrappingPointSet: U8 = U8()
-    levelUnits: U8 = U8()
-    volumeUnits: U8 = U8()
-    level_a: F32 = F32(10)
-    level_b: F32 = F32(20)
-    level_c: F32 = F32(30)
-    level_d: F32 = F32(40)
-    level_e: F32 = F32(50)
-    level_f: F32 = F32(60)
-    level_g: F32 = F32(70)
-    level_h: F32 = F32(80)
-    level_i: F32 = F32(90)
-    level_j: F32 = F32(100)
-    volume_a: F32 = F32(0.1)
-    volume_b: F32 = F32(0.2)
-    volume_c: F32 = F32(0.3)
-    volume_d: F32 = F32(0.4)
-    volume_e: F32 = F32(0.5)
-    volume_f: F32 = F32(0.6)
-    volume_g: F32 = F32(0.7)
-    volume_h: F32 = F32(0.8)
-    volume_i: F32 = F32(0.9)
-    volume_j: F32 = F32(1.0)
-
-    @classmethod
-    def create(cls, device: HartDevice, request: Cmd162Request):
-        return cls(
-            device_status=device.device_status,
-            readStrappingPointSet=request.readStrappingPointSet,
-            levelUnits=device.device_variables[4].units,
-            volumeUnits=device.device_variables[5].units,
-            level_a=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 0]),
-            level_b=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 1]),
-            level_c=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 2]),
-            level_d=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 3]),
-            level_e=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 4]),
-            level_f=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 5]),
-            level_g=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 6]),
-            level_h=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 7]),
-            level_i=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 8]),
-            level_j=F32(device.strappingTableLevel[request.readStrappingPointSet.get_value() * 10 + 9]),
-            volume_a=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 0]),
-            volume_b=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 1]),
-            volume_c=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 2]),
-            volume_d=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 3]),
-            volume_e=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 4]),
-            volume_f=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 5]),
-            volume_g=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 6]),
-            volume_h=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 7]),
-            volume_i=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 8]),
-            volume_j=F32(device.strappingTableVolume[request.readStrappingPointSet.get_value() * 10 + 9]))
-
-@dataclass
-class Cmd177Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: Ascii = Ascii(86)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        payload = cls(
-            device_status=device.device_status)
-        payload.reserved_0.set_value('\0' * 86)
-        return payload
-
-@dataclass
-class Cmd196Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U32 = U32()
-    reserved_1: U32 = U32()
-    reserved_2: U32 = U32()
-    reserved_3: U32 = U32()
+@command(162, LAYOUTS.factory('Cmd162Request'), cacheable=False)
+def _cmd162(device: HartDevice, request: PayloadSequence):
+    first = request.readStrappingPointSet.get_value() * STRAPPING_POINTS
+    if first >= len(device.strappingTableLevel):
+        return ErrorReply.create(device, INVALID_SELECTION)
+    payload = CMD162_REPLY(device, request)
+    points = slice(first, first + STRAPPING_POINTS)
+    payload.levels.set_value(_point_set(device.strappingTableLevel[points]))
+    payload.volumes.set_value(_point_set(device.strappingTableVolume[points]))
+    return payload
 
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
 
-@dataclass
-class Cmd200Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: Ascii = Ascii(50)
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        payload = cls(
-            device_status=device.device_status)
-        payload.reserved_0.set_value('\0' * 50)
-        return payload
+def _point_set(points):
+    """`points` of a Cmd162 set, the last set of the table padded with zeros."""
+    missing = STRAPPING_POINTS - len(points)
+    return [*points, *[0.0] * missing] if missing else points
 
 @dataclass
 class Cmd202Request (PayloadSequence):
     index: U8 = U8()
 
+@command(202, Cmd202Request, cacheable=False)
 @dataclass
 class Cmd202Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -1549,7 +927,7 @@ class Cmd202Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd202Request):
-        payload = cls(
+        payload = cls.acquire(
             device_status=device.device_status)
 
         if request.index.get_value() == 0:
@@ -1568,6 +946,7 @@ class Cmd202Reply (PayloadSequence):
 class Cmd203Request (PayloadSequence):
     index: U8 = U8()
 
+@command(203, Cmd203Request, cacheable=False)
 @dataclass
 class Cmd203Reply (PayloadSequence):
     response_code: U8 = U8()
@@ -1582,16 +961,16 @@ class Cmd203Reply (PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice, request: Cmd203Request):
-        payload = cls(
+        payload = cls.acquire(
             device_status=device.device_status)
 
-        device.update_variables()
-
         if request.index.get_value() == 0:
             variable = 0
         else:
             variable = 1
 
+        device.update_variables((variable,))
+
         payload.index.set_value(request.index.get_value())
         payload.units.set_value(device.device_variables[variable].units.get_value())
         payload.value.set_value(device.device_variables[variable].value.get_value())
@@ -1602,71 +981,7 @@ class Cmd203Reply (PayloadSequence):
         payload.time.set_value('\0' * 50)
         return payload
 
-@dataclass
-class Cmd216Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U32 = U32()
-    reserved_1: U32 = U32()
-    reserved_2: U32 = U32()
-    reserved_3: U32 = U32()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd217Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U32 = U32()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd218Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U32 = U32()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd220Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U32 = U32()
-    reserved_1: U32 = U32()
-    reserved_2: U8 = U8()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
-@dataclass
-class Cmd222Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    reserved_0: U32 = U32()
-
-    @classmethod
-    def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status)
-
-
+@command(230)
 @dataclass
 class Cmd230Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1678,12 +993,12 @@ class Cmd230Reply(PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            lin_x=F32Array(10, device.waveform_lin_x),
-            lin_y=F32Array(10, device.waveform_lin_y),
-            kp_x=F32Array(5, device.waveform_kp_x),
-            kp_y=F32Array(5, device.waveform_kp_y))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.lin_x.set_value(device.waveform_lin_x)
+        payload.lin_y.set_value(device.waveform_lin_y)
+        payload.kp_x.set_value(device.waveform_kp_x)
+        payload.kp_y.set_value(device.waveform_kp_y)
+        return payload
 
 
 @dataclass
@@ -1694,6 +1009,7 @@ class Cmd231Request(PayloadSequence):
     kp_y: F32Array = F32Array(5)
 
 
+@command(231, Cmd231Request, writes=True)
 @dataclass
 class Cmd231Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1709,14 +1025,15 @@ class Cmd231Reply(PayloadSequence):
         device.waveform_lin_y = request.lin_y.get_value()
         device.waveform_kp_x = request.kp_x.get_value()
         device.waveform_kp_y = request.kp_y.get_value()
-        return cls(
-            device_status=device.device_status,
-            lin_x=F32Array(10, device.waveform_lin_x),
-            lin_y=F32Array(10, device.waveform_lin_y),
-            kp_x=F32Array(5, device.waveform_kp_x),
-            kp_y=F32Array(5, device.waveform_kp_y))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.lin_x.set_value(device.waveform_lin_x)
+        payload.lin_y.set_value(device.waveform_lin_y)
+        payload.kp_x.set_value(device.waveform_kp_x)
+        payload.kp_y.set_value(device.waveform_kp_y)
+        return payload
 
 
+@command(232)
 @dataclass
 class Cmd232Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1726,12 +1043,13 @@ class Cmd232Reply(PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            sen_x=F32Array(10, device.waveform_sen_x),
-            sen_y=F32Array(10, device.waveform_sen_y))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.sen_x.set_value(device.waveform_sen_x)
+        payload.sen_y.set_value(device.waveform_sen_y)
+        return payload
 
 
+@command(233)
 @dataclass
 class Cmd233Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1741,10 +1059,10 @@ class Cmd233Reply(PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            yt=F32Array(20, device.waveform_yt),
-            ro_yt=F32Array(20, device.waveform_ro_yt))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.yt.set_value(device.waveform_yt)
+        payload.ro_yt.set_value(device.waveform_ro_yt)
+        return payload
 
 
 @dataclass
@@ -1752,6 +1070,7 @@ class Cmd234Request(PayloadSequence):
     yt: F32Array = F32Array(20)
 
 
+@command(234, Cmd234Request, writes=True)
 @dataclass
 class Cmd234Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1761,11 +1080,12 @@ class Cmd234Reply(PayloadSequence):
     @classmethod
     def create(cls, device: HartDevice, request: Cmd234Request):
         device.waveform_yt = request.yt.get_value()
-        return cls(
-            device_status=device.device_status,
-            yt=F32Array(20, device.waveform_yt))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.yt.set_value(device.waveform_yt)
+        return payload
 
 
+@command(235)
 @dataclass
 class Cmd235Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1778,13 +1098,13 @@ class Cmd235Reply(PayloadSequence):
 
     @classmethod
     def create(cls, device: HartDevice):
-        return cls(
-            device_status=device.device_status,
-            hi_alarm=F32(device.waveform_hi_alarm),
-            lo_alarm=F32(device.waveform_lo_alarm),
-            marker_1=F32(device.waveform_marker_1),
-            marker_2=F32(device.waveform_marker_2),
-            initialized=F32(device.waveform_initialized))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.hi_alarm.set_value(device.waveform_hi_alarm)
+        payload.lo_alarm.set_value(device.waveform_lo_alarm)
+        payload.marker_1.set_value(device.waveform_marker_1)
+        payload.marker_2.set_value(device.waveform_marker_2)
+        payload.initialized.set_value(device.waveform_initialized)
+        return payload
 
 
 @dataclass
@@ -1796,6 +1116,7 @@ class Cmd236Request(PayloadSequence):
     initialized: F32 = F32()
 
 
+@command(236, Cmd236Request, writes=True)
 @dataclass
 class Cmd236Reply(PayloadSequence):
     response_code: U8 = U8()
@@ -1813,13 +1134,13 @@ class Cmd236Reply(PayloadSequence):
         device.waveform_marker_1 = request.marker_1.get_value()
         device.waveform_marker_2 = request.marker_2.get_value()
         device.waveform_initialized = request.initialized.get_value()
-        return cls(
-            device_status=device.device_status,
-            hi_alarm=F32(device.waveform_hi_alarm),
-            lo_alarm=F32(device.waveform_lo_alarm),
-            marker_1=F32(device.waveform_marker_1),
-            marker_2=F32(device.waveform_marker_2),
-            initialized=F32(device.waveform_initialized))
+        payload = cls.acquire(device_status=device.device_status)
+        payload.hi_alarm.set_value(device.waveform_hi_alarm)
+        payload.lo_alarm.set_value(device.waveform_lo_alarm)
+        payload.marker_1.set_value(device.waveform_marker_1)
+        payload.marker_2.set_value(device.waveform_marker_2)
+        payload.initialized.set_value(device.waveform_initialized)
+        return payload
 
 
 @dataclass
@@ -1828,33 +1149,7 @@ class ErrorReply (PayloadSequence):
     device_status: U8 = U8()
 
     @classmethod
-    def create(cls, device: HartDevice, response_code: U8):
-        return cls(
-            device_status=device.device_status,
-            response_code=response_code)
-
-
-@dataclass
-class Cmd31Request (PayloadSequence):
-    extended_command_number: U16 = U16()
-    request_data: GreedyU8Array = GreedyU8Array()
-
-
-@dataclass
-class Cmd31Reply (PayloadSequence):
-    response_code: U8 = U8()
-    device_status: U8 = U8()
-    extended_command_number: U16 = U16()
-    response_data: GreedyU8Array = GreedyU8Array()
-
-    @classmethod
-    def create(cls,
-               device: HartDevice,
-               response_code: U8,
-               extended_command_number: U16,
-               response_data: GreedyU8Array):
-        return cls(
-            device_status=device.device_status,
-            response_code=response_code,
-            extended_command_number=extended_command_number,
-            response_data=response_data)
+    def create(cls, device: HartDevice, response_code: int):
+        payload = cls.acquire(device_status=device.device_status)
+        payload.response_code.set_value(response_code)
+        return payload
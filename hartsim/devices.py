@@ -1,9 +1,71 @@
 import math
 import sys
 import time
-from array import array
-from dataclasses import dataclass, field
-from .payloads import F32, U16, U24, U8, Ascii, PackedAscii
+from copy import copy
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Callable, Iterable, Sequence
+from .cache import ReplyCache
+from .payloads import F32, U16, U24, U32, U8, Ascii, PackedAscii, Payload, f32_table
+from .signals import Signal, Sine
+from .tanks import MIN_STRAPPING_POINTS, TANK_FORMULAS, TANK_STRAPPING_TABLE, StrappingTable
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .engine import VariableEngine
+
+# attributes whose assignment does not change what the device replies
+UNVERSIONED_ATTRIBUTES = frozenset({'state_version', 'reply_cache', 'variable_engine', 'clock',
+                                   'strapping_cache'})
+# float tables kept as `f32_table()`s
+F32_TABLES = (
+    'strappingTableLevel', 'strappingTableVolume',
+    'waveform_lin_x', 'waveform_lin_y', 'waveform_kp_x', 'waveform_kp_y',
+    'waveform_sen_x', 'waveform_sen_y', 'waveform_yt', 'waveform_ro_yt')
+
+# variables without a signal follow sines between VALUE_MIN and VALUE_MAX, the
+# variables of a device shifted by equal phases
+VALUE_MIN = -5.
+VALUE_MAX = 255.
+VALUE_PERIOD = 32
+LOOP_CURRENT_PERIOD = 36
+# the volume variable follows the level variable through the tank shape
+LEVEL_VARIABLE = 4
+VOLUME_VARIABLE = 5
+# variable update periods are counted in 1/32 ms, as Cmd54 reports them
+UPDATE_PERIOD_UNITS = 32_000
+DEFAULT_UPDATE_PERIOD = 100 * 32
+
+
+def variable_phases(count: int) -> list[float]:
+    """Phases of `count` variables spread over one period."""
+    return [2 * math.pi * index / count for index in range(count)]
+
+
+def default_signal(phase: float) -> Sine:
+    """Signal of a variable with `phase` that was not given one."""
+    return Sine(VALUE_MIN, VALUE_MAX, 2 * math.pi * VALUE_PERIOD, phase)
+
+
+LOOP_CURRENT_SIGNAL = Sine(3.5, 20.5, 2 * math.pi * LOOP_CURRENT_PERIOD)
+
+
+def simulated_loop_current(now: float) -> float:
+    return LOOP_CURRENT_SIGNAL.value(now)
+
+
+def wall_clock() -> float:
+    return time.time()
+
+
+def own_defaults(instance):
+    """Replace payload defaults shared by all instances with copies.
+
+    Commands change device payloads in place, so a device left with a class
+    default would change every other device using the same default.
+    """
+    for item in fields(instance):
+        value = getattr(instance, item.name)
+        if isinstance(value, Payload) and value is item.default:
+            setattr(instance, item.name, copy(value))
 
 
 @dataclass
@@ -17,6 +79,16 @@ class DeviceVariable:
     lrv: F32 = F32()
     classification: U8 = U8()
     status: U8 = U8()
+    # readings are taken at multiples of the period, 0 takes one per read
+    update_period: U32 = U32(DEFAULT_UPDATE_PERIOD)
+    phase: float = 0.0
+    # readings, a sine shifted by `phase` when not given
+    signal: Signal | None = field(default=None, compare=False)
+    # clock time when the reading expires
+    expires_at: float = field(default=-math.inf, repr=False, compare=False)
+
+    def __post_init__(self):
+        own_defaults(self)
 
 
 @dataclass
@@ -61,8 +133,8 @@ class HartDevice:
     volumeSetupTankWriteType: U8 = U8(5)
     volumeSetupTankWriteLength: F32 = F32(100)
     volumeSetupTankWriteRadius: F32 = F32(20)
-    strappingTableLevel: array = field(default_factory=lambda: array('f', [i * 10 for i in range(1, 54)]))
-    strappingTableVolume: array = field(default_factory=lambda: array('f', [i * 15 for i in range(1, 54)]))
+    strappingTableLevel: Sequence[float] = field(default_factory=lambda: [i * 10 for i in range(1, 54)])
+    strappingTableVolume: Sequence[float] = field(default_factory=lambda: [i * 15 for i in range(1, 54)])
     simulated_variables: dict[int, float] = field(default_factory=dict[int, float])
     pv_damping: F32 = F32(1.23)
     simulate_invalid_selection: bool = False
@@ -71,19 +143,28 @@ class HartDevice:
     device_revision: U8 = U8(7)
     private_label_distributor: U16 = U16(0x0099)
     # Waveform-данные для WaveformEditing
-    waveform_lin_x: list = field(default_factory=list)
-    waveform_lin_y: list = field(default_factory=list)
-    waveform_kp_x: list = field(default_factory=list)
-    waveform_kp_y: list = field(default_factory=list)
-    waveform_sen_x: list = field(default_factory=list)
-    waveform_sen_y: list = field(default_factory=list)
-    waveform_yt: list = field(default_factory=list)
-    waveform_ro_yt: list = field(default_factory=list)
+    waveform_lin_x: Sequence[float] = field(default_factory=list)
+    waveform_lin_y: Sequence[float] = field(default_factory=list)
+    waveform_kp_x: Sequence[float] = field(default_factory=list)
+    waveform_kp_y: Sequence[float] = field(default_factory=list)
+    waveform_sen_x: Sequence[float] = field(default_factory=list)
+    waveform_sen_y: Sequence[float] = field(default_factory=list)
+    waveform_yt: Sequence[float] = field(default_factory=list)
+    waveform_ro_yt: Sequence[float] = field(default_factory=list)
     waveform_hi_alarm: float = 90.0
     waveform_lo_alarm: float = 10.0
     waveform_marker_1: float = 8.0
     waveform_marker_2: float = 16.0
     waveform_initialized: float = 1.0
+    # Reply caching
+    state_version: int = field(default=0, compare=False)
+    reply_cache: ReplyCache = field(default_factory=ReplyCache, repr=False, compare=False)
+    # set by the VariableEngine updating the variables of the device
+    variable_engine: 'VariableEngine | None' = field(default=None, repr=False, compare=False)
+    # time in seconds the simulated readings follow
+    clock: Callable[[], float] = field(default=wall_clock, repr=False, compare=False)
+    # lookup over the strapping points in use, see `strapping_table()`
+    strapping_cache: StrappingTable | None = field(default=None, repr=False, compare=False)
     # Device Variables
     # pressure: DeviceVariable = DeviceVariable(12, 1.2345, 65, 192)
     # temperature: DeviceVariable = DeviceVariable(32, 23.456, 0, 192)
@@ -109,16 +190,50 @@ class HartDevice:
     #     3: 3,
     # }
 
-    def update_variables(self):
-        self.loop_current.set_value(3.5 + (1 + math.sin(time.time() / 36)) / 2 * 17)
-        min_value = -5.
-        max_value = 255.
-        values_range = max_value - min_value
-        index = 0
-        for variableCode in self.device_variables.keys():
-            phase = 2 * math.pi * index / len(self.device_variables)
-            new_value = min_value + (1 + math.sin((time.time() - phase) / 32)) / 2 * values_range
-            variable = self.device_variables[variableCode]
+    def __post_init__(self):
+        own_defaults(self)
+        for name in F32_TABLES:
+            setattr(self, name, f32_table(getattr(self, name)))
+        for phase, variable in zip(variable_phases(len(self.device_variables)),
+                                   self.device_variables.values()):
+            variable.phase = phase
+            if variable.signal is None:
+                variable.signal = default_signal(phase)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name not in UNVERSIONED_ATTRIBUTES:
+            super().__setattr__('state_version', self.state_version + 1)
+
+    def touch(self):
+        """Invalidate cached replies after changing a field in place."""
+        self.state_version += 1
+
+    def update_variables(self, codes: Iterable[int] | None = None):
+        """Take new readings of the variables `codes`, of all by default.
+
+        A variable keeps its reading until its update period elapses. All
+        variables are read together with the loop current when `codes` is
+        None.
+        """
+        if self.variable_engine is not None:
+            self.variable_engine.update()
+            return
+        now = self.clock()
+        variables = self.device_variables
+        if codes is None:
+            self.loop_current.set_value(simulated_loop_current(now))
+            codes = variables
+        for variableCode in codes:
+            variable = variables.get(variableCode)
+            if variable is None or now < variable.expires_at:
+                continue
+            taken_at = now
+            period = variable.update_period.get_value() / UPDATE_PERIOD_UNITS
+            if period > 0:
+                taken_at = math.floor(now / period) * period
+                variable.expires_at = taken_at + period
+            new_value = self.reading(variableCode, taken_at)
 
             if variableCode in self.simulated_variables.keys():
                 self.simulated_variables[variableCode] = new_value
@@ -130,4 +245,85 @@ class HartDevice:
             if variable.max_seen.get_value() < new_value:
                 variable.max_seen.set_value(new_value)
 
-            index = index + 1
+    def reading(self, code: int, now: float) -> float:
+        """Simulated reading of variable `code` at `now`.
+
+        The volume follows the level reading, or the level held by Cmd79,
+        when the tank type is known.
+        """
+        variables = self.device_variables
+        if code == VOLUME_VARIABLE and LEVEL_VARIABLE in variables:
+            if LEVEL_VARIABLE in self.simulated_variables:
+                level = variables[LEVEL_VARIABLE].value.get_value()
+            else:
+                level = variables[LEVEL_VARIABLE].signal.value(now)
+            volume = self.tank_volume(level)
+            if volume is not None:
+                return volume
+        return variables[code].signal.value(now)
+
+    def tank_volume(self, level: float) -> float | None:
+        """Volume of the tank filled to `level`, None for unknown tank types."""
+        tank = self.volumeSetupTankWriteType.get_value()
+        if tank == TANK_STRAPPING_TABLE:
+            return self.strapping_table().volume(level)
+        formula = TANK_FORMULAS.get(tank)
+        if formula is None:
+            return None
+        return formula(level, self.volumeSetupTankWriteLength.get_value(),
+                       self.volumeSetupTankWriteRadius.get_value())
+
+    def strapping_table(self) -> StrappingTable:
+        """Lookup over the strapping points in use.
+
+        Built on first use and again when Cmd158 changes the number of
+        points; `write_strapping_points()` updates it in place.
+        """
+        count = min(max(self.volumeSetupNumStrapWritePoints.get_value(), MIN_STRAPPING_POINTS),
+                    len(self.strappingTableLevel))
+        table = self.strapping_cache
+        if table is None or len(table) != count:
+            table = self.strapping_cache = StrappingTable(self.strappingTableLevel[:count],
+                                                          self.strappingTableVolume[:count])
+        return table
+
+    def write_strapping_points(self, first: int, levels: Sequence[float], volumes: Sequence[float]):
+        """Write strapping points from `first` on (Cmd159)."""
+        for offset, (level, volume) in enumerate(zip(levels, volumes)):
+            self.strappingTableLevel[first + offset] = level
+            self.strappingTableVolume[first + offset] = volume
+        if self.strapping_cache is not None:
+            stop = first + len(levels)
+            self.strapping_cache.write(first, self.strappingTableLevel[first:stop],
+                                       self.strappingTableVolume[first:stop])
+
+    def update_loop_current(self):
+        if self.variable_engine is not None:
+            self.variable_engine.update()
+            return
+        self.loop_current.set_value(simulated_loop_current(self.clock()))
+
+    def dynamic_variable_codes(self) -> tuple[int, int, int, int]:
+        """Device variable codes of the PV, SV, TV and QV."""
+        dynamic = self.dynamic_variables
+        return (dynamic[self.pv_selection.get_value()], dynamic[self.sv_selection.get_value()],
+                dynamic[self.tv_selection.get_value()], dynamic[self.qv_selection.get_value()])
+
+    def simulate_variable(self, code: int, value: float):
+        """Hold variable `code` at `value` (Cmd79).
+
+        Its simulated reading goes on in `simulated_variables` meanwhile.
+        """
+        variable = self.device_variables[code]
+        if code not in self.simulated_variables.keys():
+            self.simulated_variables[code] = variable.value.get_value()
+        variable.value.set_value(value)
+        if self.variable_engine is not None:
+            self.variable_engine.hold(self, code, True)
+
+    def release_variable(self, code: int):
+        """Let variable `code` follow its simulated reading again."""
+        if code in self.simulated_variables.keys():
+            self.device_variables[code].value.set_value(self.simulated_variables.pop(code))
+            if self.variable_engine is not None:
+                self.variable_engine.hold(self, code, False)
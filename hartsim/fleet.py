@@ -0,0 +1,303 @@
+"""Devices kept column by column.
+
+`DeviceFleet` stores the fields of many devices in columns indexed by
+device slot: numeric payloads and plain numbers in typed `array`s, other
+fields (tags, tables, dictionaries) in lists. The variables of all devices
+share columns indexed by variable slot. Thousands of devices then cost a
+few numbers each instead of dozens of payload objects.
+
+`fleet[slot]` is a `DeviceView` that commands use like a `HartDevice`.
+Reading a payload field gives a `ColumnView` of its column element, so
+`set_value()` changes the column; assigning a field stores its value and
+bumps `state_version`, as on a device. Every fleet makes subclasses of
+`DeviceView` and `VariableView` with a property per column; views are made
+on access and hold nothing but their slot.
+
+The fleet finds slots by unique address and by polling address in O(1).
+Like the maps of `DeviceSimulator`, they are taken when a device is added.
+Fleet devices keep their own columns and cannot be passed to a
+`VariableEngine`.
+"""
+from array import array
+from collections.abc import Mapping
+from copy import copy
+from dataclasses import MISSING, fields
+from typing import Iterable, Iterator
+
+from .cache import ReplyCache
+from .devices import UNVERSIONED_ATTRIBUTES, DeviceVariable, HartDevice
+from .payloads import COLUMN_VIEWS, U8, U16, U24, U32, F32, Payload, f32_table
+
+# array type codes of the payload classes and plain values kept in columns
+UNSIGNED_32 = 'I' if array('I').itemsize >= 4 else 'L'
+TYPE_CODES = {U8: 'B', U16: 'H', U24: UNSIGNED_32, U32: UNSIGNED_32, F32: 'd',
+              bool: 'b', int: 'q', float: 'd'}
+VIEW_CLASSES = frozenset(COLUMN_VIEWS.values())
+# fields a DeviceView keeps in lists of its own
+DEVICE_OBJECTS = frozenset({'device_variables', 'reply_cache'})
+# caches over fields of an added device, built again for its view
+DEVICE_CACHES = frozenset({'strapping_cache'})
+# objects changed in place, copied into list columns; others, such as
+# signals, are shared with the added record
+MUTABLE_TYPES = (Payload, dict, list, array, type(f32_table(())))
+
+
+class Columns:
+    """Columns of the fields of a dataclass, one row per record.
+
+    Fields whose default is a payload or a plain number of `TYPE_CODES` get
+    a typed array; all others a list. Payloads of a record must have the
+    struct format of the default. Fields in `reset` start at their default
+    instead of the value of the record.
+    """
+
+    def __init__(self, cls: type, skip: Iterable[str] = (), reset: Iterable[str] = ()):
+        skip = frozenset(skip)
+        self.names = []
+        self.reset = {item.name: item.default for item in fields(cls) if item.name in reset}
+        # name: (column, view class of payload fields or type of plain ones)
+        self.kinds = {}
+        self.formats = {}
+        for item in fields(cls):
+            if item.name in skip:
+                continue
+            default_type = type(item.default) if item.default is not MISSING else None
+            code = TYPE_CODES.get(default_type)
+            if code is None:
+                column, kind = [], None
+            elif default_type in COLUMN_VIEWS:
+                column, kind = array(code), COLUMN_VIEWS[default_type]
+                self.formats[item.name] = item.default._struct_format()
+            else:
+                column, kind = array(code), default_type
+            self.names.append(item.name)
+            self.kinds[item.name] = (column, kind)
+
+    def __len__(self):
+        return len(self.kinds[self.names[0]][0]) if self.names else 0
+
+    def row(self, record) -> list:
+        """Column values of the fields of `record`, with copies of the
+        objects it changes in place."""
+        values = []
+        for name in self.names:
+            if name in self.reset:
+                values.append(self.reset[name])
+                continue
+            value = getattr(record, name)
+            if name in self.formats:
+                if value._struct_format() != self.formats[name]:
+                    kind = self.kinds[name][1]
+                    raise TypeError(f'{name} is a {type(value).__name__}, '
+                                    f'{kind._primitive.__name__} expected')
+                value = value.get_value()
+            elif isinstance(value, MUTABLE_TYPES):
+                value = copy(value)
+            values.append(value)
+        return values
+
+    def append(self, row: list) -> int:
+        """Add `row` and return its index."""
+        index = len(self)
+        for name, value in zip(self.names, row):
+            self.kinds[name][0].append(value)
+        return index
+
+    def properties(self, versions=None) -> dict[str, property]:
+        """Properties of the fields reading and writing row `_slot`.
+
+        Assigning a field other than `UNVERSIONED_ATTRIBUTES` increments
+        the row of `versions`, when given.
+        """
+        return {name: _column_property(*self.kinds[name],
+                                       versions if name not in UNVERSIONED_ATTRIBUTES else None)
+                for name in self.names}
+
+
+def _column_property(column, kind, versions) -> property:
+    if kind in VIEW_CLASSES:
+        new = object.__new__
+
+        def get(self):
+            view = new(kind)
+            view._column = column
+            view._index = self._slot
+            view._optional = False
+            view._skipped = False
+            return view
+
+        def convert(value):
+            return value.get_value()
+    elif kind is None:
+        def get(self):
+            return column[self._slot]
+        convert = None
+    else:
+        def get(self):
+            return kind(column[self._slot])
+        convert = None
+
+    def set(self, value):
+        column[self._slot] = value if convert is None else convert(value)
+        if versions is not None:
+            versions[self._slot] += 1
+
+    return property(get, set)
+
+
+class VariableView:
+    """`DeviceVariable` of a fleet, row `slot` of its variable columns.
+
+    Every fleet subclasses it with properties of its columns.
+    """
+    __slots__ = ('_slot',)
+
+    def __init__(self, slot: int):
+        self._slot = slot
+
+
+class VariableMap(Mapping):
+    """Device variables of a fleet device by code.
+
+    Devices with the same variable codes share `indices`, the position of
+    every code among them; their variables take consecutive slots from
+    `start`.
+    """
+    __slots__ = ('_view', '_indices', '_start')
+
+    def __init__(self, view: type[VariableView], indices: dict[int, int], start: int):
+        self._view = view
+        self._indices = indices
+        self._start = start
+
+    def __getitem__(self, code: int) -> VariableView:
+        return self._view(self._start + self._indices[code])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __contains__(self, code) -> bool:
+        return code in self._indices
+
+
+class DeviceView:
+    """`HartDevice` of a fleet, row `slot` of the device columns.
+
+    Every fleet subclasses it with properties of its columns. Takes the
+    methods of `HartDevice`, which only use device fields.
+    """
+    __slots__ = ('_fleet', '_slot')
+
+    update_variables = HartDevice.update_variables
+    reading = HartDevice.reading
+    tank_volume = HartDevice.tank_volume
+    strapping_table = HartDevice.strapping_table
+    write_strapping_points = HartDevice.write_strapping_points
+    update_loop_current = HartDevice.update_loop_current
+    dynamic_variable_codes = HartDevice.dynamic_variable_codes
+    simulate_variable = HartDevice.simulate_variable
+    release_variable = HartDevice.release_variable
+
+    def __init__(self, fleet: 'DeviceFleet', slot: int):
+        self._fleet = fleet
+        self._slot = slot
+
+    @property
+    def slot(self) -> int:
+        return self._slot
+
+    def touch(self):
+        """Invalidate cached replies after changing a field in place."""
+        self._fleet.versions[self._slot] += 1
+
+    @property
+    def device_variables(self) -> VariableMap:
+        fleet = self._fleet
+        return VariableMap(fleet.variable_view, fleet.variable_indices[self._slot],
+                           fleet.variable_starts[self._slot])
+
+    @property
+    def reply_cache(self) -> ReplyCache:
+        caches = self._fleet.reply_caches
+        cache = caches[self._slot]
+        if cache is None:
+            cache = caches[self._slot] = ReplyCache()
+        return cache
+
+    def __eq__(self, other):
+        return isinstance(other, DeviceView) and other._fleet is self._fleet and other._slot == self._slot
+
+    def __hash__(self):
+        return hash((id(self._fleet), self._slot))
+
+    def __repr__(self):
+        return f'DeviceView(slot={self._slot}, long_address=0x{self.long_address:010X})'
+
+
+class DeviceFleet:
+    """Columns of the fields of devices, with `DeviceView`s of them.
+
+    Added `HartDevice`s are copied into the columns and may be dropped.
+    Their tags, tables and dictionaries are copied too; the signals of
+    their variables are shared.
+    """
+
+    def __init__(self, devices: Iterable[HartDevice] = ()):
+        self.columns = Columns(HartDevice, skip=DEVICE_OBJECTS, reset=DEVICE_CACHES)
+        self.variables = Columns(DeviceVariable)
+        self.versions = self.columns.kinds['state_version'][0]
+        self.device_view = type('DeviceView', (DeviceView,),
+                                {'__slots__': (), **self.columns.properties(self.versions)})
+        self.variable_view = type('VariableView', (VariableView,),
+                                  {'__slots__': (), **self.variables.properties()})
+        self.variable_indices: list[dict[int, int]] = []
+        self.variable_starts = array('q')
+        self.reply_caches: list[ReplyCache | None] = []
+        # code indices shared by devices with the same variable codes
+        self._layouts: dict[tuple[int, ...], dict[int, int]] = {}
+        self.unique_slots: dict[int, int] = {}
+        self.polling_slots: dict[int, list[int]] = {}
+        for device in devices:
+            self.add(device)
+
+    def __len__(self):
+        return len(self.reply_caches)
+
+    def __getitem__(self, slot: int) -> DeviceView:
+        if not 0 <= slot < len(self):
+            raise IndexError(slot)
+        return self.device_view(self, slot)
+
+    def __iter__(self) -> Iterator[DeviceView]:
+        return (self.device_view(self, slot) for slot in range(len(self)))
+
+    def add(self, device: HartDevice) -> DeviceView:
+        """Copy `device` into the columns and return its view."""
+        if device.variable_engine is not None:
+            raise ValueError('devices updated by a VariableEngine cannot join a fleet')
+        if device.long_address in self.unique_slots:
+            raise ValueError(f'unique address 0x{device.long_address:010X} is already in the fleet')
+        row = self.columns.row(device)
+        variable_rows = [self.variables.row(variable) for variable in device.device_variables.values()]
+        slot = self.columns.append(row)
+        codes = tuple(device.device_variables)
+        indices = self._layouts.setdefault(codes, {code: index for index, code in enumerate(codes)})
+        self.variable_indices.append(indices)
+        self.variable_starts.append(len(self.variables))
+        for variable_row in variable_rows:
+            self.variables.append(variable_row)
+        self.reply_caches.append(None)
+        self.unique_slots[device.long_address] = slot
+        self.polling_slots.setdefault(device.polling_address.get_value(), []).append(slot)
+        return self.device_view(self, slot)
+
+    def find_unique(self, long_address: int) -> DeviceView | None:
+        slot = self.unique_slots.get(long_address)
+        return self.device_view(self, slot) if slot is not None else None
+
+    def find_polling(self, polling_address: int) -> list[DeviceView]:
+        """Devices at `polling_address`, several when they sit on different channels."""
+        return [self.device_view(self, slot) for slot in self.polling_slots.get(polling_address, ())]
@@ -1,17 +1,8 @@
+import re
 from enum import Enum
-from functools import reduce
+from functools import lru_cache
 from typing import Iterator
 
-State = Enum('State', [
-    'UNKNOWN',
-    'PREAMBLES',
-    'SHORT_ADDRESS',
-    'LONG_ADDRESS',
-    'COMMAND_NUMBER',
-    'BYTE_COUNT',
-    'DATA',
-    'CHECK_SUM'])
-
 
 class FrameType(Enum):
     BACK = 1
@@ -31,6 +22,15 @@ LONG_ADDRESS_MASK = 0x80
 PRIMARY_MASTER_MASK = 0x80
 BURST_MODE_MASK = 0x40
 ADDRESS_MASK = 0x3F
+LONG_ADDRESS_VALUE_MASK = 0x3FFFFFFFFF
+PREAMBLE = 0xFF
+# delimiter, address, command number and byte count
+SHORT_HEADER_SIZE = 4
+LONG_HEADER_SIZE = 8
+MAX_DATA_SIZE = 0xFF
+MAX_PREAMBLES = 20
+# buffer size that fits any frame passed to serialize_into()
+MAX_FRAME_SIZE = MAX_PREAMBLES + LONG_HEADER_SIZE + MAX_DATA_SIZE + 1
 __UNDEFINED_NAME__ = '???'
 __PRIMARY_NAME__ = 'PRI'
 __SECONDARY_NAME__ = 'SEC'
@@ -39,6 +39,95 @@ __POLLING_NAME__ = 'POL'
 __NONE_NAME__ = 'NONE'
 
 
+# low byte masks used to fold data in half while computing check sums
+_FOLD_MASKS = [(1 << (size << 3)) - 1 for size in range(MAX_FRAME_SIZE)]
+
+
+def xor_check_sum(data, check_sum: int = 0) -> int:
+    """XOR of all bytes in `data`, combined with `check_sum`.
+
+    The bytes are folded as one integer, halving it on every step, instead
+    of visiting them one by one.
+    """
+    size = len(data)
+    value = int.from_bytes(data, 'little')
+    while size > 1:
+        size = (size + 1) >> 1
+        mask = _FOLD_MASKS[size] if size < MAX_FRAME_SIZE else (1 << (size << 3)) - 1
+        value = (value & mask) ^ (value >> (size << 3))
+    return value ^ check_sum
+
+
+class ReplyHeader:
+    """Frame prefix shared by all frames to or from one address.
+
+    Holds the preambles, delimiter and address bytes along with their
+    partial check sum, so encoding a frame only adds the command number,
+    byte count, data and the final check byte.
+    """
+
+    __slots__ = ('prefix', 'check_sum')
+
+    def __init__(self,
+                 type: FrameType,
+                 is_long_address: bool,
+                 address: int,
+                 is_primary_master: bool,
+                 is_burst: bool,
+                 preambles: int = 0):
+        header = bytearray()
+        if is_long_address:
+            header.append(type.value | LONG_ADDRESS_MASK)
+            header.extend((address & LONG_ADDRESS_VALUE_MASK).to_bytes(5, 'big'))
+        else:
+            header.append(type.value)
+            header.append(address & ADDRESS_MASK)
+        if is_primary_master:
+            header[1] |= PRIMARY_MASTER_MASK
+        if is_burst:
+            header[1] |= BURST_MODE_MASK
+        self.check_sum = xor_check_sum(header)
+        self.prefix = bytes([PREAMBLE] * preambles) + header
+
+    def encode_into(self,
+                    buffer: bytearray,
+                    command_number: int,
+                    data=b'',
+                    offset: int = 0) -> int:
+        """Write a complete frame into `buffer` at `offset`.
+
+        Returns the offset right after the check byte. The buffer has to be
+        large enough already, e.g. `bytearray(MAX_FRAME_SIZE)`.
+        """
+        byte_count = len(data)
+        start = offset + len(self.prefix)
+        buffer[offset:start] = self.prefix
+        buffer[start] = command_number
+        buffer[start + 1] = byte_count
+        start += 2
+        end = start + byte_count
+        buffer[start:end] = data
+        buffer[end] = xor_check_sum(
+            data, self.check_sum ^ command_number ^ byte_count)
+        return end + 1
+
+
+@lru_cache(maxsize=1024)
+def reply_header(type: FrameType,
+                 is_long_address: bool,
+                 address: int,
+                 is_primary_master: bool,
+                 is_burst: bool,
+                 preambles: int = 0) -> ReplyHeader:
+    """Cached `ReplyHeader` for a device, master and burst mode combination."""
+    return ReplyHeader(type,
+                       is_long_address,
+                       address,
+                       is_primary_master,
+                       is_burst,
+                       preambles)
+
+
 class HartFrame:
     def __init__(self,
                  type: FrameType,
@@ -103,7 +192,7 @@ class HartFrame:
         encoded.extend(self.data)
 
         # check byte
-        check_sum = reduce(lambda x, y: x ^ y, encoded)
+        check_sum = xor_check_sum(encoded)
 
         if update_check_sum:
             self.check_sum = check_sum
@@ -112,6 +201,24 @@ class HartFrame:
 
         return encoded
 
+    def serialize_into(self,
+                       buffer: bytearray,
+                       offset: int = 0,
+                       preambles: int = 0) -> int:
+        """Write preambles and the frame into a preallocated `buffer`.
+
+        Returns the offset right after the check byte.
+        """
+        header = reply_header(self.type,
+                              self.is_long_address,
+                              self.long_address if self.is_long_address else self.short_address,
+                              self.is_primary_master,
+                              self.is_burst,
+                              preambles)
+        end = header.encode_into(buffer, self.command_number, self.data, offset)
+        self.check_sum = buffer[end - 1]
+        return end
+
     def is_valid(self) -> bool:
         return self.serialize(False)[-1] == self.check_sum
 
@@ -182,105 +289,155 @@ SUM({check_sum}) \
 DAT({data})'
 
 
+class HartFrameView:
+    """Received frame decoded lazily from its raw bytes.
+
+    `raw` is a read-only memoryview of the frame from the delimiter to the
+    check byte (preambles excluded). Fields are decoded on access and
+    `data` is a slice of the same buffer, so routing a request does not
+    copy it. Use `to_frame()` to get a standalone `HartFrame`.
+    """
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw: memoryview):
+        self.raw = raw
+
+    @property
+    def type(self) -> FrameType:
+        return _FRAME_TYPES.get(self.raw[0] & DELIMITER_MASK)
+
+    @property
+    def is_long_address(self) -> bool:
+        return (self.raw[0] & LONG_ADDRESS_MASK) == LONG_ADDRESS_MASK
+
+    @property
+    def short_address(self) -> int:
+        if self.raw[0] & LONG_ADDRESS_MASK:
+            return 0
+        return self.raw[1] & ADDRESS_MASK
+
+    @property
+    def long_address(self) -> int:
+        if self.raw[0] & LONG_ADDRESS_MASK:
+            return int.from_bytes(self.raw[1:6], 'big') & LONG_ADDRESS_VALUE_MASK
+        return 0
+
+    @property
+    def is_primary_master(self) -> bool:
+        return (self.raw[1] & PRIMARY_MASTER_MASK) == PRIMARY_MASTER_MASK
+
+    @property
+    def is_burst(self) -> bool:
+        return (self.raw[1] & BURST_MODE_MASK) == BURST_MODE_MASK
+
+    @property
+    def command_number(self) -> int:
+        return self.raw[6 if self.raw[0] & LONG_ADDRESS_MASK else 2]
+
+    @property
+    def byte_count(self) -> int:
+        return self.raw[7 if self.raw[0] & LONG_ADDRESS_MASK else 3]
+
+    @property
+    def data(self) -> memoryview:
+        return self.raw[LONG_HEADER_SIZE if self.raw[0] & LONG_ADDRESS_MASK else SHORT_HEADER_SIZE:-1]
+
+    @property
+    def check_sum(self) -> int:
+        return self.raw[-1]
+
+    def is_valid(self) -> bool:
+        return xor_check_sum(self.raw) == 0
+
+    def to_frame(self) -> HartFrame:
+        return HartFrame(self.type,
+                         self.command_number,
+                         self.is_long_address,
+                         self.short_address,
+                         self.long_address,
+                         self.is_primary_master,
+                         self.is_burst,
+                         bytearray(self.data),
+                         self.check_sum)
+
+    def __repr__(self):
+        return repr(self.to_frame())
+
+
+# at least two preambles followed by the delimiter
+_PREAMBLES_PATTERN = re.compile(b'\xff{2,}')
+_FRAME_TYPES = {item.value: item for item in FrameType}
+
+
 class HartFrameBuilder:
+    """Decodes HART frames from chunks of received bytes.
+
+    A chunk may hold any number of frames, including a partial frame at
+    the end which is kept and completed by the next chunk.
+    """
+
     def __init__(self):
         self.__queue = []
-        self.__reset__()
-
-    def __reset__(self):
-        self.state = State.UNKNOWN
-        self.type = None
-        self.command_number = None
-        self.is_long_address = None
-        self.short_address = None
-        self.long_address = None
-        self.is_primary_master = None
-        self.is_burst = None
-        self.payload = None
-        self.check_sum = None
-        self.number_of_preambles = 0
-        self.long_address_length = 0
+        self.__pending = b''
 
-    def collect(self, iterator: Iterator[int]) -> bool:
-        isNewFrameAvailable = False
-
-        for item in iterator:
-            if self.state == State.UNKNOWN:
-                if item == 0xFF:
-                    self.number_of_preambles += 1
-                else:
-                    self.number_of_preambles = 0
-
-                if self.number_of_preambles >= 2:
-                    self.state = State.PREAMBLES
-            elif self.state == State.PREAMBLES:
-                if item != 0xFF:
-                    maskedItem = item & DELIMITER_MASK
-                    if FrameType.has_value(maskedItem):
-                        self.type = FrameType(maskedItem)
-                        self.is_long_address = (
-                            item & LONG_ADDRESS_MASK) == LONG_ADDRESS_MASK
-                        if self.is_long_address:
-                            self.state = State.LONG_ADDRESS
-                        else:
-                            self.state = State.SHORT_ADDRESS
-                        self.long_address = 0
-                        self.short_address = 0
-                        self.long_address_length = 0
-                    else:
-                        self.state = State.UNKNOWN
-            elif self.state == State.SHORT_ADDRESS:
-                self.short_address = item & ADDRESS_MASK
-                self.is_primary_master = (
-                    item & PRIMARY_MASTER_MASK) == PRIMARY_MASTER_MASK
-                self.is_burst = (
-                    item & BURST_MODE_MASK) == BURST_MODE_MASK
-                self.state = State.COMMAND_NUMBER
-            elif self.state == State.LONG_ADDRESS:
-                if self.long_address_length == 0:
-                    self.long_address = (self.long_address << 8) | (
-                        item & ADDRESS_MASK)
-                    self.long_address_length += 1
-                    self.is_primary_master = (
-                        item & PRIMARY_MASTER_MASK) == PRIMARY_MASTER_MASK
-                    self.is_burst = (
-                        item & BURST_MODE_MASK) == BURST_MODE_MASK
-                else:
-                    self.long_address = (self.long_address << 8) | item
-                    self.long_address_length += 1
-                if self.long_address_length == 5:
-                    self.state = State.COMMAND_NUMBER
-            elif self.state == State.COMMAND_NUMBER:
-                self.command_number = item
-                self.state = State.BYTE_COUNT
-            elif self.state == State.BYTE_COUNT:
-                self.byte_count = item
-                if self.byte_count > 0:
-                    self.state = State.DATA
+    def feed(self, chunk: bytes) -> list['HartFrameView']:
+        if self.__pending:
+            buffer = self.__pending + chunk
+        elif type(chunk) is bytes:
+            buffer = chunk
+        else:
+            buffer = bytes(chunk)
+
+        frames = []
+        append = frames.append
+        view = memoryview(buffer)
+        search = _PREAMBLES_PATTERN.search
+        end = len(buffer)
+        position = 0
+        while True:
+            match = search(buffer, position)
+            if match is None:
+                # a trailing preamble may pair with the next chunk
+                if end > position and buffer[end - 1] == PREAMBLE:
+                    position = end - 1
                 else:
-                    self.state = State.CHECK_SUM
-                self.payload = bytearray()
-            elif self.state == State.DATA:
-                self.payload.append(item)
-                if len(self.payload) == self.byte_count:
-                    self.state = State.CHECK_SUM
-            elif self.state == State.CHECK_SUM:
-                self.check_sum = item
-                newFrame = HartFrame(self.type,
-                                     self.command_number,
-                                     self.is_long_address,
-                                     self.short_address,
-                                     self.long_address,
-                                     self.is_primary_master,
-                                     self.is_burst,
-                                     self.payload,
-                                     self.check_sum)
-                self.__queue.append(newFrame)
-                isNewFrameAvailable = True
-                self.__reset__()
+                    position = end
+                break
+
+            start, delimiter_index = match.span()
+            if delimiter_index == end:
+                position = start
                 break
 
-        return isNewFrameAvailable
+            delimiter = buffer[delimiter_index]
+            frame_type = _FRAME_TYPES.get(delimiter & DELIMITER_MASK)
+            if frame_type is None:
+                position = delimiter_index + 1
+                continue
+
+            is_long_address = (
+                delimiter & LONG_ADDRESS_MASK) == LONG_ADDRESS_MASK
+            data_index = delimiter_index + (
+                LONG_HEADER_SIZE if is_long_address else SHORT_HEADER_SIZE)
+            if data_index > end:
+                position = start
+                break
+            check_sum_index = data_index + buffer[data_index - 1]
+            if check_sum_index >= end:
+                position = start
+                break
+
+            append(HartFrameView(view[delimiter_index:check_sum_index + 1]))
+            position = check_sum_index + 1
+
+        self.__pending = buffer[position:]
+        return frames
+
+    def collect(self, iterator: Iterator[int]) -> bool:
+        frames = self.feed(bytes(iterator))
+        self.__queue.extend(frame.to_frame() for frame in frames)
+        return len(frames) > 0
 
     def dequeue(self) -> HartFrame:
         return self.__queue.pop(0)
@@ -0,0 +1,253 @@
+"""HART-IP server transport (TCP and UDP).
+
+Every HART-IP message starts with an 8 byte header: version, message type,
+message id, status, sequence number and the byte count of the whole message.
+Masters open a session, exchange token-passing PDUs (HART frames without
+preambles) and keep the session alive or close it. A session without
+traffic for longer than the inactivity timer it was opened with is closed.
+"""
+import asyncio
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable
+
+from .framingutils import PREAMBLE, HartFrameBuilder
+from .transport import Handler, LinkStatistics
+
+VERSION = 1
+DEFAULT_PORT = 5094
+HEADER = struct.Struct('>BBBBHH')
+HEADER_SIZE = HEADER.size
+SESSION_INITIATE = struct.Struct('>BI')
+MAX_SESSIONS = 1024
+SWEEP_INTERVAL = 1.0
+# HART-IP PDUs carry no preambles, HartFrameBuilder needs two to sync
+FRAME_PREFIX = bytes([PREAMBLE, PREAMBLE])
+
+# status codes
+SUCCESS = 0
+TOO_FEW_DATA_BYTES = 5
+ALL_SESSIONS_IN_USE = 15
+ACCESS_RESTRICTED = 16
+NOT_IMPLEMENTED = 64
+
+
+class MessageType(IntEnum):
+    REQUEST = 0
+    RESPONSE = 1
+    PUBLISH = 2
+    ERROR = 3
+    NAK = 15
+
+
+class MessageId(IntEnum):
+    SESSION_INITIATE = 0
+    SESSION_CLOSE = 1
+    KEEP_ALIVE = 2
+    TOKEN_PASSING_PDU = 3
+
+
+def parse_endpoint(spec: str) -> tuple[str | None, int]:
+    """Split `[HOST:]PORT` into the host (None for all interfaces) and port."""
+    host, _, port = spec.rpartition(':')
+    if not port.isdigit() or int(port) > 0xFFFF:
+        raise ValueError(f'invalid HART-IP port {port!r}')
+    return host.strip('[]') or None, int(port)
+
+
+def encode_message(message_type: int,
+                   message_id: int,
+                   status: int,
+                   sequence_number: int,
+                   body=b'') -> bytes:
+    return HEADER.pack(VERSION, message_type, message_id, status,
+                       sequence_number, HEADER_SIZE + len(body)) + bytes(body)
+
+
+@dataclass
+class Session:
+    master_type: int
+    inactivity_limit: float
+    last_seen: float
+    # closes the TCP connection, None for UDP sessions
+    close: Callable[[], None] | None = None
+
+
+class HartIpServer:
+    """Serves token-passing PDUs to a transport handler over TCP and UDP.
+
+    The handler is the one a `SerialLink` takes: it gets the request frame
+    and returns the reply with preambles, which are stripped here.
+    """
+
+    def __init__(self,
+                 handler: Handler,
+                 name: str = 'HART-IP',
+                 max_sessions: int = MAX_SESSIONS,
+                 sweep_interval: float = SWEEP_INTERVAL):
+        self.handler = handler
+        self.name = name
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.statistics = LinkStatistics()
+        self.sessions: dict[object, Session] = {}
+        self._loop = None
+        self._tcp_server = None
+        self._udp_transport = None
+        self._sweeper = None
+
+    async def start(self, host: str | None, port: int = DEFAULT_PORT):
+        """Listen on `port` with TCP and UDP, 0 picks a free port."""
+        self._loop = asyncio.get_running_loop()
+        self._tcp_server = await self._loop.create_server(
+            lambda: _TcpProtocol(self), host, port)
+        port = self._tcp_server.sockets[0].getsockname()[1]
+        self._udp_transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _UdpProtocol(self), local_addr=(host or '0.0.0.0', port))
+        self._sweeper = asyncio.ensure_future(self._sweep())
+        return port
+
+    async def serve(self, host: str | None, port: int = DEFAULT_PORT):
+        """Start and serve until cancelled."""
+        await self.start(host, port)
+        try:
+            await self._tcp_server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+        for session in self.sessions.values():
+            if session.close is not None:
+                session.close()
+        self.sessions.clear()
+
+    def handle_message(self, key, message: bytes, close=None) -> tuple[bytes | None, bool]:
+        """Response to one complete message and whether to end the session.
+
+        `key` identifies the session: the TCP transport or the UDP peer.
+        """
+        _, message_type, message_id, _, sequence_number, _ = HEADER.unpack_from(message)
+        body = memoryview(message)[HEADER_SIZE:]
+        if message_type != MessageType.REQUEST:
+            return None, False
+
+        session = self.sessions.get(key)
+        if session is not None:
+            session.last_seen = self._loop.time()
+
+        if message_id == MessageId.SESSION_INITIATE:
+            return self._initiate(key, sequence_number, body, close), False
+        if session is None:
+            return encode_message(MessageType.ERROR, message_id,
+                                  ACCESS_RESTRICTED, sequence_number), False
+        if message_id == MessageId.SESSION_CLOSE:
+            del self.sessions[key]
+            return encode_message(MessageType.RESPONSE, message_id,
+                                  SUCCESS, sequence_number), True
+        if message_id == MessageId.KEEP_ALIVE:
+            return encode_message(MessageType.RESPONSE, message_id,
+                                  SUCCESS, sequence_number), False
+        if message_id == MessageId.TOKEN_PASSING_PDU:
+            return self._pdu(sequence_number, body), False
+        return encode_message(MessageType.ERROR, message_id,
+                              NOT_IMPLEMENTED, sequence_number), False
+
+    def _initiate(self, key, sequence_number: int, body: memoryview, close) -> bytes:
+        if len(body) < SESSION_INITIATE.size:
+            return encode_message(MessageType.ERROR, MessageId.SESSION_INITIATE,
+                                  TOO_FEW_DATA_BYTES, sequence_number)
+        master_type, inactivity_limit = SESSION_INITIATE.unpack_from(body)
+        if key not in self.sessions and len(self.sessions) >= self.max_sessions:
+            return encode_message(MessageType.ERROR, MessageId.SESSION_INITIATE,
+                                  ALL_SESSIONS_IN_USE, sequence_number)
+        self.sessions[key] = Session(master_type, inactivity_limit / 1000,
+                                     self._loop.time(), close)
+        return encode_message(MessageType.RESPONSE, MessageId.SESSION_INITIATE,
+                              SUCCESS, sequence_number, body[:SESSION_INITIATE.size])
+
+    def _pdu(self, sequence_number: int, body: memoryview) -> bytes | None:
+        statistics = self.statistics
+        statistics.bytes_received += len(body)
+        frames = HartFrameBuilder().feed(FRAME_PREFIX + body)
+        if not frames:
+            return encode_message(MessageType.ERROR, MessageId.TOKEN_PASSING_PDU,
+                                  TOO_FEW_DATA_BYTES, sequence_number)
+        statistics.requests += 1
+        reply = self.handler(frames[0])
+        if reply is None:
+            return None
+        reply = bytes(reply).lstrip(FRAME_PREFIX[:1])
+        statistics.replies += 1
+        statistics.bytes_sent += len(reply)
+        return encode_message(MessageType.RESPONSE, MessageId.TOKEN_PASSING_PDU,
+                              SUCCESS, sequence_number, reply)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            now = self._loop.time()
+            expired = [key for key, session in self.sessions.items()
+                       if now - session.last_seen > session.inactivity_limit]
+            for key in expired:
+                session = self.sessions.pop(key)
+                if session.close is not None:
+                    session.close()
+
+
+class _TcpProtocol(asyncio.Protocol):
+    def __init__(self, server: HartIpServer):
+        self.server = server
+        self.buffer = bytearray()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.server.sessions.pop(self, None)
+
+    def data_received(self, data: bytes):
+        buffer = self.buffer
+        buffer += data
+        while len(buffer) >= HEADER_SIZE:
+            byte_count = HEADER.unpack_from(buffer)[5]
+            if byte_count < HEADER_SIZE:
+                self.transport.close()
+                return
+            if len(buffer) < byte_count:
+                return
+            message = bytes(buffer[:byte_count])
+            del buffer[:byte_count]
+            response, finished = self.server.handle_message(
+                self, message, self.transport.close)
+            if response is not None:
+                self.transport.write(response)
+            if finished:
+                self.transport.close()
+                return
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: HartIpServer):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, address):
+        if len(data) < HEADER_SIZE:
+            return
+        byte_count = HEADER.unpack_from(data)[5]
+        if byte_count < HEADER_SIZE or byte_count > len(data):
+            return
+        response, _ = self.server.handle_message(address, data[:byte_count])
+        if response is not None:
+            self.transport.sendto(response, address)
@@ -1,199 +1,157 @@
-import math
-import sys
-
-import serial
-import time
+import argparse
+import asyncio
 
+from .commands import COMMANDS, EXTENDED_COMMANDS
 from .config import Configuration
-from .framingutils import FrameType, HartFrame, HartFrameBuilder
-from .commands import handle_request
-from .devices import DeviceVariable, HartDevice
-from .payloads import F32, U8, U16, U24, Ascii, PackedAscii
-
-config = Configuration()
-
-port = serial.Serial(config.port,
-                     baudrate=1200,
-                     parity=serial.PARITY_ODD,
-                     bytesize=8,
-                     stopbits=1)
-
-port.flush()
-port.read_all()
-port.dtr = False
-
-print(f'Listening {config.port}')
-
-frameBuilder = HartFrameBuilder()
-
-device3051 = HartDevice(
-    device_variables={
-        0: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), F32(250), F32(0), U8(65), U8(192)),
-        1: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), F32(100), F32(-100), U8(0), U8(192)),
-        2: DeviceVariable(U8(244), U8(244), F32(45.67), F32(sys.float_info.min), F32(sys.float_info.max), F32(200), F32(0), U8(0), U8(192)),
-        3: DeviceVariable(U8(242), U8(242), F32(4567.8), F32(sys.float_info.min), F32(sys.float_info.max), F32(300), F32(0), U8(0), U8(192)),
-        4: DeviceVariable(U8(45), U8(45), F32(5.6789), F32(sys.float_info.min), F32(sys.float_info.max), F32(400), F32(0), U8(0), U8(192)),
-        5: DeviceVariable(U8(41), U8(41), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(500), F32(0), U8(0), U8(192)),
-        6: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(600), F32(0), U8(0), U8(192)),
-        7: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(700), F32(0), U8(0), U8(192)),
-        8: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(800), F32(0), U8(0), U8(192)),
-        9: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(900), F32(0), U8(0), U8(192)),
-        244: DeviceVariable(U8(57), U8(57), F32(56.7890), F32(sys.float_info.min), F32(sys.float_info.max), F32(1000), F32(0), U8(0), U8(192)),
-        245: DeviceVariable(U8(39), U8(39), F32(4.5678), F32(sys.float_info.min), F32(sys.float_info.max), F32(1100), F32(0), U8(0), U8(192)),
-        246: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), F32(1200), F32(0), U8(65), U8(192)),
-        247: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), F32(1300), F32(0), U8(0), U8(192)),
-        248: DeviceVariable(U8(241), U8(241), F32(345.67), F32(sys.float_info.min), F32(sys.float_info.max), F32(1400), F32(0), U8(0), U8(192)),
-        249: DeviceVariable(U8(244), U8(244), F32(4567.8), F32(sys.float_info.min), F32(sys.float_info.max), F32(1500), F32(0), U8(0), U8(192)),
-    },
-    dynamic_variables={
-        0: 0,
-        1: 1,
-        2: 2,
-        3: 3,
-    },
-    polling_address=U8(0),
-    # long_address=0x3FFFFFFFFF & 0x268F123456,
-    # expanded_device_type=U16(0x268F),
-    long_address=0x3FFFFFFFFF & 0x9972123456,
-    expanded_device_type=U16(0x9972),
-    device_id=U24(0x123456),
-    hart_tag=PackedAscii(8, "M150 r7"),
-    hart_long_tag=Ascii(32, "This is M150 rev 7              "),
-    device_status=U8(0x00))
-
-device150 = HartDevice(
-    device_variables={
-        0: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), U8(65), U8(192)),
-        1: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        2: DeviceVariable(U8(240), U8(240), F32(5.6789), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        244: DeviceVariable(U8(57), U8(57), F32(56.7890), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        245: DeviceVariable(U8(39), U8(39), F32(4.5678), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        246: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), U8(65), U8(192)),
-        247: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        248: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        249: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(192)),
-        254: DeviceVariable(U8(250), U8(250), F32(float("nan")), F32(sys.float_info.min), F32(sys.float_info.max), U8(0), U8(30)),
-    },
-    dynamic_variables={
-        0: 0,
-        1: 1,
-        2: 1,
-        3: 1,
-    },
-    universal_revision=U8(5),
-    polling_address=U8(1),
-    long_address=0x3FFFFFFFFF & 0x2606789ABC,
-    expanded_device_type=U16(0x2606),
-    device_id=U24(0x789ABC),
-    hart_tag=PackedAscii(8, "3051 r9"),
-    hart_long_tag=Ascii(32, "This is 3051 rev 9        "))
-
-# Waveform-данные для device_f9f5
-_lin_x = [4.0 + i * (16.0 / 9.0) for i in range(10)]
-_lin_y = [i * (100.0 / 9.0) for i in range(10)]
-_kp_idx = [0, 2, 4, 6, 9]
-_kp_x = [_lin_x[i] for i in _kp_idx]
-_kp_y = [_lin_y[i] for i in _kp_idx]
-_sen_x = list(_lin_x)
-_sen_y = [100.0 * ((x - 4.0) / 16.0) ** 2 for x in _sen_x]
-_yt = [50.0 + 40.0 * math.sin(i * 0.5) for i in range(20)]
-_ro_yt = [50.0 + 30.0 * math.cos(i * 0.5) for i in range(20)]
-
-device_f9f5 = HartDevice(
-    device_variables={
-        0: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), F32(250), F32(0), U8(65), U8(192)),
-        1: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), F32(100), F32(-100), U8(0), U8(192)),
-    },
-    dynamic_variables={
-        0: 0,
-        1: 1,
-        2: 0,
-        3: 1,
-    },
-    manufacturer_code=U16(0x00F9),
-    device_revision=U8(3),
-    private_label_distributor=U16(0x00F9),
-    polling_address=U8(2),
-    long_address=0x3FFFFFFFFF & 0xF9F5ABCDEF,
-    expanded_device_type=U16(0xF9F5),
-    device_id=U24(0xABCDEF),
-    hart_tag=PackedAscii(8, "SAMPLE7"),
-    hart_long_tag=Ascii(32, "Sample HART 7 DD device         "),
-    device_status=U8(0x00),
-    waveform_lin_x=_lin_x,
-    waveform_lin_y=_lin_y,
-    waveform_kp_x=_kp_x,
-    waveform_kp_y=_kp_y,
-    waveform_sen_x=_sen_x,
-    waveform_sen_y=_sen_y,
-    waveform_yt=_yt,
-    waveform_ro_yt=_ro_yt,
-    waveform_hi_alarm=90.0,
-    waveform_lo_alarm=10.0,
-    waveform_marker_1=8.0,
-    waveform_marker_2=16.0,
-    waveform_initialized=1.0)
-
-poll_map = {
-    device3051.polling_address.get_value(): device3051,
-    device150.polling_address.get_value(): device150,
-    device_f9f5.polling_address.get_value(): device_f9f5
-}
-
-unique_map = {
-    device3051.long_address: device3051,
-    device150.long_address: device150,
-    device_f9f5.long_address: device_f9f5
-}
-
-for short_address in poll_map:
-    print(
-        f'  Address #{short_address}: \
-Type=0x{poll_map[short_address].expanded_device_type.get_value():04X}, \
-ID=0x{poll_map[short_address].device_id.get_value():06X}')
-
-port.flush()
-
-while True:
-    if port.in_waiting:
-        data = port.read_all()
-        if frameBuilder.collect(iter(data)):
-            request = frameBuilder.dequeue()
-            print(f'{config.port}    <= {request}')
-            device = None
-            status = None
-            if request.is_long_address:
-                if request.long_address in unique_map:
-                    device = unique_map[request.long_address]
-                else:
-                    status =\
-                        f'Long address 0x{request.long_address:010X} does not match'
-            else:
-                if request.short_address in poll_map:
-                    device = poll_map[request.short_address]
-                else:
-                    status =\
-                        f'Polling address {request.short_address} does not match'
-            if device is not None:
-                payload = handle_request(
-                    device, request.command_number, request.data)
-                reply = HartFrame(FrameType.ACK,
-                                  request.command_number,
-                                  request.is_long_address,
-                                  device.polling_address.get_value(),
-                                  device.long_address,
-                                  request.is_primary_master,
-                                  device.is_burst_mode,
-                                  payload)
-                reply_data = bytearray([0xFF, 0xFF, 0xFF])
-                reply_data.extend(reply.serialize())
-                port.dtr = True
-                port.write(reply_data)
-                port.flush()
-                port.dtr = False
-                print(
-                    f'{config.port} #{device.polling_address.get_value()} => {reply}')
-            else:
-                print(f'{config.port} => None ({status})')
-    else:
-        time.sleep(0.01)
+from .engine import VariableEngine
+from .hartip import DEFAULT_PORT, HartIpServer, parse_endpoint
+from .profiles import PROFILES, create_devices
+from .simulator import DeviceSimulator
+from .transport import SerialLink, open_serial, serve_links
+
+
+def parse_port(spec: str) -> tuple[str, list[str]]:
+    """Split `NAME[=PROFILE,...]` into the port name and profile names."""
+    name, _, profiles = spec.partition('=')
+    names = profiles.split(',') if profiles else list(PROFILES)
+    unknown = [profile for profile in names if profile not in PROFILES]
+    if not name or unknown:
+        raise argparse.ArgumentTypeError(
+            f'unknown profile {", ".join(unknown)} (known: {", ".join(PROFILES)})'
+            if unknown else 'missing port name')
+    return name, names
+
+
+def parse_pty(spec: str) -> tuple[int, list[str]]:
+    """Split `COUNT[=PROFILE,...]` into the number of PTYs and profile names."""
+    count, _, profiles = spec.partition('=')
+    if not count.isdigit() or int(count) < 1:
+        raise argparse.ArgumentTypeError(f'invalid PTY count {count!r}')
+    return int(count), parse_port(f'pty={profiles}' if profiles else 'pty')[1]
+
+
+def parse_hart_ip(spec: str) -> tuple[str | None, int, list[str]]:
+    """Split `[HOST:]PORT[=PROFILE,...]` into host, port and profile names."""
+    endpoint, _, profiles = spec.partition('=')
+    try:
+        host, port = parse_endpoint(endpoint)
+    except ValueError as exception:
+        raise argparse.ArgumentTypeError(str(exception)) from None
+    return host, port, parse_port(f'hart-ip={profiles}' if profiles else 'hart-ip')[1]
+
+
+def print_devices(simulator: DeviceSimulator):
+    for short_address, device in simulator.poll_map.items():
+        print(f'  Address #{short_address}: '
+              f'Type=0x{device.expanded_device_type.get_value():04X}, '
+              f'ID=0x{device.device_id.get_value():06X}')
+        print('    Commands: ' + ', '.join(
+            str(number) for number in COMMANDS.supported_commands(device)))
+        extended = EXTENDED_COMMANDS.supported_commands(device)
+        if extended:
+            print('    Extended commands: ' + ', '.join(str(number) for number in extended))
+
+
+def print_statistics(links: list[SerialLink | HartIpServer]):
+    for link in links:
+        print(f'{link.name}: {link.statistics}')
+
+
+async def report_statistics(links: list[SerialLink | HartIpServer], interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        print_statistics(links)
+
+
+async def serve(links: list[SerialLink],
+                statistics_interval: float,
+                servers: list[tuple[HartIpServer, str | None, int]] = ()):
+    reporter = None
+    if statistics_interval > 0:
+        reporter = asyncio.ensure_future(report_statistics(
+            links + [server for server, _, _ in servers], statistics_interval))
+    try:
+        await asyncio.gather(serve_links(links),
+                             *(server.serve(host, port) for server, host, port in servers))
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m hartsim.hartsim',
+        description='Simulate HART devices on one or more serial ports.')
+    parser.add_argument('--port', action='append', type=parse_port,
+                        metavar='NAME[=PROFILE,...]',
+                        help='serial port to serve, optionally with the device profiles '
+                             f'it hosts ({", ".join(PROFILES)}; all by default). '
+                             'Repeat for more ports (default: HARTSIM_PORT env var or COM2)')
+    parser.add_argument('--pty', type=parse_pty, metavar='COUNT[=PROFILE,...]',
+                        help='also serve COUNT PTY pairs and print the paths masters can open')
+    parser.add_argument('--hart-ip', type=parse_hart_ip, metavar='[HOST:]PORT[=PROFILE,...]',
+                        help='also serve HART-IP sessions over TCP and UDP '
+                             f'(the standard port is {DEFAULT_PORT})')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not print every request and reply')
+    parser.add_argument('--stats', type=float, default=0, metavar='SECONDS',
+                        help='print per port statistics every SECONDS')
+    parser.add_argument('--fleet-engine', action='store_true',
+                        help='update the variables of all devices together, '
+                             'vectorized when NumPy is installed')
+    args = parser.parse_args(argv)
+
+    ports = args.port or ([] if args.pty or args.hart_ip
+                          else [(Configuration().port, list(PROFILES))])
+    names = [name for name, _ in ports]
+    if len(set(names)) != len(names):
+        parser.error('each port can be given only once')
+    pty_count, pty_profiles = args.pty or (0, [])
+
+    def create_simulator(name: str, profiles: list[str]) -> DeviceSimulator:
+        try:
+            return DeviceSimulator(create_devices(profiles), name, not args.quiet)
+        except ValueError as exception:
+            parser.error(f'{name or "pty"}: {exception}')
+
+    serial_simulators = [create_simulator(name, profiles) for name, profiles in ports]
+    pty_simulators = [create_simulator('', pty_profiles) for _ in range(pty_count)]
+    servers = []
+    hart_ip_simulators = []
+    if args.hart_ip:
+        host, port, profiles = args.hart_ip
+        simulator = create_simulator(f'HART-IP {host or "*"}:{port}', profiles)
+        servers.append((HartIpServer(simulator.handle, simulator.name), host, port))
+        hart_ip_simulators.append(simulator)
+
+    links = []
+    for simulator in serial_simulators:
+        links.append(SerialLink(open_serial(simulator.name), simulator.handle, simulator.name))
+    pairs = []
+    if pty_count:
+        from .loopback import open_pty_pairs
+        pairs = open_pty_pairs(pty_count)
+    for simulator, pair in zip(pty_simulators, pairs):
+        simulator.name = pair.path
+        links.append(SerialLink(pair.port, simulator.handle, pair.path, key_dtr=False))
+
+    simulators = serial_simulators + pty_simulators + hart_ip_simulators
+    if args.fleet_engine:
+        VariableEngine(device for simulator in simulators for device in simulator.poll_map.values())
+
+    for simulator in simulators:
+        print(f'Listening {simulator.name}')
+        print_devices(simulator)
+
+    try:
+        asyncio.run(serve(links, args.stats, servers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print_statistics(links + [server for server, _, _ in servers])
+        for pair in pairs:
+            pair.close()
+
+
+if __name__ == '__main__':
+    main()
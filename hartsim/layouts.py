@@ -0,0 +1,181 @@
+"""Command payloads described as data.
+
+A layout is a list of fields in the form a JSON file would hold them:
+
+    {'name': 'hart_tag', 'type': 'PackedAscii', 'size': 8, 'from': 'device.hart_tag'}
+
+`type` names a payload primitive, `size` is the length of strings and the
+count of arrays, `value` the default and `optional` marks optional fields.
+A reply field may name the device or request attribute it is read `from`.
+A group repeats its fields `repeat` times with the repetition number (or
+the matching entry of `suffixes`) appended to their names; repetitions
+after the first `required` ones are optional:
+
+    {'repeat': 4, 'required': 1, 'fields': [{'name': 'reserved', 'type': 'U32'}]}
+
+A `RepeatedGroup` field holds `min` to `max` repetitions of its `fields` as
+a list of value tuples:
+
+    {'name': 'slots', 'type': 'RepeatedGroup', 'min': 1, 'max': 8, 'fields': [
+        {'name': 'code', 'type': 'U8'}, {'name': 'value', 'type': 'F32'}]}
+
+Payload classes are generated on first use, so only the commands a session
+handles are ever built.
+"""
+from dataclasses import field, make_dataclass
+from operator import attrgetter, itemgetter
+from typing import Callable
+
+from .devices import HartDevice
+from .payloads import (F32, F32Array, U8, U16, U24, U32, Ascii, GreedyU8Array,
+                       PackedAscii, Payload, PayloadSequence, RepeatedGroup)
+from .registry import CommandRegistry
+
+TYPES = {
+    'U8': U8,
+    'U16': U16,
+    'U24': U24,
+    'U32': U32,
+    'F32': F32,
+    'F32Array': F32Array,
+    'Ascii': Ascii,
+    'PackedAscii': PackedAscii,
+    'GreedyU8Array': GreedyU8Array,
+    'RepeatedGroup': RepeatedGroup,
+}
+# types taking a size (string length, array count) before the value
+SIZED_TYPES = frozenset({'F32Array', 'Ascii', 'PackedAscii'})
+
+
+def expand(fields: list[dict]) -> list[dict]:
+    """Fields with the groups unrolled."""
+    expanded = []
+    for item in fields:
+        if 'repeat' not in item:
+            expanded.append(item)
+            continue
+        suffixes = item.get('suffixes') or [str(number) for number in range(1, item['repeat'] + 1)]
+        required = item.get('required', item['repeat'])
+        for index, suffix in enumerate(suffixes[:item['repeat']]):
+            for member in expand(item['fields']):
+                expanded.append({
+                    **member,
+                    'name': f"{member['name']}_{suffix}",
+                    'optional': member.get('optional', False) or index >= required,
+                })
+    return expanded
+
+
+def create_field(item: dict) -> Payload:
+    """Payload primitive for one field description."""
+    if item['type'] == 'RepeatedGroup':
+        element = build_payload_class(
+            ''.join(part.title() for part in item['name'].split('_')), item['fields'])
+        return RepeatedGroup(element, item.get('min', 0), item.get('max'),
+                             item.get('value'), is_optional=item.get('optional', False))
+    payload_type = TYPES[item['type']]
+    arguments = []
+    if item['type'] in SIZED_TYPES:
+        arguments.append(item['size'])
+    if 'value' in item:
+        arguments.append(item['value'])
+    return payload_type(*arguments, is_optional=item.get('optional', False))
+
+
+def build_payload_class(name: str, fields: list[dict]) -> type[PayloadSequence]:
+    """PayloadSequence dataclass with the given fields."""
+    return make_dataclass(
+        name,
+        [(item['name'], TYPES[item['type']], field(default=create_field(item)))
+         for item in expand(fields)],
+        bases=(PayloadSequence,),
+        namespace={'__module__': __name__})
+
+
+class LayoutTable:
+    """Payload classes of a layout table, built when first asked for."""
+
+    def __init__(self, layouts: dict[str, list[dict]]):
+        self.layouts = layouts
+        self.classes: dict[str, type[PayloadSequence]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.layouts
+
+    def payload_class(self, name: str) -> type[PayloadSequence]:
+        cls = self.classes.get(name)
+        if cls is None:
+            cls = self.classes[name] = build_payload_class(name, self.layouts[name])
+        return cls
+
+    def factory(self, name: str) -> Callable[..., PayloadSequence]:
+        """Callable creating instances of `name` without building it yet."""
+        return lambda *args, **kwargs: self.payload_class(name)(*args, **kwargs)
+
+
+def _source_getter(path: str) -> Callable:
+    """Getter of 'device.<attribute>' or 'request.<attribute>' paths.
+
+    Numeric parts index mappings, as in 'device.device_variables.0.units'.
+    """
+    root, *parts = path.split('.')
+    if root not in ('device', 'request') or not parts:
+        raise ValueError(f'unknown source {path!r}')
+    steps = [itemgetter(int(part)) if part.isdigit() else attrgetter(part) for part in parts]
+    is_device = root == 'device'
+
+    def getter(device, request):
+        value = device if is_device else request
+        for step in steps:
+            value = step(value)
+        return value
+    return getter
+
+
+class LayoutReply:
+    """Handler replying with a layout whose fields are read `from` the device.
+
+    `assign` maps device attributes to the sources whose value they take
+    before the reply is built, which is all most write commands do.
+    """
+
+    def __init__(self, table: LayoutTable, name: str, assign: dict[str, str] | None = None):
+        self.table = table
+        self.name = name
+        self.assign = assign or {}
+        self._compiled = None
+
+    def _compile(self):
+        fields = expand(self.table.layouts[self.name])
+        sources = tuple((item['name'], _source_getter(item['from']))
+                        for item in fields if 'from' in item)
+        targets = tuple((_source_getter(target), _source_getter(source))
+                        for target, source in self.assign.items())
+        self._compiled = self.table.payload_class(self.name), sources, targets
+        return self._compiled
+
+    def __call__(self, device: HartDevice, request: PayloadSequence | None = None) -> PayloadSequence:
+        cls, sources, targets = self._compiled or self._compile()
+        for target, source in targets:
+            target(device, request).set_value(source(device, request).get_value())
+        return cls.acquire(**{name: source(device, request) for name, source in sources})
+
+
+def register_layouts(registry: CommandRegistry,
+                     table: LayoutTable,
+                     commands: dict[int, dict]):
+    """Register the commands of a `commands` table answered by layouts alone.
+
+    Each entry names its `reply` layout and, optionally, its `request`
+    layout, `assign` map and the `min_revision`, `device_type`, `cacheable`
+    and `writes` options of `CommandRegistry.register()`.
+    """
+    for number, spec in commands.items():
+        request = spec.get('request')
+        registry.register(
+            number,
+            table.factory(request) if request else None,
+            min_revision=spec.get('min_revision', 0),
+            device_type=spec.get('device_type'),
+            cacheable=spec.get('cacheable', True),
+            writes=spec.get('writes', False))(LayoutReply(table, spec['reply'], spec.get('assign')))
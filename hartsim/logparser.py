@@ -76,7 +76,7 @@ def _build_frame(match: re.Match, is_response: bool) -> bytes | None:
         # Extended command: the wire frame is a command-31 wrapper.
         # Request data:  U16 extended number + payload.
         # Response data: response code + device status + U16 extended number + payload
-        # (mirrors Cmd31Request/Cmd31Reply in commands.py).
+        # (mirrors the command 31 wrapper in commands.py).
         extended = bytes([(command >> 8) & 0xFF, command & 0xFF])
         if is_response:
             data = data[:2] + extended + data[2:]
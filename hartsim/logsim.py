@@ -1,24 +1,60 @@
 import argparse
+import asyncio
 import sys
-import time
-
-import serial
 
 from .config import Configuration
-from .framingutils import HartFrameBuilder
+from .framingutils import HartFrameView
+from .hartip import DEFAULT_PORT, HartIpServer, parse_endpoint
 from .logparser import parse_log_file, LogResponseProvider
+from .transport import SerialLink, open_serial
 
 PREAMBLE_COUNT = 5
 
 
-def main():
+class LogReplayer:
+    """Transport handler answering requests with their logged responses."""
+
+    def __init__(self, provider: LogResponseProvider, name: str = ''):
+        self.provider = provider
+        self.name = name
+        self.preambles = bytes([0xFF] * PREAMBLE_COUNT)
+
+    def handle(self, frame: HartFrameView) -> bytes | None:
+        # the provider keeps requests as keys, a view would pin the buffer
+        request = bytes(frame.raw)
+        request_hex = request.hex().upper()
+        response, is_fallback = self.provider.get_response(request)
+
+        if response is None:
+            print(f'{self.name} <= {request_hex} (no match)')
+            return None
+
+        response_hex = response.hex().upper()
+        match_type = ' (fallback)' if is_fallback else ''
+        print(f'{self.name} <= {request_hex}')
+        print(f'{self.name} => {response_hex}{match_type}')
+        # Prepend preambles and send response
+        return self.preambles + response
+
+
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser(
         prog='python -m hartsim.logsim',
         description='Replay a recorded HART communication log over a serial port.')
     parser.add_argument('logfile', help='path to the recorded log file')
     parser.add_argument('--port', default=None,
                         help='serial port name (default: HARTSIM_PORT env var or COM2)')
-    args = parser.parse_args()
+    parser.add_argument('--pty', action='store_true',
+                        help='serve a PTY pair instead of a serial port and print its path')
+    parser.add_argument('--hart-ip', metavar='[HOST:]PORT',
+                        help='serve HART-IP sessions over TCP and UDP instead of a serial port '
+                             f'(the standard port is {DEFAULT_PORT})')
+    args = parser.parse_args(argv)
+    if args.hart_ip:
+        try:
+            host, port = parse_endpoint(args.hart_ip)
+        except ValueError as exception:
+            parser.error(str(exception))
 
     log_file = args.logfile
     print(f'Loading log file: {log_file}')
@@ -39,50 +75,29 @@ def main():
     if provider.get_request_count() == 0:
         print('Warning: No request/response pairs found in log file')
 
-    config = Configuration()
-    if args.port:
-        config.port = args.port
-    port = serial.Serial(config.port,
-                         baudrate=1200,
-                         parity=serial.PARITY_ODD,
-                         bytesize=8,
-                         stopbits=1)
-
-    port.flush()
-    port.read_all()
-    port.dtr = False
-
-    print(f'Listening on {config.port}')
-
-    frame_builder = HartFrameBuilder()
-
-    while True:
-        if port.in_waiting:
-            data = port.read_all()
-            if frame_builder.collect(iter(data)):
-                frame = frame_builder.dequeue()
-                request = bytes(frame.serialize())
-                request_hex = request.hex().upper()
-                response, is_fallback = provider.get_response(request)
-
-                if response is not None:
-                    # Prepend preambles and send response
-                    preambles = bytes([0xFF] * PREAMBLE_COUNT)
-                    reply_data = preambles + response
-
-                    port.dtr = True
-                    port.write(reply_data)
-                    port.flush()
-                    port.dtr = False
-
-                    response_hex = response.hex().upper()
-                    match_type = ' (fallback)' if is_fallback else ''
-                    print(f'{config.port} <= {request_hex}')
-                    print(f'{config.port} => {response_hex}{match_type}')
-                else:
-                    print(f'{config.port} <= {request_hex} (no match)')
-        else:
-            time.sleep(0.01)
+    pair = None
+    if args.hart_ip:
+        link = HartIpServer(None, f'HART-IP {host or "*"}:{port}')
+    elif args.pty:
+        from .loopback import open_pty_pairs
+        pair = open_pty_pairs(1)[0]
+        link = SerialLink(pair.port, None, pair.path, key_dtr=False)
+    else:
+        config = Configuration()
+        if args.port:
+            config.port = args.port
+        link = SerialLink(open_serial(config.port), None, config.port)
+
+    print(f'Listening on {link.name}')
+
+    link.handler = LogReplayer(provider, link.name).handle
+    try:
+        asyncio.run(link.serve(host, port) if args.hart_ip else link.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pair is not None:
+            pair.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,137 @@
+"""PTY pairs for running the simulators without serial hardware (POSIX only)."""
+import asyncio
+import fcntl
+import os
+import select
+import termios
+import tty
+from dataclasses import dataclass
+from struct import unpack
+
+READ_SIZE = 4096
+# bytes a PtyPort queues while its slave end is not read; more are dropped
+MAX_PENDING = 65536
+
+
+class PtyPort:
+    """Master end of a PTY with the part of the pyserial API SerialLink uses.
+
+    Writes never block the event loop: what the PTY does not take is
+    queued and written from the running loop once the PTY is writable.
+    Without a running loop, writes wait for the PTY instead.
+    """
+
+    def __init__(self, fd: int, name: str):
+        self.fd = fd
+        self.port = name
+        # bytes dropped because the queue was full
+        self.dropped = 0
+        self._pending = bytearray()
+        self._loop = None
+        os.set_blocking(fd, False)
+
+    def fileno(self) -> int:
+        return self.fd
+
+    @property
+    def in_waiting(self) -> int:
+        return unpack('i', fcntl.ioctl(self.fd, termios.FIONREAD, b'\0\0\0\0'))[0]
+
+    def read(self, size: int = 1) -> bytes:
+        try:
+            return os.read(self.fd, max(size, READ_SIZE))
+        except BlockingIOError:
+            return b''
+
+    def write(self, data) -> int:
+        """Write or queue all of `data` and return its length."""
+        written = 0
+        if not self._pending:
+            try:
+                written = os.write(self.fd, data)
+            except BlockingIOError:
+                pass
+        if written < len(data):
+            self._queue(memoryview(data)[written:])
+        return len(data)
+
+    def _queue(self, data: memoryview):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_waiting(data)
+            return
+        if len(self._pending) + len(data) > MAX_PENDING:
+            self.dropped += len(data)
+            return
+        if not self._pending:
+            self._loop = loop
+            loop.add_writer(self.fd, self._on_writable)
+        # copied, replies may point into buffers reused for the next one
+        self._pending += data
+
+    def _on_writable(self):
+        try:
+            written = os.write(self.fd, self._pending)
+        except BlockingIOError:
+            return
+        except OSError:
+            written = len(self._pending)
+        del self._pending[:written]
+        if not self._pending:
+            self._loop.remove_writer(self.fd)
+
+    def _write_waiting(self, data: memoryview):
+        while data:
+            select.select([], [self.fd], [])
+            try:
+                data = data[os.write(self.fd, data):]
+            except BlockingIOError:
+                pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._pending:
+            self._loop.remove_writer(self.fd)
+            self._pending.clear()
+        os.close(self.fd)
+
+
+@dataclass
+class PtyPair:
+    """A PTY whose master end is served and whose slave end is the master's.
+
+    `path` can be opened by an external HART master (another process, a
+    pyserial based tool). An in-process master can use `slave_fd` directly.
+    The slave end stays open as long as the pair, so the served end keeps
+    working while masters come and go.
+    """
+    port: PtyPort
+    slave_fd: int
+    path: str
+
+    def close(self):
+        self.port.close()
+        os.close(self.slave_fd)
+
+
+def open_pty_pairs(count: int) -> list[PtyPair]:
+    pairs = []
+    try:
+        for _ in range(count):
+            master, slave = os.openpty()
+            try:
+                tty.setraw(slave)
+                path = os.ttyname(slave)
+            except OSError:
+                os.close(master)
+                os.close(slave)
+                raise
+            pairs.append(PtyPair(PtyPort(master, path), slave, path))
+    except OSError:
+        for pair in pairs:
+            pair.close()
+        raise
+    return pairs
@@ -0,0 +1,93 @@
+"""HART Packed ASCII: four 6-bit characters in every three bytes.
+
+Case folding, the replacement of characters outside `' '..'_'` and the
+6-bit codes go through translation tables. Packing squeezes the 8-bit codes
+of all characters into 24-bit groups with a few big integer operations
+instead of shifting character by character; unpacking does the reverse.
+"""
+from math import ceil
+
+FALLBACK = "?"
+FILLER = b" "
+CHARACTER_MASK = 0x3F
+ENCODING = "latin-1"
+
+
+def _fold(code: int) -> int:
+    character = chr(code)
+    if "a" <= character <= "z":
+        return code - 0x20
+    if character < " " or character > "_":
+        return ord(FALLBACK)
+    return code
+
+
+# latin-1 byte -> character that can be packed
+FOLD_TABLE = bytes(_fold(code) for code in range(256))
+# latin-1 byte -> 6-bit code of its folded character
+ENCODE_TABLE = bytes(_fold(code) & CHARACTER_MASK for code in range(256))
+# 6-bit code -> character, padded to the 256 entries bytes.translate() takes
+DECODE_TABLE = bytes(code + 0x40 if code < 0x20 else code for code in range(64)).ljust(256, b"\0")
+
+_masks = {}
+
+
+def _group_masks(groups: int) -> tuple[int, int, int, int]:
+    """Masks selecting the high and low parts of 16 and 32-bit lanes."""
+    masks = _masks.get(groups)
+    if masks is None:
+        masks = _masks[groups] = tuple(
+            int.from_bytes(pattern * groups, "big") for pattern in (
+                b"\x3F\x00\x3F\x00", b"\x00\x3F\x00\x3F",
+                b"\x0F\xFF\x00\x00", b"\x00\x00\x0F\xFF"))
+    return masks
+
+
+def packed_size(size: int) -> int:
+    """Bytes holding `size` packed characters."""
+    return int(ceil(size * 3 / 4))
+
+
+def fold(text: str) -> str:
+    """`text` with lower case letters upper cased and unsupported ones as '?'."""
+    return text.encode(ENCODING, "replace").translate(FOLD_TABLE).decode(ENCODING)
+
+
+def pack(text: str, size: int | None = None) -> bytes:
+    """Pack `text`, truncated or padded with spaces to `size` characters."""
+    if size is None:
+        size = len(text)
+    groups = -(-size // 4)
+    # characters past `size` in the last group are packed as zero bits
+    codes = text[:size].encode(ENCODING, "replace").ljust(size, FILLER)\
+        .translate(ENCODE_TABLE).ljust(groups * 4, b"\0")
+    high6, low6, high12, low12 = _group_masks(groups)
+    # every 32-bit lane holds four 8-bit codes: squeeze them to 6 bits
+    # in pairs, then the pairs to one 24-bit group
+    number = int.from_bytes(codes, "big")
+    number = ((number & high6) >> 2) | (number & low6)
+    number = ((number & high12) >> 4) | (number & low12)
+    packed = bytearray(number.to_bytes(groups * 4, "big"))
+    del packed[::4]
+    return bytes(packed[:packed_size(size)])
+
+
+def unpack(data, size: int | None = None) -> str:
+    """Characters packed in `data`, the first `size` of them if given.
+
+    Characters missing from a short `data` decode from zero bits.
+    """
+    if size is None:
+        size = len(data) * 4 // 3
+    groups = -(-size // 4)
+    data = bytes(data[:packed_size(size)]).ljust(groups * 3, b"\0")
+    lanes = bytearray(groups * 4)
+    lanes[1::4] = data[0::3]
+    lanes[2::4] = data[1::3]
+    lanes[3::4] = data[2::3]
+    high6, low6, high12, low12 = _group_masks(groups)
+    number = int.from_bytes(lanes, "big")
+    number = ((number << 4) & high12) | (number & low12)
+    number = ((number << 2) & high6) | (number & low6)
+    codes = number.to_bytes(groups * 4, "big")[:size]
+    return codes.translate(DECODE_TABLE).decode(ENCODING)
@@ -1,11 +1,20 @@
 from abc import abstractmethod
-from functools import reduce
-from itertools import repeat
-from math import ceil, floor
+from dataclasses import fields as dataclass_fields, is_dataclass
+from itertools import chain, islice
+from operator import attrgetter
 import struct
-from typing import Iterator
+from typing import Iterator, Sequence
 
-from attr import dataclass
+from array import array
+
+from attr import dataclass, fields as attr_fields
+
+from . import packedascii
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy is optional
+    numpy = None
 
 FULL_BYTE_MASK = 0xFF
 U16_MASK = 0xFFFF
@@ -13,40 +22,103 @@ MIN_SIZE = 1
 MAX_INTEGER_SIZE = 4
 BITS_IN_BYTE = 8
 FLOAT_SIZE = 4
-PACKED_ASCII_FALLBACK = "?"
-PACKED_ASCII_FILLER = " "
-PACKED_ASCII_MASK = 0x3F
+BYTE_ORDER = ">"
+ASCII_ENCODING = "latin-1"
+ASCII_FILLER = b" "
+UNSIGNED_FORMATS = {1: "B", 2: "H", 3: "BH", 4: "I"}
+# buffer sizes up to this get their unpack layout cached
+MAX_CACHED_LAYOUT = 1024
+# released payloads kept per class for reuse
+POOL_SIZE = 8
+# with NumPy, float arrays are kept in wire byte order
+F32_ARRAY_DTYPE = numpy.dtype('>f4') if numpy is not None else None
 
 
 class Payload:
+    """Serializable protocol value.
+
+    Primitives keep only their value and flags in `__slots__`; sizes and
+    masks are class constants. Iterating a payload iterates over a fresh
+    serialized copy, so the value object holds no iteration state.
+    """
+    __slots__ = ('_optional', '_skipped')
+
     def __init__(self,
                  is_optional: bool = False):
-        self.__is_optional = is_optional
-        self.__is_skipped = False
+        self._optional = is_optional
+        self._skipped = False
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._serialize())
 
-    def __iter__(self):
-        self._offset = 0
-        return self
+    def __copy__(self):
+        clone = object.__new__(type(self))
+        clone._optional = self._optional
+        clone._skipped = self._skipped
+        return clone
 
     def is_optional(self):
-        return self.__is_optional
+        return self._optional
 
     def is_skipped(self):
-        return self.__is_skipped
+        return self._skipped
 
     def skip(self):
-        self.__is_skipped = True
+        self._skipped = True
 
     def include(self):
-        self.__is_skipped = False
+        self._skipped = False
+
+    def _serialize(self) -> bytes:
+        return b''
+
+    def _struct_format(self) -> str:
+        """struct format of the serialized value, without byte order."""
+        return f'{len(self._serialize())}s'
+
+    def _struct_is_scalar(self) -> bool:
+        """True when `_value` can be passed to struct as is."""
+        return False
+
+    def _struct_is_variable(self) -> bool:
+        """True when the size depends on the value.
+
+        A sequence unpacks variable fields from the bytes left by the fixed
+        ones, passed to `_struct_load()` as a single bytes value.
+        """
+        return False
+
+    def _struct_min_size(self) -> int:
+        """Bytes a variable field needs at least."""
+        return 0
+
+    def _struct_fit(self, available: int) -> int:
+        """Bytes a variable field takes of `available` ones."""
+        return available
+
+    def _struct_values(self) -> tuple:
+        return (self._serialize(),)
+
+    def _struct_load(self, values: tuple):
+        self._deserialize(iter(values[0]))
 
     def deserialize(self, iterator: Iterator[int]):
         self._deserialize(iterator)
         self.include()
 
-    @abstractmethod
-    def __next__(self):
-        raise StopIteration
+    def decode_from(self, buffer, offset: int = 0) -> int | None:
+        """Load the value from `buffer` at `offset`.
+
+        Returns the offset after the value, or None without changing the
+        value when the buffer is too short.
+        """
+        layout = struct.Struct(BYTE_ORDER + self._struct_format())
+        end = offset + layout.size
+        if end > len(buffer):
+            return None
+        self._struct_load(layout.unpack_from(buffer, offset))
+        self.include()
+        return end
 
     @abstractmethod
     def _deserialize(self, iterator: Iterator[int]):
@@ -54,50 +126,80 @@ class Payload:
 
 
 class Unsigned(Payload):
+    """Big-endian unsigned integer of 1 to 4 bytes.
+
+    The size is a class constant of `U8`, `U16`, `U24` and `U32`;
+    `Unsigned(value, size)` creates an instance of the class for `size`.
+    """
+    __slots__ = ('_value',)
+    _size = MIN_SIZE
+    _mask = FULL_BYTE_MASK
+    _format = UNSIGNED_FORMATS[MIN_SIZE]
+
+    def __new__(cls, value: int = 0, size: int = MIN_SIZE, is_optional: bool = False):
+        if cls is Unsigned:
+            cls = _SIZED_UNSIGNED[min(max(size, MIN_SIZE), MAX_INTEGER_SIZE)]
+        return super().__new__(cls)
+
     def __init__(self,
                  value: int = 0,
                  size: int = MIN_SIZE,
                  is_optional: bool = False):
-        self.__size = MIN_SIZE\
-            if size < MIN_SIZE\
-            else\
-            MAX_INTEGER_SIZE\
-            if size > MAX_INTEGER_SIZE\
-            else\
-            size
-        self.__mask = reduce(lambda x, y: x << 8 | y,
-                             repeat(FULL_BYTE_MASK, self.__size))
         self.set_value(value)
-        super().__init__(is_optional)
+        self._optional = is_optional
+        self._skipped = False
+
+    def __copy__(self):
+        clone = object.__new__(type(self))
+        clone._value = self._value
+        clone._optional = self._optional
+        clone._skipped = self._skipped
+        return clone
 
     def get_size(self):
-        return self.__size
+        return self._size
 
     def get_value(self):
-        return self.__value
+        return self._value
 
     def set_value(self, value):
         if value < 0:
             value = -value
-        self.__value = value & self.__mask
-
-    def __next__(self):
-        if self._offset < self.__size:
-            next = (self.__value >> (BITS_IN_BYTE *
-                    (self.__size - self._offset - 1))) & FULL_BYTE_MASK
-            self._offset += 1
-            return next
+        self._value = value & self._mask
+
+    def _serialize(self) -> bytes:
+        return self._value.to_bytes(self._size, 'big')
+
+    def _struct_format(self) -> str:
+        return self._format
+
+    def _struct_is_scalar(self) -> bool:
+        return self._size != 3
+
+    def _struct_values(self) -> tuple:
+        if self._size == 3:
+            return (self._value >> 16, self._value & U16_MASK)
+        return (self._value,)
+
+    def _struct_load(self, values: tuple):
+        if self._size == 3:
+            self._value = (values[0] << 16) | values[1]
         else:
-            raise StopIteration
+            self._value = values[0]
 
     def _deserialize(self, iterator: Iterator[int]):
         value = 0
-        for _ in range(0, self.__size):
+        for _ in range(0, self._size):
             value = (value << BITS_IN_BYTE) | (next(iterator) & FULL_BYTE_MASK)
         self.set_value(value)
 
 
 class U8(Unsigned):
+    __slots__ = ()
+    _size = 1
+    _mask = 0xFF
+    _format = UNSIGNED_FORMATS[1]
+
     def __init__(self,
                  value: int = 0,
                  is_optional: bool = False):
@@ -105,6 +207,11 @@ class U8(Unsigned):
 
 
 class U16(Unsigned):
+    __slots__ = ()
+    _size = 2
+    _mask = 0xFFFF
+    _format = UNSIGNED_FORMATS[2]
+
     def __init__(self,
                  value: int = 0,
                  is_optional: bool = False):
@@ -112,6 +219,11 @@ class U16(Unsigned):
 
 
 class U24(Unsigned):
+    __slots__ = ()
+    _size = 3
+    _mask = 0xFFFFFF
+    _format = UNSIGNED_FORMATS[3]
+
     def __init__(self,
                  value: int = 0,
                  is_optional: bool = False):
@@ -119,89 +231,264 @@ class U24(Unsigned):
 
 
 class U32(Unsigned):
+    __slots__ = ()
+    _size = 4
+    _mask = 0xFFFFFFFF
+    _format = UNSIGNED_FORMATS[4]
+
     def __init__(self,
                  value: int = 0,
                  is_optional: bool = False):
         super().__init__(value, 4, is_optional)
 
 
+# classes `Unsigned(value, size)` instantiates, they keep its signature
+_SIZED_UNSIGNED = {
+    sized._size: type(f'Unsigned{sized._size * BITS_IN_BYTE}', (Unsigned,), {
+        '__slots__': (),
+        '_size': sized._size,
+        '_mask': sized._mask,
+        '_format': sized._format,
+    })
+    for sized in (U8, U16, U24, U32)
+}
+
+
 class F32(Payload):
+    __slots__ = ('_value',)
+    _size = FLOAT_SIZE
+    _struct = struct.Struct(">f")
+
     def __init__(self,
                  value: float = float("nan"),
                  is_optional: bool = False):
-        self.__size = FLOAT_SIZE
-        self.set_value(value)
-        super().__init__(is_optional)
+        self._value = value
+        self._optional = is_optional
+        self._skipped = False
+
+    def __copy__(self):
+        clone = object.__new__(F32)
+        clone._value = self._value
+        clone._optional = self._optional
+        clone._skipped = self._skipped
+        return clone
 
     def get_size(self):
-        return self.__size
+        return self._size
 
     def get_value(self):
-        return self.__value
+        return self._value
 
     def set_value(self, value):
-        self.__value = value
-
-    def __iter__(self):
-        self.__serialized = struct.pack(">f", self.__value)
-        super().__iter__()
-        return self
-
-    def __next__(self):
-        if self._offset < self.__size:
-            next = self.__serialized[self._offset]
-            self._offset += 1
-            return next
-        else:
-            raise StopIteration
+        self._value = value
+
+    def _serialize(self) -> bytes:
+        return self._struct.pack(self._value)
 
     def _deserialize(self, iterator: Iterator[int]):
-        self.__serialized = bytearray([0, 0, 0, 0])
-        for i in range(0, self.__size):
-            self.__serialized[i] = (next(iterator) & FULL_BYTE_MASK)
-        self.set_value(struct.unpack('>f', self.__serialized)[0])
+        serialized = bytearray(self._size)
+        for i in range(0, self._size):
+            serialized[i] = next(iterator) & FULL_BYTE_MASK
+        self.set_value(self._struct.unpack(serialized)[0])
+
+    def _struct_format(self) -> str:
+        return "f"
+
+    def _struct_is_scalar(self) -> bool:
+        return True
+
+    def _struct_values(self) -> tuple:
+        return (self._value,)
+
+    def _struct_load(self, values: tuple):
+        self._value = values[0]
+
+
+class ColumnView:
+    """Mixin making `_value` element `index` of a column.
+
+    Precedes the payload class in the bases, e.g. `F32View(ColumnView, F32)`,
+    which subclasses name as `_primitive`. The column is an `array` or
+    ndarray shared with other views, as kept by `VariableEngine` and
+    `DeviceFleet`. Copies are plain `_primitive` payloads holding the value.
+    """
+    __slots__ = ()
+    # payload class of the view and its copies
+    _primitive: type[Payload]
+    # converts column elements to the value type of the payload
+    _convert = float
+
+    def __init__(self,
+                 column,
+                 index: int,
+                 is_optional: bool = False):
+        self._column = column
+        self._index = index
+        self._optional = is_optional
+        self._skipped = False
+
+    def __copy__(self):
+        clone = object.__new__(self._primitive)
+        clone._value = self._value
+        clone._optional = self._optional
+        clone._skipped = self._skipped
+        return clone
+
+    @property
+    def _value(self):
+        return self._convert(self._column[self._index])
+
+    @_value.setter
+    def _value(self, value):
+        self._column[self._index] = value
+
+
+class F32View(ColumnView, F32):
+    """F32 whose value is element `index` of a float column."""
+    __slots__ = ('_column', '_index')
+    _primitive = F32
+
+
+class U8View(ColumnView, U8):
+    __slots__ = ('_column', '_index')
+    _primitive = U8
+    _convert = int
+
+
+class U16View(ColumnView, U16):
+    __slots__ = ('_column', '_index')
+    _primitive = U16
+    _convert = int
+
+
+class U24View(ColumnView, U24):
+    __slots__ = ('_column', '_index')
+    _primitive = U24
+    _convert = int
+
+
+class U32View(ColumnView, U32):
+    __slots__ = ('_column', '_index')
+    _primitive = U32
+    _convert = int
+
+
+# view classes of the payload classes columns can hold
+COLUMN_VIEWS = {view._primitive: view for view in (F32View, U8View, U16View, U24View, U32View)}
 
 
 class F32Array(Payload):
-    """Массив float фиксированного размера (big-endian IEEE 754)."""
+    """Массив float фиксированного размера (big-endian IEEE 754).
+
+    With NumPy the values are a read-only `F32_ARRAY_DTYPE` ndarray: it is
+    packed with `tobytes()`, loaded as a view of the unpacked bytes and
+    shared by copies. Without NumPy it is a list packed by struct.
+    """
+    __slots__ = ('_count', '_values')
+
     def __init__(self,
                  count: int,
-                 values: list[float] | None = None,
+                 values=None,
                  is_optional: bool = False):
         self._count = count
-        self._values = list(values) if values is not None else [float('nan')] * count
+        if values is None and numpy is not None:
+            self._values = _nan_array(count)
+        else:
+            self.set_value([float('nan')] * count if values is None else values)
         super().__init__(is_optional)
 
+    def __copy__(self):
+        clone = super().__copy__()
+        clone._count = self._count
+        clone._values = self._values if numpy is not None else list(self._values)
+        return clone
+
     def get_size(self):
         return self._count * FLOAT_SIZE
 
-    def get_value(self) -> list[float]:
+    def get_value(self):
+        """Copy of the values, a writable ndarray with NumPy, else a list."""
+        if numpy is not None:
+            return self._values.copy()
         return list(self._values)
 
-    def set_value(self, values: list[float]):
-        self._values = list(values)
+    def set_value(self, values):
+        if len(values) != self._count:
+            raise ValueError(f'{len(values)} values, expected {self._count}')
+        if numpy is not None:
+            values = numpy.array(values, dtype=F32_ARRAY_DTYPE)
+            values.flags.writeable = False
+            self._values = values
+        else:
+            self._values = list(values)
 
-    def __iter__(self):
-        self._serialized = struct.pack(f'>{self._count}f', *self._values)
-        super().__iter__()
-        return self
+    def _serialize(self) -> bytes:
+        if numpy is not None:
+            return self._values.tobytes()
+        return struct.pack(f'>{self._count}f', *self._values)
 
-    def __next__(self):
-        if self._offset < len(self._serialized):
-            result = self._serialized[self._offset]
-            self._offset += 1
-            return result
-        else:
+    def _deserialize(self, iterator: Iterator[int]):
+        data = bytes(islice(iterator, self._count * FLOAT_SIZE))
+        if len(data) < self._count * FLOAT_SIZE:
             raise StopIteration
+        self._load(data)
 
-    def _deserialize(self, iterator: Iterator[int]):
-        data = bytearray()
-        for _ in range(self._count * FLOAT_SIZE):
-            data.append(next(iterator) & FULL_BYTE_MASK)
-        self._values = list(struct.unpack(f'>{self._count}f', data))
+    def decode_from(self, buffer, offset: int = 0) -> int | None:
+        end = offset + self._count * FLOAT_SIZE
+        if end > len(buffer):
+            return None
+        self._load(bytes(buffer[offset:end]))
+        self.include()
+        return end
+
+    def _load(self, data: bytes):
+        if numpy is not None:
+            self._values = numpy.frombuffer(data, F32_ARRAY_DTYPE)
+        else:
+            self._values = list(struct.unpack(f'>{self._count}f', data))
+
+    def _struct_format(self) -> str:
+        if numpy is not None:
+            return f'{self._count * FLOAT_SIZE}s'
+        return f'{self._count}f'
+
+    def _struct_values(self) -> tuple:
+        if numpy is not None:
+            return (self._values.tobytes(),)
+        return tuple(self._values)
+
+    def _struct_load(self, values: tuple):
+        if numpy is not None:
+            self._load(values[0])
+        else:
+            self._values = list(values)
+
+
+_nan_arrays = {}
+
+
+def _nan_array(count: int):
+    """Read-only NaN ndarray F32Arrays without values share."""
+    values = _nan_arrays.get(count)
+    if values is None:
+        values = _nan_arrays[count] = numpy.full(count, float('nan'), dtype=F32_ARRAY_DTYPE)
+        values.flags.writeable = False
+    return values
+
+
+def f32_table(values) -> array:
+    """Writable float table for device data served through F32Array.
+
+    An ndarray in `F32_ARRAY_DTYPE` with NumPy, else an `array('f')`.
+    """
+    if numpy is not None:
+        return numpy.array(values, dtype=F32_ARRAY_DTYPE)
+    return array('f', values)
 
 
 class Ascii(Payload):
+    __slots__ = ('__size', '__value')
+
     def __init__(self,
                  size: int,
                  value: str = "",
@@ -210,6 +497,12 @@ class Ascii(Payload):
         self.set_value(value)
         super().__init__(is_optional)
 
+    def __copy__(self):
+        clone = super().__copy__()
+        clone.__size = self.__size
+        clone.__value = self.__value
+        return clone
+
     def get_size(self):
         return self.__size
 
@@ -222,17 +515,8 @@ class Ascii(Payload):
         else:
             self.__value = value
 
-    def __next__(self):
-        if self._offset < len(self.__value):
-            next = ord(self.__value[self._offset])
-            self._offset += 1
-            return next
-        elif self._offset < self.__size:
-            next = ord(" ")
-            self._offset += 1
-            return next
-        else:
-            raise StopIteration
+    def _serialize(self) -> bytes:
+        return self._struct_values()[0]
 
     def _deserialize(self, iterator: Iterator[int]):
         value = ""
@@ -240,136 +524,520 @@ class Ascii(Payload):
             value += chr(next(iterator))
         self.set_value(value)
 
+    def _struct_format(self) -> str:
+        return f'{self.__size}s'
+
+    def _struct_values(self) -> tuple:
+        return (self.__value.encode(ASCII_ENCODING).ljust(self.__size, ASCII_FILLER),)
+
+    def _struct_load(self, values: tuple):
+        self.set_value(values[0].decode(ASCII_ENCODING))
+
 
 class PackedAscii(Payload):
+    __slots__ = ('__size', '__value', '__packed')
+
     def __init__(self,
                  size: int,
                  value: str = "",
                  is_optional: bool = False):
         self.__size = MIN_SIZE if size < MIN_SIZE else size
-        self.__packed_size = int(ceil(self.__size * 3 / 4))
         self.set_value(value)
         super().__init__(is_optional)
 
+    def __copy__(self):
+        clone = super().__copy__()
+        clone.__size = self.__size
+        clone.__value = self.__value
+        clone.__packed = self.__packed
+        return clone
+
     def get_size(self):
         return self.__size
 
     def get_packed_size(self):
-        return self.__packed_size
+        return packedascii.packed_size(self.__size)
 
     def get_value(self) -> str:
         return self.__value
 
     def set_value(self, value: str):
-        if (len(value) > self.__size):
-            newValue = value[:self.__size]
-        else:
-            newValue = value
-        newValue = str("".join(
-            map(
-                lambda x: chr(ord(x) - 0x20)
-                if x >= "a" and x <= "z"
-                else
-                PACKED_ASCII_FALLBACK
-                if x < " " or x > "_"
-                else
-                x,
-                newValue)))
-        self.__value = newValue
-
-    def __next__(self):
-        if self._offset < self.__packed_size:
-            left_index = floor(self._offset * 4 / 3)
-            left_shift = (self._offset % 3 + 1) * 2
-            right_index = left_index + 1
-            right_shift = 6 - left_shift
-
-            if left_index < len(self.__value):
-                value = self.__value[left_index]
-            else:
-                value = PACKED_ASCII_FILLER
-            left = ((ord(value) & PACKED_ASCII_MASK)
-                    << left_shift) & FULL_BYTE_MASK
+        self.__value = packedascii.fold(value[:self.__size])
+        self.__packed = None
 
-            if right_index < self.__size:
-                if right_index < len(self.__value):
-                    value = self.__value[right_index]
-                else:
-                    value = PACKED_ASCII_FILLER
-                right = ((ord(value) & PACKED_ASCII_MASK)
-                         >> right_shift) & FULL_BYTE_MASK
-            else:
-                right = 0
-
-            next = left | right
-            self._offset += 1
-            return next
-        else:
-            raise StopIteration
+    def _serialize(self) -> bytes:
+        # keep the packed value until the value changes
+        if self.__packed is None:
+            self.__packed = packedascii.pack(self.__value, self.__size)
+        return self.__packed
 
     def _deserialize(self, iterator: Iterator[int]):
-        value = bytearray(self.__size)
-        for i in range(0, self.__packed_size):
-            item = next(iterator)
-
-            left_index = floor(i * 4 / 3)
-            left_shift = (i % 3 + 1) * 2
-
-            if left_index < self.__size:
-                value[left_index] |= (item >> left_shift) & PACKED_ASCII_MASK
-
-            right_index = left_index + 1
-            right_shift = 6 - left_shift
-
-            if right_index < self.__size:
-                value[right_index] |= (item << right_shift) & PACKED_ASCII_MASK
-
-        value = bytearray(
-            [item + 0x40 if item < 0x20 else item for item in value])
-
-        self.set_value(str(value, "ascii"))
+        data = bytearray(self.get_packed_size())
+        for i in range(0, len(data)):
+            data[i] = next(iterator)
+        self._struct_load((data,))
+
+    def _struct_format(self) -> str:
+        return f'{self.get_packed_size()}s'
+
+    def _struct_load(self, values: tuple):
+        # unused trailing bits may be set, so pack again when serializing
+        self.__value = packedascii.unpack(values[0], self.__size)
+        self.__packed = None
+
+
+class PayloadCodec:
+    """struct layout of a PayloadSequence subclass.
+
+    Compiled from the field defaults of the class: fixed-width fields are
+    combined into one `struct.Struct` per combination of skipped optional
+    fields, so a whole sequence is packed or unpacked with a single call.
+    Fields must have the struct format of their default: instances check
+    the fields they are given, and packing checks the sizes of strings and
+    arrays.
+    """
+
+    def __init__(self, fields: Sequence[tuple[str, Payload]]):
+        self.names = tuple(name for name, _ in fields)
+        scalars = [field._struct_is_scalar() for _, field in fields]
+        self._formats = tuple(field._struct_format() for _, field in fields)
+        self._arities = tuple(1 if scalar else len(field._struct_values())
+                              for scalar, (_, field) in zip(scalars, fields))
+        # scalar fields are read straight from their `_value`, the others
+        # from `_struct_values()` of the field object, found in the instance
+        # dict or, when the instance has not read it yet, the default
+        self._values = _tuple_getter(
+            f'{name}._value' if scalar else '__dict__' for name, scalar in zip(self.names, scalars))
+        self._complex = frozenset(
+            index for index, scalar in enumerate(scalars) if not scalar)
+        self._optional = tuple(
+            index for index, (_, field) in enumerate(fields) if field.is_optional())
+        self._skipped = _tuple_getter(
+            f'{self.names[index]}._skipped' for index in self._optional)
+        # variable length fields (greedy arrays, repeated groups) make the
+        # format per value
+        self._variable = frozenset(
+            index for index, (_, field) in enumerate(fields) if field._struct_is_variable())
+        self._minimum_formats = tuple(
+            f'{field._struct_min_size()}s' for _, field in fields if field._struct_is_variable())
+        self._fit = next(
+            (field._struct_fit for _, field in fields if field._struct_is_variable()), None)
+        self._fields = _tuple_getter(self.names)
+        self._scalars = tuple(scalars)
+        self._defaults = tuple(field for _, field in fields)
+        self._structs = {}
+        self._layouts = {}
+        self._plans = {}
+        self._fixed = self._struct(frozenset())\
+            if not self._complex and not self._optional and not self._variable\
+            else None
+
+    def _struct(self, excluded, variable_formats: tuple = ()) -> struct.Struct:
+        key = (excluded, variable_formats)
+        compiled = self._structs.get(key)
+        if compiled is None:
+            formats = list(self._formats)
+            for index, format in zip(sorted(self._variable), variable_formats):
+                formats[index] = format
+            compiled = struct.Struct(BYTE_ORDER + ''.join(
+                format for index, format in enumerate(formats) if index not in excluded))
+            self._structs[key] = compiled
+        return compiled
+
+    def _mismatch(self, payload: 'PayloadSequence', index: int, field: Payload):
+        _field_mismatch(type(payload), self.names[index], field, self._defaults[index])
+
+    def _pack_args(self, payload: 'PayloadSequence') -> tuple[struct.Struct, tuple]:
+        values = self._values(payload)
+        if self._fixed is not None:
+            return self._fixed, values
+
+        excluded = frozenset(
+            index for index, skipped in zip(self._optional, self._skipped(payload)) if skipped)
+        args = []
+        variable_formats = []
+        complex = self._complex
+        for index, value in enumerate(values):
+            if index in excluded:
+                continue
+            if index in complex:
+                value = value.get(self.names[index], self._defaults[index])
+                args.extend(value._struct_values())
+                if index in self._variable:
+                    variable_formats.append(value._struct_format())
+                elif value._struct_format() != self._formats[index]:
+                    self._mismatch(payload, index, value)
+            else:
+                args.append(value)
+        return self._struct(excluded, tuple(variable_formats)), args
+
+    def pack(self, payload: 'PayloadSequence', reserve: int = 0) -> bytes:
+        compiled, args = self._pack_args(payload)
+        if not reserve:
+            return compiled.pack(*args)
+        buffer = bytearray(reserve + compiled.size)
+        compiled.pack_into(buffer, reserve, *args)
+        return buffer
+
+    def pack_into(self, payload: 'PayloadSequence', buffer, offset: int = 0) -> int:
+        compiled, args = self._pack_args(payload)
+        compiled.pack_into(buffer, offset, *args)
+        return offset + compiled.size
+
+    def _layout(self, available: int) -> tuple[tuple, struct.Struct]:
+        """Load plan and struct for a buffer of `available` bytes.
+
+        Optional fields are included in order as long as the buffer holds
+        them. The struct may still be longer than the buffer when the
+        mandatory fields do not fit.
+        """
+        layout = self._layouts.get(available)
+        if layout is not None:
+            return layout
+        optional = self._optional
+        for included in range(len(optional), -1, -1):
+            excluded = frozenset(optional[included:])
+            variable_formats = ()
+            if self._variable:
+                # the first variable field takes the bytes the others leave
+                minimum = self._struct(excluded, self._minimum_formats).size
+                first = self._fit(int(self._minimum_formats[0][:-1]) + max(available - minimum, 0))
+                variable_formats = (f'{first}s',) + self._minimum_formats[1:]
+            compiled = self._struct(excluded, variable_formats)
+            if compiled.size <= available:
+                break
+        layout = self._plan(excluded), compiled
+        if available <= MAX_CACHED_LAYOUT:
+            self._layouts[available] = layout
+        return layout
+
+    def _plan(self, excluded: frozenset) -> tuple:
+        """(skipped, scalar, start, stop) of every field in the unpacked values."""
+        plan = self._plans.get(excluded)
+        if plan is None:
+            plan = []
+            position = 0
+            for index, scalar in enumerate(self._scalars):
+                if index in excluded:
+                    plan.append((True, False, 0, 0))
+                    continue
+                arity = self._arities[index] if index not in self._variable else 1
+                plan.append((False, scalar, position, position + arity))
+                position += arity
+            plan = self._plans[excluded] = tuple(plan)
+        return plan
+
+    def _load(self, payload: 'PayloadSequence', values: tuple, plan: tuple):
+        for field, (skipped, scalar, start, stop) in zip(self._fields(payload), plan):
+            if skipped:
+                field._skipped = True
+                continue
+            if scalar:
+                field._value = values[start]
+            else:
+                field._struct_load(values[start:stop])
+            field._skipped = False
+
+    def unpack_from(self, payload: 'PayloadSequence', buffer, offset: int = 0) -> int:
+        """Load fields from `buffer` and return the offset after them.
+
+        Optional fields are included in order as long as the buffer holds
+        them; the rest are skipped. Raises `struct.error` if the buffer is
+        too short for the mandatory fields.
+        """
+        plan, compiled = self._layout(len(buffer) - offset)
+        self._load(payload, compiled.unpack_from(buffer, offset), plan)
+        return offset + compiled.size
+
+    def decode_from(self, payload: 'PayloadSequence', buffer, offset: int = 0) -> int | None:
+        """Like `unpack_from()`, but returns None instead of raising when the
+        buffer is too short and leaves the payload unchanged."""
+        plan, compiled = self._layout(len(buffer) - offset)
+        if compiled.size > len(buffer) - offset:
+            return None
+        self._load(payload, compiled.unpack_from(buffer, offset), plan)
+        return offset + compiled.size
+
+
+# (class, field name, type) of fields given another type that packs like
+# the default, such as column views; packing still checks string sizes
+_ACCEPTED_TYPES = set()
+
+
+def _check_field(cls: type, name: str, value, default: Payload):
+    """Raise `TypeError` unless `value` packs like `default`, the default of
+    field `name` of `cls`."""
+    key = (cls, name, type(value))
+    if key in _ACCEPTED_TYPES:
+        return
+    if isinstance(value, Payload):
+        if default._struct_is_variable():
+            if isinstance(value, type(default)):
+                _ACCEPTED_TYPES.add(key)
+                return
+        elif value._struct_format() == default._struct_format():
+            _ACCEPTED_TYPES.add(key)
+            return
+    _field_mismatch(cls, name, value, default)
+
+
+def _field_mismatch(cls: type, name: str, value, default: Payload):
+    packed = f' packed as {value._struct_format()!r}' if isinstance(value, Payload) else ''
+    raise TypeError(f'{cls.__name__}.{name} is a {type(value).__name__}{packed}, '
+                    f'{type(default).__name__} {default._struct_format()!r} expected')
+
+
+def _tuple_getter(paths) -> attrgetter:
+    """attrgetter that returns a tuple for any number of attributes."""
+    paths = tuple(paths)
+    if len(paths) == 1:
+        getter = attrgetter(paths[0])
+        return lambda payload: (getter(payload),)
+    if not paths:
+        return lambda payload: ()
+    return attrgetter(*paths)
+
+
+class _CopyOnRead:
+    """Class attribute of a non-scalar field of a PayloadSequence.
+
+    Instances that were not given the field read it from here the first
+    time, which stores a copy of the default in the instance.
+    """
+    __slots__ = ('name', 'default')
+
+    def __init__(self, name: str, default: Payload):
+        self.name = name
+        self.default = default
+
+    def __get__(self, payload, cls=None):
+        if payload is None:
+            return self.default
+        field = payload.__dict__[self.name] = self.default.__copy__()
+        return field
+
+
+def _is_cloned(default: Payload) -> bool:
+    """True for defaults holding only `_value` and flags, see `_get_prototype()`."""
+    return type(default).__copy__ in (Unsigned.__copy__, F32.__copy__)
 
 
 @dataclass
 class PayloadSequence(Payload):
-    def __iter__(self):
-        self.__attr_iterator = iter(
-            filter(lambda x: not x.startswith("_"), list(self.__dict__.keys())))
-        next_attr = next(self.__attr_iterator)
-        self.__byte_iterator = iter(self.__dict__[next_attr])
-        return self
-
-    def __next__(self):
-        try:
-            result = next(self.__byte_iterator)
-        except StopIteration:
-            next_attr = next(self.__attr_iterator)
-            while self.__dict__[next_attr].is_optional()\
-                    and self.__dict__[next_attr].is_skipped():
-                next_attr = next(self.__attr_iterator)
-            self.__byte_iterator = iter(
-                self.__dict__[next_attr])
-            result = next(self.__byte_iterator)
-        return result
+    """Payload composed of the primitives in its dataclass fields.
+
+    Field defaults are created once with the class and serve as its
+    prototype, so changing a field of one instance never changes another
+    one: instances clone the numeric defaults they are not given, and copy
+    the other defaults (strings, arrays, groups) when they first read them.
+    Given fields must pack like the defaults, or `TypeError` is raised.
+    """
+
+    def __post_init__(self):
+        fields = self.__dict__
+        cls = type(self)
+        cloned, copied = cls.__dict__.get("_prototype") or cls._get_prototype()
+        new = object.__new__
+        for name, default, kind, value, optional, skipped in cloned:
+            given = fields[name]
+            if given is default:
+                clone = fields[name] = new(kind)
+                clone._value = value
+                clone._optional = optional
+                clone._skipped = skipped
+            elif type(given) is not type(default):
+                _check_field(cls, name, given, default)
+        for name, default in copied:
+            given = fields[name]
+            if given is default:
+                del fields[name]
+            elif type(given) is not type(default):
+                _check_field(cls, name, given, default)
+
+    __attrs_post_init__ = __post_init__
+
+    @classmethod
+    def _get_defaults(cls) -> tuple[tuple[str, Payload], ...]:
+        defaults = cls.__dict__.get("_defaults")
+        if defaults is None:
+            items = ((item.name, item.default) for item in dataclass_fields(cls))\
+                if is_dataclass(cls)\
+                else ((item.name, item.default) for item in attr_fields(cls))
+            defaults = tuple((name, default) for name, default in items
+                             if isinstance(default, Payload))
+            cls._defaults = defaults
+        return defaults
+
+    @classmethod
+    def _get_prototype(cls) -> tuple[tuple[tuple, ...], tuple[tuple[str, Payload], ...]]:
+        """Fields cloned and fields copied on read by every instance.
+
+        Numeric defaults are cloned from (name, default, class, value,
+        optional, skipped). The other defaults, (name, default), become
+        `_CopyOnRead` class attributes.
+        """
+        prototype = cls.__dict__.get("_prototype")
+        if prototype is None:
+            cloned, copied = [], []
+            for name, default in cls._get_defaults():
+                if _is_cloned(default):
+                    cloned.append((name, default, type(default), default._value,
+                                   default._optional, default._skipped))
+                else:
+                    setattr(cls, name, _CopyOnRead(name, default))
+                    copied.append((name, default))
+            prototype = cls._prototype = (tuple(cloned), tuple(copied))
+        return prototype
+
+    def _fields(self) -> list[tuple[str, Payload]]:
+        return [(name, getattr(self, name)) for name, _ in self._get_defaults()]
+
+    def _get_codec(self) -> PayloadCodec:
+        cls = type(self)
+        codec = cls.__dict__.get("_codec")
+        if codec is None:
+            codec = PayloadCodec(cls._get_defaults())
+            cls._codec = codec
+        return codec
+
+    @classmethod
+    def acquire(cls, **fields) -> 'PayloadSequence':
+        """Instance from the class `PayloadPool`, like `cls(**fields)`.
+
+        Hand it back with `release()` once it is serialized.
+        """
+        return payload_pool(cls).acquire(**fields)
+
+    def release(self):
+        """Return an instance taken with `acquire()` to its pool.
+
+        Other instances and instances already released are left alone.
+        """
+        given = self.__dict__.pop('_acquired', None)
+        if given is not None:
+            self._pool.release(self, given)
+
+    def pack(self, reserve: int = 0) -> bytes:
+        """Serialized payload, in a bytearray after `reserve` zero bytes if given."""
+        return self._get_codec().pack(self, reserve)
+
+    def pack_into(self, buffer, offset: int = 0) -> int:
+        return self._get_codec().pack_into(self, buffer, offset)
+
+    def unpack_from(self, buffer, offset: int = 0) -> int:
+        return self._get_codec().unpack_from(self, buffer, offset)
+
+    def decode_from(self, buffer, offset: int = 0) -> int | None:
+        end = self._get_codec().decode_from(self, buffer, offset)
+        if end is not None:
+            self.include()
+        return end
+
+    def _serialize(self) -> bytes:
+        return self.pack()
 
     def _deserialize(self, iterator: Iterator[int]):
-        for attr in self.__dict__.keys():
+        for _, field in self._fields():
             try:
-                self.__dict__[attr].deserialize(iterator)
+                field.deserialize(iterator)
             except StopIteration:
-                if self.__dict__[attr].is_optional():
-                    self.__dict__[attr].skip()
+                if field.is_optional():
+                    field.skip()
                 else:
                     raise
 
 
+class PayloadPool:
+    """Free list of instances of one PayloadSequence class.
+
+    Fields given to `acquire()` are assigned as they are, like constructor
+    arguments (replies mostly pass device fields). The other fields are the
+    instance's own objects; on release the given ones are dropped, numeric
+    own ones get their default value back and the others are copied again
+    on their next read, so handlers must fill them with `set_value()` and
+    never hand them out.
+    """
+
+    def __init__(self, cls: type['PayloadSequence'], size: int = POOL_SIZE):
+        self.cls = cls
+        self.size = size
+        # allocation counters; approximate when threads share the pool
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self._free = []
+        self._defaults = dict(cls._get_defaults())
+        cloned, copied = cls._get_prototype()
+        self._cloned = tuple((name, value, skipped) for name, _, _, value, _, skipped in cloned)
+        self._copied = tuple(name for name, _ in copied)
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, **fields) -> 'PayloadSequence':
+        try:
+            payload = self._free.pop()
+        except IndexError:
+            payload = self.cls()
+            payload._own = {name: payload.__dict__[name] for name, _, _ in self._cloned}
+            payload._pool = self
+            self.created += 1
+        else:
+            self.reused += 1
+        defaults = self._defaults
+        for name, value in fields.items():
+            default = defaults.get(name)
+            if default is not None and type(value) is not type(default):
+                _check_field(self.cls, name, value, default)
+        payload.__dict__.update(fields)
+        payload._acquired = fields
+        return payload
+
+    def release(self, payload: 'PayloadSequence', given: dict):
+        """Reset `payload`, acquired with the `given` fields, for reuse."""
+        if len(self._free) >= self.size:
+            self.discarded += 1
+            return
+        own = payload._own
+        fields = payload.__dict__
+        fields.update(own)
+        for name, value, skipped in self._cloned:
+            field = own[name]
+            field._value = value
+            field._skipped = skipped
+        for name in self._copied:
+            fields.pop(name, None)
+        self._free.append(payload)
+
+    def statistics(self) -> dict[str, int]:
+        return {'created': self.created, 'reused': self.reused, 'discarded': self.discarded}
+
+
+POOLS: dict[type, PayloadPool] = {}
+
+
+def payload_pool(cls: type['PayloadSequence']) -> PayloadPool:
+    """The pool of `cls`, created on first use."""
+    pool = POOLS.get(cls)
+    if pool is None:
+        pool = POOLS.setdefault(cls, PayloadPool(cls, POOL_SIZE))
+    return pool
+
+
 class GreedyU8Array(Payload):
+    __slots__ = ('__value',)
+
     def __init__(self,
                  value: bytearray = bytearray(),
                  is_optional: bool = False):
         self.set_value(value)
         super().__init__(is_optional)
 
+    def __copy__(self):
+        clone = super().__copy__()
+        clone.__value = bytearray(self.__value)
+        return clone
+
     def get_size(self):
         return len(self.__value)
 
@@ -379,19 +1047,132 @@ class GreedyU8Array(Payload):
     def set_value(self, value: bytearray):
         self.__value = bytearray(value)
 
-    def __next__(self):
-        if self._offset < len(self.__value):
-            next = self.__value[self._offset]
-            self._offset += 1
-            return next
-        else:
-            raise StopIteration
+    def _serialize(self) -> bytes:
+        return bytes(self.__value)
 
     def _deserialize(self, iterator: Iterator[int]):
-        value = []
-        while True:
-            try:
-                value.append(next(iterator))
-            except StopIteration:
-                break
-        self.set_value(bytearray(value))
+        self.set_value(bytearray(iterator))
+
+    def decode_from(self, buffer, offset: int = 0) -> int:
+        self.set_value(buffer[offset:])
+        self.include()
+        return len(buffer)
+
+    def _struct_format(self) -> str:
+        return f'{len(self.__value)}s'
+
+    def _struct_is_variable(self) -> bool:
+        return True
+
+    def _struct_values(self) -> tuple:
+        return (self.__value,)
+
+    def _struct_load(self, values: tuple):
+        self.set_value(values[0])
+
+
+class RepeatedGroup(Payload):
+    """Between `min_count` and `max_count` repetitions of an element.
+
+    The element is a PayloadSequence class of fields struct passes as is
+    (no `U24` or strings); its defaults make the default repetitions.
+    Repetitions are value tuples in the field order of the element, so a
+    group is read and filled as a list instead of one field per slot, and
+    packed with one struct format per count. Decoding takes as many whole
+    repetitions as the data holds, up to `max_count`.
+    """
+    __slots__ = ('_element', '_min_count', '_max_count', '_items')
+
+    def __init__(self,
+                 element: type[PayloadSequence],
+                 min_count: int = 0,
+                 max_count: int | None = None,
+                 items: list[tuple] | None = None,
+                 is_optional: bool = False):
+        self._element = _element_struct(element)
+        self._min_count = min_count
+        self._max_count = min_count if max_count is None else max_count
+        if items is None:
+            items = [_element_defaults(element)] * min_count
+        self.set_value(items)
+        super().__init__(is_optional)
+
+    def __copy__(self):
+        clone = super().__copy__()
+        clone._element = self._element
+        clone._min_count = self._min_count
+        clone._max_count = self._max_count
+        clone._items = list(self._items)
+        return clone
+
+    def get_size(self):
+        return len(self._items) * self._element.size
+
+    def get_count(self) -> int:
+        return len(self._items)
+
+    def get_value(self) -> list[tuple]:
+        return list(self._items)
+
+    def set_value(self, items: list[tuple]):
+        if not self._min_count <= len(items) <= self._max_count:
+            raise ValueError(f'{len(items)} repetitions, expected '
+                             f'{self._min_count} to {self._max_count}')
+        self._items = list(items)
+
+    def _serialize(self) -> bytes:
+        return struct.pack(BYTE_ORDER + self._struct_format(), *self._struct_values())
+
+    def _deserialize(self, iterator: Iterator[int]):
+        data = bytes(islice(iterator, self._max_count * self._element.size))
+        if len(data) < self._min_count * self._element.size:
+            raise StopIteration
+        self._struct_load((data,))
+
+    def decode_from(self, buffer, offset: int = 0) -> int | None:
+        count = min((len(buffer) - offset) // self._element.size, self._max_count)
+        if count < self._min_count:
+            return None
+        end = offset + count * self._element.size
+        self._items = list(self._element.iter_unpack(buffer[offset:end]))
+        self.include()
+        return end
+
+    def _struct_format(self) -> str:
+        return self._element.format[1:] * len(self._items)
+
+    def _struct_is_variable(self) -> bool:
+        return True
+
+    def _struct_min_size(self) -> int:
+        return self._min_count * self._element.size
+
+    def _struct_fit(self, available: int) -> int:
+        return min(available // self._element.size, self._max_count) * self._element.size
+
+    def _struct_values(self) -> tuple:
+        return tuple(chain.from_iterable(self._items))
+
+    def _struct_load(self, values: tuple):
+        data = values[0]
+        count = min(len(data) // self._element.size, self._max_count)
+        self._items = list(self._element.iter_unpack(data[:count * self._element.size]))
+
+
+_element_structs = {}
+
+
+def _element_struct(element: type[PayloadSequence]) -> struct.Struct:
+    """struct of one repetition of `element`, shared by its groups."""
+    compiled = _element_structs.get(element)
+    if compiled is None:
+        fields = [default for _, default in element._get_defaults()]
+        if not all(field._struct_is_scalar() for field in fields):
+            raise TypeError(f'{element.__name__} has fields struct cannot pass as is')
+        compiled = _element_structs[element] = struct.Struct(
+            BYTE_ORDER + ''.join(field._struct_format() for field in fields))
+    return compiled
+
+
+def _element_defaults(element: type[PayloadSequence]) -> tuple:
+    return tuple(default._value for _, default in element._get_defaults())
@@ -0,0 +1,147 @@
+import math
+import sys
+
+from .devices import DeviceVariable, HartDevice
+from .payloads import F32, U8, U16, U24, Ascii, PackedAscii
+from .templates import DeviceTemplate
+
+
+def create_device_3051() -> HartDevice:
+    return HartDevice(
+        device_variables={
+            0: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), F32(250), F32(0), U8(65), U8(192)),
+            1: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), F32(100), F32(-100), U8(0), U8(192)),
+            2: DeviceVariable(U8(244), U8(244), F32(45.67), F32(sys.float_info.min), F32(sys.float_info.max), F32(200), F32(0), U8(0), U8(192)),
+            3: DeviceVariable(U8(242), U8(242), F32(4567.8), F32(sys.float_info.min), F32(sys.float_info.max), F32(300), F32(0), U8(0), U8(192)),
+            4: DeviceVariable(U8(45), U8(45), F32(5.6789), F32(sys.float_info.min), F32(sys.float_info.max), F32(400), F32(0), U8(0), U8(192)),
+            5: DeviceVariable(U8(41), U8(41), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(500), F32(0), U8(0), U8(192)),
+            6: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(600), F32(0), U8(0), U8(192)),
+            7: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(700), F32(0), U8(0), U8(192)),
+            8: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(800), F32(0), U8(0), U8(192)),
+            9: DeviceVariable(U8(244), U8(244), F32(67.890), F32(sys.float_info.min), F32(sys.float_info.max), F32(900), F32(0), U8(0), U8(192)),
+            244: DeviceVariable(U8(57), U8(57), F32(56.7890), F32(sys.float_info.min), F32(sys.float_info.max), F32(1000), F32(0), U8(0), U8(192)),
+            245: DeviceVariable(U8(39), U8(39), F32(4.5678), F32(sys.float_info.min), F32(sys.float_info.max), F32(1100), F32(0), U8(0), U8(192)),
+            246: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), F32(1200), F32(0), U8(65), U8(192)),
+            247: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), F32(1300), F32(0), U8(0), U8(192)),
+            248: DeviceVariable(U8(241), U8(241), F32(345.67), F32(sys.float_info.min), F32(sys.float_info.max), F32(1400), F32(0), U8(0), U8(192)),
+            249: DeviceVariable(U8(244), U8(244), F32(4567.8), F32(sys.float_info.min), F32(sys.float_info.max), F32(1500), F32(0), U8(0), U8(192)),
+        },
+        dynamic_variables={
+            0: 0,
+            1: 1,
+            2: 2,
+            3: 3,
+        },
+        polling_address=U8(0),
+        # long_address=0x3FFFFFFFFF & 0x268F123456,
+        # expanded_device_type=U16(0x268F),
+        long_address=0x3FFFFFFFFF & 0x9972123456,
+        expanded_device_type=U16(0x9972),
+        device_id=U24(0x123456),
+        hart_tag=PackedAscii(8, "M150 r7"),
+        hart_long_tag=Ascii(32, "This is M150 rev 7              "),
+        device_status=U8(0x00))
+
+
+def create_device_150() -> HartDevice:
+    return HartDevice(
+        device_variables={
+            0: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(65), status=U8(192)),
+            1: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            2: DeviceVariable(U8(240), U8(240), F32(5.6789), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            244: DeviceVariable(U8(57), U8(57), F32(56.7890), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            245: DeviceVariable(U8(39), U8(39), F32(4.5678), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            246: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(65), status=U8(192)),
+            247: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            248: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            249: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(192)),
+            254: DeviceVariable(U8(250), U8(250), F32(float("nan")), F32(sys.float_info.min), F32(sys.float_info.max), classification=U8(0), status=U8(30)),
+        },
+        dynamic_variables={
+            0: 0,
+            1: 1,
+            2: 1,
+            3: 1,
+        },
+        universal_revision=U8(5),
+        polling_address=U8(1),
+        long_address=0x3FFFFFFFFF & 0x2606789ABC,
+        expanded_device_type=U16(0x2606),
+        device_id=U24(0x789ABC),
+        hart_tag=PackedAscii(8, "3051 r9"),
+        hart_long_tag=Ascii(32, "This is 3051 rev 9        "))
+
+
+def create_device_f9f5() -> HartDevice:
+    # Waveform-данные
+    lin_x = [4.0 + i * (16.0 / 9.0) for i in range(10)]
+    lin_y = [i * (100.0 / 9.0) for i in range(10)]
+    kp_idx = [0, 2, 4, 6, 9]
+    kp_x = [lin_x[i] for i in kp_idx]
+    kp_y = [lin_y[i] for i in kp_idx]
+    sen_x = list(lin_x)
+    sen_y = [100.0 * ((x - 4.0) / 16.0) ** 2 for x in sen_x]
+    yt = [50.0 + 40.0 * math.sin(i * 0.5) for i in range(20)]
+    ro_yt = [50.0 + 30.0 * math.cos(i * 0.5) for i in range(20)]
+
+    return HartDevice(
+        device_variables={
+            0: DeviceVariable(U8(12), U8(12), F32(1.2345), F32(sys.float_info.min), F32(sys.float_info.max), F32(250), F32(0), U8(65), U8(192)),
+            1: DeviceVariable(U8(32), U8(32), F32(23.456), F32(sys.float_info.min), F32(sys.float_info.max), F32(100), F32(-100), U8(0), U8(192)),
+        },
+        dynamic_variables={
+            0: 0,
+            1: 1,
+            2: 0,
+            3: 1,
+        },
+        manufacturer_code=U16(0x00F9),
+        device_revision=U8(3),
+        private_label_distributor=U16(0x00F9),
+        polling_address=U8(2),
+        long_address=0x3FFFFFFFFF & 0xF9F5ABCDEF,
+        expanded_device_type=U16(0xF9F5),
+        device_id=U24(0xABCDEF),
+        hart_tag=PackedAscii(8, "SAMPLE7"),
+        hart_long_tag=Ascii(32, "Sample HART 7 DD device         "),
+        device_status=U8(0x00),
+        waveform_lin_x=lin_x,
+        waveform_lin_y=lin_y,
+        waveform_kp_x=kp_x,
+        waveform_kp_y=kp_y,
+        waveform_sen_x=sen_x,
+        waveform_sen_y=sen_y,
+        waveform_yt=yt,
+        waveform_ro_yt=ro_yt,
+        waveform_hi_alarm=90.0,
+        waveform_lo_alarm=10.0,
+        waveform_marker_1=8.0,
+        waveform_marker_2=16.0,
+        waveform_initialized=1.0)
+
+
+# device sets a simulated port can be populated with
+PROFILES = {
+    '3051': create_device_3051,
+    '150': create_device_150,
+    'f9f5': create_device_f9f5,
+}
+
+
+# templates of the profiles, built on first use
+TEMPLATES: dict[str, DeviceTemplate] = {}
+
+
+def device_template(name: str) -> DeviceTemplate:
+    """Template of profile `name`, for many devices differing in a few fields."""
+    template = TEMPLATES.get(name)
+    if template is None:
+        template = TEMPLATES[name] = DeviceTemplate(name, PROFILES[name])
+    return template
+
+
+def create_devices(names: list[str] | None = None) -> list[HartDevice]:
+    """New devices for the given profile names, all profiles by default."""
+    if names is None:
+        names = list(PROFILES)
+    return [PROFILES[name]() for name in names]
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .devices import HartDevice
+from .payloads import PayloadSequence
+
+
+@dataclass
+class CommandEntry:
+    number: int
+    handler: Callable[..., PayloadSequence]
+    request_class: type[PayloadSequence] | None = None
+    min_revision: int = 0
+    # replies that depend only on the device state may be served from the
+    # device reply cache; commands changing the state bump its version
+    cacheable: bool = True
+    writes: bool = False
+
+    def handle(self, device: HartDevice, data) -> PayloadSequence | None:
+        """Reply payload, None when `data` is too short for the request."""
+        if self.request_class is None:
+            return self.handler(device)
+        request = self.request_class()
+        if request.decode_from(data) is None:
+            return None
+        return self.handler(device, request)
+
+
+@dataclass
+class CommandRegistry:
+    """Command handlers indexed by (extended) command number.
+
+    Entries registered for an expanded device type take precedence over the
+    common ones for devices of that type.
+    """
+    entries: dict[int, CommandEntry] = field(default_factory=dict)
+    overrides: dict[int, dict[int, CommandEntry]] = field(default_factory=dict)
+
+    def register(self,
+                 number: int,
+                 request_class: type[PayloadSequence] | None = None,
+                 min_revision: int = 0,
+                 device_type: int | None = None,
+                 cacheable: bool = True,
+                 writes: bool = False):
+        """Decorator registering a Reply class or a handler function.
+
+        A Reply class is handled by its `create()` classmethod. Handlers
+        take the device and, when `request_class` is given, the decoded
+        request. Commands that `writes` the device state are never cached.
+        """
+        def decorator(target):
+            handler = target.create if isinstance(target, type) else target
+            entry = CommandEntry(number, handler, request_class, min_revision,
+                                 cacheable and not writes, writes)
+            if device_type is None:
+                self.entries[number] = entry
+            else:
+                self.overrides.setdefault(device_type, {})[number] = entry
+            return target
+        return decorator
+
+    def lookup(self, device: HartDevice, number: int) -> CommandEntry | None:
+        """Entry serving `number` for `device`, None when not supported."""
+        entry = None
+        if self.overrides:
+            overrides = self.overrides.get(device.expanded_device_type.get_value())
+            if overrides is not None:
+                entry = overrides.get(number)
+        if entry is None:
+            entry = self.entries.get(number)
+        if entry is not None\
+                and device.universal_revision.get_value() < entry.min_revision:
+            return None
+        return entry
+
+    def supported_commands(self, device: HartDevice | None = None) -> list[int]:
+        """Sorted command numbers, limited to those `device` answers."""
+        if device is None:
+            return sorted(self.entries)
+        numbers = set(self.entries)
+        numbers.update(self.overrides.get(device.expanded_device_type.get_value(), ()))
+        return sorted(number for number in numbers
+                      if self.lookup(device, number) is not None)
@@ -0,0 +1,181 @@
+"""Simulated readings as functions of the clock time.
+
+Every `DeviceVariable` follows a `Signal`: `value(now)` gives its reading at
+`now` seconds. Periodic signals repeat every `period` seconds between `low`
+and `high`, shifted by `delay` seconds, and compute their constants once.
+`Noise` draws its values in batches from a seeded generator and `Trace`
+plays back a recorded curve, e.g. from a CSV file. Signals add up with `+`.
+"""
+import csv
+import math
+import random
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Sequence
+
+from .payloads import numpy
+
+NOISE_BATCH = 1024
+
+
+class Signal(ABC):
+    """Reading of a variable as a function of the clock time.
+
+    Every variable has its own signal, so subclasses use `__slots__`.
+    """
+    __slots__ = ()
+
+    @abstractmethod
+    def value(self, now: float) -> float:
+        pass
+
+    def __add__(self, other: 'Signal') -> 'Signal':
+        return Sum(self, other)
+
+
+class Periodic(Signal):
+    __slots__ = ('low', 'high', 'period', 'delay')
+
+    def __init__(self, low: float, high: float, period: float, delay: float = 0.0):
+        self.low = low
+        self.high = high
+        self.period = period
+        self.delay = delay
+
+    def position(self, now: float) -> float:
+        """Fraction of the period elapsed at `now`."""
+        return (now - self.delay) / self.period % 1.0
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.low}, {self.high}, {self.period}, {self.delay})'
+
+
+class Sine(Periodic):
+    __slots__ = ('omega', 'span')
+
+    def __init__(self, low: float, high: float, period: float, delay: float = 0.0):
+        super().__init__(low, high, period, delay)
+        # angular frequency and swing
+        self.omega = 2 * math.pi / period
+        self.span = high - low
+
+    def value(self, now: float) -> float:
+        return self.low + (1 + math.sin((now - self.delay) * self.omega)) / 2 * self.span
+
+
+class Ramp(Periodic):
+    """Rises from `low` to `high` over every period."""
+    __slots__ = ()
+
+    def value(self, now: float) -> float:
+        return self.low + self.position(now) * (self.high - self.low)
+
+
+class Square(Periodic):
+    """`high` for the first `duty` fraction of every period, then `low`."""
+    __slots__ = ('duty',)
+
+    def __init__(self, low: float, high: float, period: float, delay: float = 0.0,
+                 duty: float = 0.5):
+        super().__init__(low, high, period, delay)
+        self.duty = duty
+
+    def value(self, now: float) -> float:
+        return self.high if self.position(now) < self.duty else self.low
+
+
+class Step(Signal):
+    """Goes through `levels`, holding each for `duration` seconds."""
+    __slots__ = ('levels', 'duration')
+
+    def __init__(self, levels: Sequence[float], duration: float):
+        self.levels = list(levels)
+        self.duration = duration
+
+    def value(self, now: float) -> float:
+        return self.levels[int(now // self.duration) % len(self.levels)]
+
+
+class Noise(Signal):
+    """Normally distributed values of a seeded generator, one per read."""
+    __slots__ = ('mean', 'deviation', 'batch', '_generator', '_values')
+
+    def __init__(self, mean: float = 0.0, deviation: float = 1.0, seed: int = 0,
+                 batch: int = NOISE_BATCH):
+        self.mean = mean
+        self.deviation = deviation
+        self.batch = batch
+        if numpy is not None:
+            self._generator = numpy.random.default_rng(seed)
+        else:
+            self._generator = random.Random(seed)
+        self._values = []
+
+    def _draw(self) -> list[float]:
+        if numpy is not None:
+            return self._generator.normal(self.mean, self.deviation, self.batch).tolist()
+        gauss = self._generator.gauss
+        return [gauss(self.mean, self.deviation) for _ in range(self.batch)]
+
+    def value(self, now: float) -> float:
+        if not self._values:
+            self._values = self._draw()
+            self._values.reverse()
+        return self._values.pop()
+
+
+class Trace(Signal):
+    """Straight lines between recorded `(time, value)` points.
+
+    Times are seconds from the start of the trace. A repeated trace starts
+    over at its end, otherwise it stays at its last value.
+    """
+    __slots__ = ('times', 'values', 'repeat')
+
+    def __init__(self, times: Sequence[float], values: Sequence[float], repeat: bool = True):
+        if len(times) != len(values) or not times:
+            raise ValueError('a trace needs as many times as values, at least one')
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            raise ValueError('trace times must not decrease')
+        self.times = list(times)
+        self.values = list(values)
+        self.repeat = repeat
+
+    @classmethod
+    def from_csv(cls, path: str, repeat: bool = True) -> 'Trace':
+        """Trace of the `time,value` rows of a CSV file; other rows are skipped."""
+        times, values = [], []
+        with open(path, newline='') as file:
+            for row in csv.reader(file):
+                try:
+                    time, value = float(row[0]), float(row[1])
+                except (IndexError, ValueError):
+                    continue
+                times.append(time)
+                values.append(value)
+        return cls(times, values, repeat)
+
+    def value(self, now: float) -> float:
+        times = self.times
+        start, end = times[0], times[-1]
+        if self.repeat and end > start:
+            now = start + (now - start) % (end - start)
+        index = bisect_right(times, now)
+        if index == 0:
+            return self.values[0]
+        if index == len(times):
+            return self.values[-1]
+        earlier, later = times[index - 1], times[index]
+        fraction = (now - earlier) / (later - earlier)
+        start_value = self.values[index - 1]
+        return start_value + (self.values[index] - start_value) * fraction
+
+
+class Sum(Signal):
+    __slots__ = ('signals',)
+
+    def __init__(self, *signals: Signal):
+        self.signals = signals
+
+    def value(self, now: float) -> float:
+        return sum(signal.value(now) for signal in self.signals)
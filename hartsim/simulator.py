@@ -0,0 +1,65 @@
+from .commands import handle_request
+from .devices import HartDevice
+from .framingutils import MAX_FRAME_SIZE, FrameType, HartFrameView, reply_header
+
+REPLY_PREAMBLES = 3
+
+
+class DeviceSimulator:
+    """Routes request frames to devices and encodes their replies.
+
+    Frames are matched by polling address (short frames) or unique address
+    (long frames). `handle()` is a transport handler: it returns the reply
+    with preambles as a view into a buffer reused for every reply.
+    """
+
+    def __init__(self,
+                 devices: list[HartDevice],
+                 name: str = '',
+                 verbose: bool = True):
+        self.name = name
+        self.verbose = verbose
+        self.poll_map = {
+            device.polling_address.get_value(): device for device in devices}
+        self.unique_map = {device.long_address: device for device in devices}
+        if len(self.poll_map) != len(devices) or len(self.unique_map) != len(devices):
+            raise ValueError('devices on one port need distinct polling and unique addresses')
+        self.reply_buffer = bytearray(MAX_FRAME_SIZE)
+        self.reply_view = memoryview(self.reply_buffer)
+
+    def find_device(self, request: HartFrameView) -> tuple[HartDevice | None, str | None]:
+        """Addressed device, or None with the reason it does not match."""
+        if request.is_long_address:
+            device = self.unique_map.get(request.long_address)
+            if device is None:
+                return None, f'Long address 0x{request.long_address:010X} does not match'
+        else:
+            device = self.poll_map.get(request.short_address)
+            if device is None:
+                return None, f'Polling address {request.short_address} does not match'
+        return device, None
+
+    def handle(self, request: HartFrameView) -> memoryview | None:
+        if self.verbose:
+            print(f'{self.name}    <= {request}')
+        device, status = self.find_device(request)
+        if device is None:
+            if self.verbose:
+                print(f'{self.name} => None ({status})')
+            return None
+
+        payload = handle_request(device, request.command_number, request.data)
+        header = reply_header(FrameType.ACK,
+                              request.is_long_address,
+                              device.long_address
+                              if request.is_long_address
+                              else device.polling_address.get_value(),
+                              request.is_primary_master,
+                              device.is_burst_mode,
+                              REPLY_PREAMBLES)
+        reply_size = header.encode_into(
+            self.reply_buffer, request.command_number, payload)
+        if self.verbose:
+            reply = HartFrameView(self.reply_view[REPLY_PREAMBLES:reply_size])
+            print(f'{self.name} #{device.polling_address.get_value()} => {reply}')
+        return self.reply_view[:reply_size]
@@ -0,0 +1,114 @@
+"""Tank volumes from levels.
+
+`volumeSetupTankWriteType` (Cmd158) selects how a device turns its level
+into a volume: a vertical or horizontal cylinder or a sphere computed from
+`volumeSetupTankWriteLength` and `volumeSetupTankWriteRadius`, or the
+strapping table written with Cmd159.
+
+A `StrappingTable` keeps its points in table order, the order strapping
+tables list levels in. Levels are found by binary search and volumes
+interpolated linearly between the neighbouring points; levels beyond the
+ends take the end volumes. Writing a point set updates the points in
+place, and only when levels stop increasing are the points sorted, once,
+on the next lookup.
+"""
+import math
+from bisect import bisect_right
+from typing import Sequence
+
+from .payloads import numpy
+
+TANK_VERTICAL_CYLINDER = 1
+TANK_HORIZONTAL_CYLINDER = 2
+TANK_SPHERE = 3
+TANK_STRAPPING_TABLE = 5
+# strapping points a table takes at least
+MIN_STRAPPING_POINTS = 2
+
+
+def vertical_cylinder_volume(level: float, length: float, radius: float) -> float:
+    """Volume up to `level` of an upright cylinder `length` high."""
+    return math.pi * radius * radius * min(max(level, 0.0), length)
+
+
+def horizontal_cylinder_volume(level: float, length: float, radius: float) -> float:
+    """Volume up to `level` of a lying cylinder `length` long."""
+    level = min(max(level, 0.0), 2 * radius)
+    depth = radius - level
+    segment = radius * radius * math.acos(depth / radius) - depth * math.sqrt(2 * radius * level - level * level)
+    return length * segment
+
+
+def sphere_volume(level: float, length: float, radius: float) -> float:
+    """Volume up to `level` of a sphere; `length` is not used."""
+    level = min(max(level, 0.0), 2 * radius)
+    return math.pi * level * level * (3 * radius - level) / 3
+
+
+TANK_FORMULAS = {
+    TANK_VERTICAL_CYLINDER: vertical_cylinder_volume,
+    TANK_HORIZONTAL_CYLINDER: horizontal_cylinder_volume,
+    TANK_SPHERE: sphere_volume,
+}
+
+
+class StrappingTable:
+    """Volumes of levels interpolated between strapping points."""
+    __slots__ = ('levels', 'volumes', '_descents', '_sorted')
+
+    def __init__(self, levels: Sequence[float], volumes: Sequence[float]):
+        if len(levels) != len(volumes) or len(levels) < MIN_STRAPPING_POINTS:
+            raise ValueError(f'a strapping table needs as many levels as volumes, '
+                             f'at least {MIN_STRAPPING_POINTS}')
+        self.levels = [float(level) for level in levels]
+        self.volumes = [float(volume) for volume in volumes]
+        # neighbouring points whose level decreases
+        self._descents = sum(1 for index in range(len(self.levels) - 1) if self._descends(index))
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.levels)
+
+    def _descends(self, index: int) -> bool:
+        return self.levels[index] > self.levels[index + 1]
+
+    def write(self, first: int, levels: Sequence[float], volumes: Sequence[float]):
+        """Replace the points from `first` on, ignoring those past the end."""
+        stop = min(first + len(levels), len(self.levels))
+        if first >= stop:
+            return
+        pairs = range(max(first - 1, 0), min(stop, len(self.levels) - 1))
+        self._descents -= sum(1 for index in pairs if self._descends(index))
+        for index in range(first, stop):
+            self.levels[index] = float(levels[index - first])
+            self.volumes[index] = float(volumes[index - first])
+        self._descents += sum(1 for index in pairs if self._descends(index))
+        self._sorted = None
+
+    def _points(self) -> tuple[list[float], list[float]]:
+        """Levels and volumes ordered by level."""
+        if not self._descents:
+            return self.levels, self.volumes
+        if self._sorted is None:
+            order = sorted(range(len(self.levels)), key=self.levels.__getitem__)
+            self._sorted = ([self.levels[index] for index in order],
+                            [self.volumes[index] for index in order])
+        return self._sorted
+
+    def volume(self, level: float) -> float:
+        levels, volumes = self._points()
+        index = bisect_right(levels, level)
+        if index == 0:
+            return volumes[0]
+        if index == len(levels):
+            return volumes[-1]
+        below, above = levels[index - 1], levels[index]
+        start = volumes[index - 1]
+        return start + (volumes[index] - start) * (level - below) / (above - below)
+
+    def volumes_of(self, levels):
+        """Volumes of many levels, an ndarray with NumPy."""
+        if numpy is not None:
+            points, volumes = self._points()
+            return numpy.interp(levels, points, volumes)
+        return [self.volume(level) for level in levels]
@@ -0,0 +1,377 @@
+"""Devices stored as their differences from a template.
+
+A `DeviceTemplate` holds the configuration of one device built by a
+profile once. `template.instantiate(**fields)` makes a `TemplateDevice`
+that keeps only the fields it was given or that commands changed, in a
+dict falling back to the template:
+
+- numeric payloads read as `ColumnView`s of that dict, so `set_value()`
+  stores an override and reads of untouched fields cost no memory;
+- plain values are replaced by assignment and read from the template
+  until then;
+- float tables and other lists read as `TableView`s that copy the
+  template table on the first write;
+- other payloads (tags, messages) read as `PayloadView`s and dictionaries
+  as `DictView`s, copied into the instance on the first change.
+
+Device variables are stored the same way, keyed by `(code, name)`.
+Template devices keep their own state and cannot be passed to a
+`VariableEngine`.
+"""
+from collections.abc import Mapping, MutableMapping
+from copy import copy
+from dataclasses import fields
+from functools import cache
+from typing import Callable, Iterator
+
+from .cache import ReplyCache
+from .devices import F32_TABLES, UNVERSIONED_ATTRIBUTES, DeviceVariable, HartDevice
+from .payloads import COLUMN_VIEWS, Payload
+
+# fields a TemplateDevice keeps in attributes of its own
+DEVICE_OBJECTS = frozenset({'device_variables', 'reply_cache', 'variable_engine'})
+
+
+class Overrides(dict):
+    """Changed fields of an instance; missing keys read the template."""
+    __slots__ = ('_base',)
+
+    def __init__(self, base: dict):
+        super().__init__()
+        self._base = base
+
+    def __missing__(self, key):
+        return self._base[key]
+
+
+class TableView:
+    """Float table or list of a template device, copied on the first write."""
+    __slots__ = ('_overrides', '_name')
+
+    def __init__(self, overrides: Overrides, name: str):
+        self._overrides = overrides
+        self._name = name
+
+    def _table(self):
+        return self._overrides[self._name]
+
+    def __getitem__(self, index):
+        return self._table()[index]
+
+    def __setitem__(self, index, value):
+        overrides = self._overrides
+        if self._name not in overrides:
+            overrides[self._name] = copy(overrides[self._name])
+        overrides[self._name][index] = value
+
+    def __len__(self):
+        return len(self._table())
+
+    def __iter__(self):
+        return iter(self._table())
+
+    def __array__(self, dtype=None, copy=None):
+        return self._table().__array__(dtype)
+
+
+class DictView(MutableMapping):
+    """Dictionary of a template device, copied on the first change."""
+    __slots__ = ('_overrides', '_key')
+
+    def __init__(self, overrides: Overrides, key):
+        self._overrides = overrides
+        self._key = key
+
+    def _dict(self) -> dict:
+        return self._overrides[self._key]
+
+    def _own(self) -> dict:
+        overrides = self._overrides
+        if self._key not in overrides:
+            overrides[self._key] = dict(overrides[self._key])
+        return overrides[self._key]
+
+    def __getitem__(self, key):
+        return self._dict()[key]
+
+    def __setitem__(self, key, value):
+        self._own()[key] = value
+
+    def __delitem__(self, key):
+        del self._own()[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._dict()
+
+    def __iter__(self):
+        return iter(self._dict())
+
+    def __len__(self):
+        return len(self._dict())
+
+    def __repr__(self):
+        return f'DictView({self._dict()!r})'
+
+
+class PayloadView:
+    """Mixin making a payload of a template device read the payload stored
+    under `key`, the template one until the first write copies it into the
+    instance.
+
+    Precedes the payload class in the bases, as `ColumnView` does; the slots
+    of the payload class are properties of the stored payload, so every
+    method of the payload class works on it. Copies are plain `_primitive`
+    payloads. See `payload_view()`.
+    """
+    __slots__ = ()
+    # payload class of the view and its copies
+    _primitive: type[Payload]
+
+    def _payload(self) -> Payload:
+        return self._overrides[self._key]
+
+    def _own(self) -> Payload:
+        overrides = self._overrides
+        if self._key not in overrides:
+            overrides[self._key] = copy(overrides[self._key])
+        return overrides[self._key]
+
+    def __copy__(self):
+        return copy(self._payload())
+
+    # the stored payload answers reads in one call
+    def get_value(self):
+        return self._payload().get_value()
+
+    def _serialize(self) -> bytes:
+        return self._payload()._serialize()
+
+    def _struct_format(self) -> str:
+        return self._payload()._struct_format()
+
+    def _struct_values(self) -> tuple:
+        return self._payload()._struct_values()
+
+    def set_value(self, value):
+        self._own().set_value(value)
+
+
+def _slot_names(cls: type) -> list[str]:
+    """Attributes of the `__slots__` of `cls` and its bases, as mangled."""
+    names = []
+    for base in cls.__mro__:
+        for name in base.__dict__.get('__slots__', ()):
+            if name.startswith('__') and not name.endswith('__'):
+                name = f'_{base.__name__.lstrip("_")}{name}'
+            names.append(name)
+    return names
+
+
+def _slot_property(name: str) -> property:
+    def get(self):
+        return getattr(self._payload(), name)
+
+    def set(self, value):
+        setattr(self._own(), name, value)
+
+    return property(get, set)
+
+
+@cache
+def payload_view(cls: type[Payload]) -> type[PayloadView]:
+    """`PayloadView` subclass of payload class `cls`."""
+    return type(f'{cls.__name__}View', (PayloadView, cls), {
+        '__slots__': ('_overrides', '_key'),
+        '_primitive': cls,
+        **{name: _slot_property(name) for name in _slot_names(cls)}})
+
+
+def _field_property(name, kind, versioned: bool) -> property:
+    """Property of field `name`, of a device or, with `name` a field name,
+    of a variable keyed by `(code, name)`."""
+    def key(self):
+        return name if self._code is None else (self._code, name)
+
+    new = object.__new__
+    if kind in VIEW_CLASSES:
+        def get(self):
+            view = new(kind)
+            view._column = self._overrides
+            view._index = key(self)
+            view._optional = False
+            view._skipped = False
+            return view
+    elif kind is TableView or kind is DictView:
+        def get(self):
+            return kind(self._overrides, key(self))
+    elif kind is not None and issubclass(kind, PayloadView):
+        def get(self):
+            overrides = self._overrides
+            field_key = key(self)
+            if field_key in overrides:
+                return overrides[field_key]
+            view = new(kind)
+            view._overrides = overrides
+            view._key = field_key
+            return view
+    else:
+        def get(self):
+            return self._overrides[key(self)]
+
+    def set(self, value):
+        if kind in VIEW_CLASSES:
+            value = value.get_value()
+        overrides = self._overrides
+        overrides[key(self)] = value
+        if versioned:
+            overrides['state_version'] += 1
+
+    return property(get, set)
+
+
+VIEW_CLASSES = frozenset(COLUMN_VIEWS.values())
+
+
+def _kind(name: str, value):
+    """How a template field value is read, see `_field_property()`."""
+    if type(value) in COLUMN_VIEWS:
+        return COLUMN_VIEWS[type(value)]
+    if name in F32_TABLES or isinstance(value, list):
+        return TableView
+    if isinstance(value, dict):
+        return DictView
+    if isinstance(value, Payload):
+        return payload_view(type(value))
+    return None
+
+
+def _template_value(kind, value):
+    return value.get_value() if kind in VIEW_CLASSES else value
+
+
+class TemplateVariable:
+    """`DeviceVariable` `code` of a template device.
+
+    Every template subclasses it with properties of the variable fields.
+    """
+    __slots__ = ('_overrides', '_code')
+
+    def __init__(self, overrides: Overrides, code: int):
+        self._overrides = overrides
+        self._code = code
+
+
+class TemplateVariables(Mapping):
+    """Device variables of a template device by code."""
+    __slots__ = ('_variable', '_overrides', '_codes')
+
+    def __init__(self, variable: type[TemplateVariable], overrides: Overrides, codes: dict[int, None]):
+        self._variable = variable
+        self._overrides = overrides
+        self._codes = codes
+
+    def __getitem__(self, code: int) -> TemplateVariable:
+        if code not in self._codes:
+            raise KeyError(code)
+        return self._variable(self._overrides, code)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._codes)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __contains__(self, code) -> bool:
+        return code in self._codes
+
+
+class TemplateDevice:
+    """`HartDevice` made from a `DeviceTemplate`.
+
+    Every template subclasses it with properties of the device fields.
+    Takes the methods of `HartDevice`, which only use device fields.
+    """
+    __slots__ = ('template', '_overrides', '_reply_cache')
+    # device fields are not keyed by variable code
+    _code = None
+
+    update_variables = HartDevice.update_variables
+    reading = HartDevice.reading
+    tank_volume = HartDevice.tank_volume
+    strapping_table = HartDevice.strapping_table
+    write_strapping_points = HartDevice.write_strapping_points
+    update_loop_current = HartDevice.update_loop_current
+    dynamic_variable_codes = HartDevice.dynamic_variable_codes
+    simulate_variable = HartDevice.simulate_variable
+    release_variable = HartDevice.release_variable
+    touch = HartDevice.touch
+
+    def __init__(self, template: 'DeviceTemplate'):
+        self.template = template
+        self._overrides = Overrides(template.values)
+        self._reply_cache = None
+
+    @property
+    def overrides(self) -> dict:
+        """Fields stored by this device, variable fields keyed by `(code, name)`."""
+        return self._overrides
+
+    @property
+    def device_variables(self) -> TemplateVariables:
+        template = self.template
+        return TemplateVariables(template.variable_class, self._overrides, template.codes)
+
+    @property
+    def reply_cache(self) -> ReplyCache:
+        if self._reply_cache is None:
+            self._reply_cache = ReplyCache()
+        return self._reply_cache
+
+    @property
+    def variable_engine(self) -> None:
+        return None
+
+    def __repr__(self):
+        return f'TemplateDevice({self.template.name!r}, long_address=0x{self.long_address:010X})'
+
+
+class DeviceTemplate:
+    """Configuration of the device `factory` builds, shared by instances."""
+
+    def __init__(self, name: str, factory: Callable[[], HartDevice]):
+        self.name = name
+        device = factory()
+        self.values = {}
+        properties = {}
+        for item in fields(HartDevice):
+            if item.name in DEVICE_OBJECTS:
+                continue
+            value = getattr(device, item.name)
+            kind = _kind(item.name, value)
+            self.values[item.name] = _template_value(kind, value)
+            properties[item.name] = _field_property(
+                item.name, kind, item.name not in UNVERSIONED_ATTRIBUTES)
+        self.values['state_version'] = 0
+
+        self.codes = dict.fromkeys(device.device_variables)
+        variable_properties = {}
+        for code, variable in device.device_variables.items():
+            for item in fields(DeviceVariable):
+                value = getattr(variable, item.name)
+                kind = _kind(item.name, value)
+                self.values[(code, item.name)] = _template_value(kind, value)
+                variable_properties.setdefault(item.name, _field_property(item.name, kind, False))
+        self.device_class = type('TemplateDevice', (TemplateDevice,), {'__slots__': (), **properties})
+        self.variable_class = type('TemplateVariable', (TemplateVariable,),
+                                   {'__slots__': (), **variable_properties})
+
+    def instantiate(self, **fields) -> TemplateDevice:
+        """New device with `fields` changed, e.g. `long_address` or `hart_tag`."""
+        device = self.device_class(self)
+        overrides = device.overrides
+        for name, value in fields.items():
+            if not hasattr(self.device_class, name) or name in DEVICE_OBJECTS:
+                raise AttributeError(f'template devices have no field {name!r}')
+            setattr(device, name, value)
+        overrides.pop('state_version', None)
+        return device
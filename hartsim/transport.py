@@ -0,0 +1,173 @@
+import asyncio
+import sys
+from dataclasses import dataclass
+from typing import Callable
+
+import serial
+
+from .framingutils import HartFrameBuilder, HartFrameView
+
+# read timeout of the executor fallback, bounds how long close() waits
+POLL_TIMEOUT = 0.1
+
+# Returns the complete reply (preambles included) or None for no reply.
+# The reply is written before the next frame is handled, so it may point
+# into a buffer the handler reuses.
+Handler = Callable[[HartFrameView], bytes | memoryview | None]
+
+
+@dataclass
+class LinkStatistics:
+    bytes_received: int = 0
+    bytes_sent: int = 0
+    requests: int = 0
+    replies: int = 0
+    # requests the handler raised on
+    failures: int = 0
+
+    def __str__(self):
+        return (f'{self.requests} requests, {self.replies} replies, '
+                f'{self.failures} failures, '
+                f'{self.bytes_received} B in, {self.bytes_sent} B out')
+
+
+def open_serial(name: str, key_dtr: bool = True) -> serial.Serial:
+    """Open a HART serial port (1200 baud, 8O1) for non-blocking reads.
+
+    Pass `key_dtr=False` for ports without modem lines, such as PTYs.
+    """
+    port = serial.Serial(name,
+                         baudrate=1200,
+                         parity=serial.PARITY_ODD,
+                         bytesize=8,
+                         stopbits=1,
+                         timeout=0)
+    port.flush()
+    port.read_all()
+    if key_dtr:
+        port.dtr = False
+    return port
+
+
+class SerialLink:
+    """Serves a HART master on a serial port from an asyncio event loop.
+
+    The port is watched with `loop.add_reader()`, so requests are handled as
+    soon as they arrive and other tasks share the loop. Platforms without
+    reader support for serial handles (Windows) read in the default executor
+    instead.
+
+    With `key_dtr` the DTR line is raised while a reply is being sent, which
+    keys the transmitter of half duplex HART modems. It is released once the
+    reply is drained, without blocking the loop.
+
+    A request the handler raises on is reported and left without a reply;
+    the frames after it are still served.
+    """
+
+    def __init__(self,
+                 port: serial.Serial,
+                 handler: Handler,
+                 name: str | None = None,
+                 key_dtr: bool = True):
+        self.port = port
+        self.handler = handler
+        self.name = name if name is not None else port.port
+        self.key_dtr = key_dtr
+        self.frame_builder = HartFrameBuilder()
+        self.statistics = LinkStatistics()
+        self._loop = None
+        self._closed = None
+        self._sending = 0
+
+    async def serve(self):
+        """Handle requests until `close()` is called or the port fails."""
+        self._loop = asyncio.get_running_loop()
+        self._closed = self._loop.create_future()
+        if sys.platform == 'win32':
+            await self._serve_in_executor()
+            return
+
+        fd = self.port.fileno()
+        self._loop.add_reader(fd, self._on_readable)
+        try:
+            await self._closed
+        finally:
+            self._loop.remove_reader(fd)
+
+    def close(self, exception: Exception | None = None):
+        if self._closed is None or self._closed.done():
+            return
+        if exception is None:
+            self._closed.set_result(None)
+        else:
+            self._closed.set_exception(exception)
+
+    def feed(self, data: bytes):
+        statistics = self.statistics
+        statistics.bytes_received += len(data)
+        for frame in self.frame_builder.feed(data):
+            statistics.requests += 1
+            try:
+                reply = self.handler(frame)
+            except Exception as exception:
+                statistics.failures += 1
+                print(f'{self.name}: command {frame.command_number} failed: {exception!r}')
+                continue
+            if reply is not None:
+                statistics.replies += 1
+                statistics.bytes_sent += len(reply)
+                self.send(reply)
+
+    def send(self, reply: bytes | memoryview):
+        if not self.key_dtr:
+            self.port.write(reply)
+            return
+        self.port.dtr = True
+        self._sending += 1
+        self.port.write(reply)
+        drained = self._loop.run_in_executor(None, self.port.flush)
+        drained.add_done_callback(self._release_dtr)
+
+    def _release_dtr(self, _):
+        self._sending -= 1
+        if not self._sending:
+            self.port.dtr = False
+
+    def _on_readable(self):
+        try:
+            data = self.port.read(self.port.in_waiting or 1)
+            self.feed(data)
+        except OSError as exception:
+            # SerialException included, e.g. the other end of a PTY closed
+            self.close(exception)
+
+    async def _serve_in_executor(self):
+        self.port.timeout = POLL_TIMEOUT
+        while not self._closed.done():
+            reading = self._loop.run_in_executor(None, self._read_blocking)
+            await asyncio.wait([reading, self._closed],
+                               return_when=asyncio.FIRST_COMPLETED)
+            if reading.done():
+                self.feed(reading.result())
+        await self._closed
+
+    def _read_blocking(self) -> bytes:
+        data = self.port.read(1)
+        if data:
+            data += self.port.read(self.port.in_waiting)
+        return data
+
+
+async def serve_links(links: list[SerialLink]):
+    """Serve all links on the running loop until every one of them stops.
+
+    A failing port is reported and closed without stopping the others.
+    """
+    async def serve(link: SerialLink):
+        try:
+            await link.serve()
+        except OSError as exception:
+            print(f'{link.name}: {exception}')
+
+    await asyncio.gather(*(serve(link) for link in links))
@@ -0,0 +1,8 @@
+"""Frames shared by the transport tests."""
+from hartsim.framingutils import FrameType, HartFrame
+
+
+def request(command_number: int = 0, short_address: int = 0) -> bytes:
+    frame = HartFrame(FrameType.STX, command_number,
+                      short_address=short_address, is_primary_master=True)
+    return b'\xff' * 5 + bytes(frame.serialize())
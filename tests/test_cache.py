@@ -0,0 +1,124 @@
+import unittest
+
+from hartsim.cache import ReplyCache
+from hartsim.commands import handle_request
+from hartsim.devices import DeviceVariable, HartDevice
+from hartsim.payloads import F32, U8, U16
+
+
+def make_device() -> HartDevice:
+    return HartDevice(device_variables={0: DeviceVariable(U8(12), U8(12), F32(1.0))},
+                      dynamic_variables={0: 0, 1: 0, 2: 0, 3: 0},
+                      polling_address=U8(0),
+                      loop_current_mode=U8(1),
+                      device_status=U8(0),
+                      device_specific_status_0=U8(0x02),
+                      alternate_device_specific_status_0=U8(0),
+                      expanded_device_type=U16(0x2606),
+                      loop_current=F32(4.0),
+                      pv_selection=U8(0),
+                      sv_selection=U8(0),
+                      tv_selection=U8(0),
+                      qv_selection=U8(0))
+
+
+class TestReplyCache(unittest.TestCase):
+
+    def test_miss_then_hit(self):
+        target = ReplyCache()
+        self.assertIsNone(target.get(0, 13, b''))
+        target.put(0, 13, b'', b'\x00\x00')
+        self.assertEqual(target.get(0, 13, b''), b'\x00\x00')
+        self.assertEqual((target.hits, target.misses), (1, 1))
+
+    def test_request_data_is_part_of_key(self):
+        target = ReplyCache()
+        target.put(0, 54, b'\x00', b'\x01')
+        self.assertIsNone(target.get(0, 54, b'\x01'))
+
+    def test_new_version_drops_entries(self):
+        target = ReplyCache()
+        target.put(0, 13, b'', b'\x00\x00')
+        self.assertIsNone(target.get(1, 13, b''))
+        self.assertEqual(len(target), 0)
+        target.put(0, 13, b'', b'\x00\x00')
+        self.assertEqual(len(target), 0)
+
+    def test_full_cache_starts_over(self):
+        target = ReplyCache(max_entries=2)
+        target.put(0, 1, b'', b'1')
+        target.put(0, 2, b'', b'2')
+        target.put(0, 3, b'', b'3')
+        self.assertEqual(len(target), 1)
+        self.assertEqual(target.get(0, 3, b''), b'3')
+
+    def test_clear_resets_counters(self):
+        target = ReplyCache()
+        target.put(0, 13, b'', b'\x00\x00')
+        target.get(0, 13, b'')
+        target.clear()
+        self.assertEqual((len(target), target.hits, target.misses), (0, 0, 0))
+
+
+class TestReplyCaching(unittest.TestCase):
+
+    def test_state_command_is_served_from_cache(self):
+        device = make_device()
+        first = handle_request(device, 0, b'')
+        self.assertEqual(handle_request(device, 0, b''), first)
+        self.assertEqual((device.reply_cache.hits, device.reply_cache.misses), (1, 1))
+
+    def test_write_command_invalidates_cached_reply(self):
+        device = make_device()
+        self.assertEqual(handle_request(device, 50, b''), bytes([0, 0, 0, 0, 0, 0]))
+        handle_request(device, 51, bytes([1, 2, 3, 4]))
+        self.assertEqual(handle_request(device, 50, b''), bytes([0, 0, 1, 2, 3, 4]))
+        self.assertEqual(device.reply_cache.hits, 0)
+
+    def test_attribute_assignment_invalidates_cached_reply(self):
+        device = make_device()
+        handle_request(device, 7, b'')
+        version = device.state_version
+        device.loop_current_mode = U8(0)
+        self.assertGreater(device.state_version, version)
+        self.assertEqual(handle_request(device, 7, b''), bytes([0, 0, 0, 0]))
+        self.assertEqual(device.reply_cache.hits, 0)
+
+    def test_touch_invalidates_in_place_changes(self):
+        device = make_device()
+        handle_request(device, 7, b'')
+        device.polling_address.set_value(5)
+        device.touch()
+        self.assertEqual(handle_request(device, 7, b'')[2], 5)
+
+    def test_dynamic_command_is_not_cached(self):
+        device = make_device()
+        handle_request(device, 1, b'')
+        handle_request(device, 1, b'')
+        self.assertEqual(len(device.reply_cache), 0)
+        self.assertEqual(device.reply_cache.misses, 0)
+
+    def test_polls_keep_state_replies_cached(self):
+        device = make_device()
+        replies = [handle_request(device, 0, b''), handle_request(device, 13, b'')]
+        version = device.state_version
+        for _ in range(5):
+            handle_request(device, 9, b'\x00')
+            self.assertEqual([handle_request(device, 0, b''), handle_request(device, 13, b'')], replies)
+        self.assertEqual(device.state_version, version)
+        self.assertEqual((device.reply_cache.hits, device.reply_cache.misses), (10, 2))
+
+    def test_replies_with_toggled_units_are_not_cached(self):
+        device = make_device()
+        device.device_variables[0].alternate_units.set_value(7)
+        self.assertEqual(handle_request(device, 15, b'')[4], 12)
+        handle_request(device, 9, b'\x00')
+        self.assertEqual(handle_request(device, 15, b'')[4], 7)
+
+    def test_toggling_commands_are_not_cached(self):
+        device = make_device()
+        self.assertNotEqual(handle_request(device, 48, b''), handle_request(device, 48, b''))
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
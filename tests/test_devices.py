@@ -0,0 +1,119 @@
+import unittest
+from unittest import mock
+
+from hartsim.commands import handle_request
+from hartsim.devices import DeviceVariable, HartDevice
+from hartsim.payloads import U32, f32_table
+from hartsim.signals import Sine, Step
+from hartsim.profiles import create_device_150, create_device_3051
+
+NOW = 1000.01
+
+
+class TestDevices(unittest.TestCase):
+
+    def test_devices_do_not_share_default_payloads(self):
+        first = HartDevice(device_variables={}, dynamic_variables={})
+        second = HartDevice(device_variables={}, dynamic_variables={})
+        first.pv_selection.set_value(3)
+        self.assertEqual(second.pv_selection.get_value(), 0)
+        self.assertIsNot(first.device_status, HartDevice.device_status)
+
+    def test_variables_do_not_share_default_payloads(self):
+        first = DeviceVariable()
+        second = DeviceVariable()
+        first.units.set_value(12)
+        self.assertEqual(second.units.get_value(), 0)
+
+    def test_profiles_create_independent_devices(self):
+        first = create_device_3051()
+        second = create_device_3051()
+        first.device_variables[0].units.set_value(7)
+        self.assertEqual(second.device_variables[0].units.get_value(), 12)
+
+    def test_profile_variables_match_field_types(self):
+        for create in (create_device_3051, create_device_150):
+            for variable in create().device_variables.values():
+                for name in ('urv', 'lrv'):
+                    self.assertEqual(getattr(variable, name)._struct_format(),
+                                     getattr(DeviceVariable, name)._struct_format())
+
+    def test_attribute_assignment_bumps_state_version(self):
+        device = HartDevice(device_variables={}, dynamic_variables={})
+        version = device.state_version
+        device.is_burst_mode = True
+        self.assertEqual(device.state_version, version + 1)
+        device.touch()
+        self.assertEqual(device.state_version, version + 2)
+
+    def test_float_tables_are_f32_tables(self):
+        device = HartDevice(device_variables={}, dynamic_variables={}, waveform_yt=[1.0, 2.0])
+        self.assertIs(type(device.waveform_yt), type(f32_table([])))
+        self.assertEqual(list(device.waveform_yt), [1.0, 2.0])
+        device.strappingTableLevel[0] = 1.5
+        self.assertEqual(device.strappingTableLevel[0], 1.5)
+
+
+class TestVariableReadings(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = mock.Mock(return_value=NOW)
+        self.device = create_device_3051()
+        self.device.clock = self.clock
+
+    def test_only_requested_variables_are_read(self):
+        values = {code: variable.value.get_value()
+                  for code, variable in self.device.device_variables.items()}
+        self.device.update_variables([1])
+        variable = self.device.device_variables[1]
+        # the default period of 100 ms takes the reading at 1000.0 s
+        self.assertAlmostEqual(variable.value.get_value(), variable.signal.value(1000.0))
+        self.assertEqual(self.device.device_variables[0].value.get_value(), values[0])
+        self.assertEqual(self.device.device_variables[2].value.get_value(), values[2])
+
+    def test_reading_is_kept_for_the_update_period(self):
+        variable = self.device.device_variables[0]
+        variable.update_period = U32(32_000)
+        self.device.update_variables([0])
+        first = variable.value.get_value()
+        self.clock.return_value = NOW + 0.9
+        self.device.update_variables([0])
+        self.assertEqual(variable.value.get_value(), first)
+        self.clock.return_value = NOW + 1
+        self.device.update_variables([0])
+        self.assertNotEqual(variable.value.get_value(), first)
+
+    def test_zero_period_reads_every_time(self):
+        variable = self.device.device_variables[0]
+        variable.update_period.set_value(0)
+        self.device.update_variables([0])
+        self.clock.return_value = NOW + 0.001
+        self.device.update_variables([0])
+        self.assertEqual(variable.value.get_value(), variable.signal.value(NOW + 0.001))
+        self.assertEqual(variable.max_seen.get_value(),
+                         max(variable.signal.value(NOW), variable.value.get_value()))
+
+    def test_variable_follows_its_signal(self):
+        variable = DeviceVariable(update_period=U32(0), signal=Step([1.0, 2.0], 10))
+        device = HartDevice({0: variable}, {0: 0}, clock=self.clock)
+        device.update_variables()
+        self.assertEqual(variable.value.get_value(), 1.0)
+        self.clock.return_value = NOW + 10
+        device.update_variables()
+        self.assertEqual(variable.value.get_value(), 2.0)
+        self.assertIsInstance(self.device.device_variables[0].signal, Sine)
+
+    def test_pv_read_leaves_other_variables(self):
+        value = self.device.device_variables[1].value.get_value()
+        handle_request(self.device, 1, b'')
+        self.assertEqual(self.device.device_variables[1].value.get_value(), value)
+        self.assertNotEqual(self.device.device_variables[0].min_seen.get_value(),
+                            DeviceVariable().min_seen.get_value())
+
+    def test_cmd54_reports_update_period(self):
+        self.device.device_variables[2].update_period.set_value(0x1234)
+        self.assertEqual(handle_request(self.device, 54, bytes([2]))[-5:-1], bytes([0, 0, 0x12, 0x34]))
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
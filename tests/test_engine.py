@@ -0,0 +1,96 @@
+import struct
+import unittest
+from unittest import mock
+
+from hartsim import engine
+from hartsim.commands import handle_request
+from hartsim.engine import VariableEngine
+from hartsim.payloads import F32View
+from hartsim.profiles import create_device_150, create_device_3051
+from hartsim.signals import Step
+
+NOW = 1234.5
+
+
+class TestVariableEngine(unittest.TestCase):
+
+    def create_engine(self, **kwargs) -> VariableEngine:
+        self.clock = mock.Mock(return_value=NOW)
+        return VariableEngine([create_device_3051(), create_device_150()], clock=self.clock, **kwargs)
+
+    def test_variables_are_views_of_the_columns(self):
+        fleet = self.create_engine()
+        device = fleet.devices[1]
+        self.assertEqual(len(fleet), sum(len(device.device_variables) for device in fleet.devices))
+        self.assertIsInstance(device.device_variables[0].value, F32View)
+        self.assertIs(device.variable_engine, fleet)
+        device.device_variables[0].value.set_value(1.5)
+        self.assertEqual(fleet.values[fleet.slots[(id(device), 0)]], 1.5)
+
+    def test_replies_match_devices_updated_alone(self):
+        fleet = self.create_engine()
+        with mock.patch('time.time', return_value=NOW):
+            for device, alone in zip(fleet.devices, (create_device_3051(), create_device_150())):
+                for number, data in ((1, b''), (2, b''), (3, b''), (9, bytes([0, 1, 2, 3]))):
+                    self.assertEqual(handle_request(device, number, data),
+                                     handle_request(alone, number, data))
+
+    def test_fleet_is_updated_once_per_tick(self):
+        fleet = self.create_engine(tick=1.0)
+        for device in fleet.devices:
+            device.update_variables()
+        self.assertEqual(fleet.updates, 1)
+        self.clock.return_value = NOW + 1.0
+        fleet.devices[0].update_variables()
+        self.assertEqual(fleet.updates, 2)
+
+    def test_min_and_max_seen_follow_readings(self):
+        fleet = self.create_engine(tick=0)
+        variable = fleet.devices[0].device_variables[1]
+        readings = []
+        for step in range(8):
+            fleet.update(NOW + step * 25)
+            readings.append(variable.value.get_value())
+        self.assertEqual(variable.min_seen.get_value(), min(readings))
+        self.assertEqual(variable.max_seen.get_value(), max(readings))
+
+    def test_simulated_variable_is_held(self):
+        fleet = self.create_engine(tick=0)
+        device = fleet.devices[0]
+        request = struct.pack('>BBBfB', 0, 1, 12, 42.0, 0)
+        handle_request(device, 79, request)
+        fleet.update(NOW + 60)
+        self.assertEqual(device.device_variables[0].value.get_value(), 42.0)
+        reading = device.simulated_variables[0]
+        self.assertNotEqual(reading, 42.0)
+        handle_request(device, 79, request[:1] + b'\0' + request[2:])
+        self.assertEqual(device.device_variables[0].value.get_value(), reading)
+        fleet.update(NOW + 120)
+        self.assertNotEqual(device.device_variables[0].value.get_value(), reading)
+
+    def test_other_signals_are_read_one_by_one(self):
+        devices = [create_device_3051(), create_device_150()]
+        devices[1].device_variables[2].signal = Step([7.0, 8.0], 1.0)
+        fleet = VariableEngine(devices, tick=0)
+        self.assertEqual([slot for slot, _ in fleet.others], [fleet.slots[(id(devices[1]), 2)]])
+        fleet.update(NOW)
+        self.assertEqual(devices[1].device_variables[2].value.get_value(), 7.0)
+        self.assertEqual(devices[0].device_variables[1].value.get_value(),
+                         devices[0].device_variables[1].signal.value(NOW))
+
+    def test_engine_without_numpy_uses_arrays(self):
+        with_numpy = self.create_engine(tick=0)
+        with_numpy.update(NOW + 10)
+        with mock.patch.object(engine, 'numpy', None):
+            fleet = self.create_engine(tick=0)
+            fleet.devices[0].simulate_variable(2, 7.0)
+            fleet.update(NOW + 10)
+        self.assertEqual(fleet.values.typecode, 'd')
+        self.assertEqual(fleet.devices[0].device_variables[2].value.get_value(), 7.0)
+        for slot in (0, 1, 3, len(fleet) - 1):
+            self.assertAlmostEqual(fleet.values[slot], with_numpy.values[slot])
+        self.assertEqual(list(fleet.loop_currents), list(with_numpy.loop_currents))
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
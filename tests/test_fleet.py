@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from hartsim.commands import handle_request
+from hartsim.devices import DeviceVariable, HartDevice
+from hartsim.engine import VariableEngine
+from hartsim.fleet import DeviceFleet
+from hartsim.payloads import F32, U8, F32View, U8View
+from hartsim.profiles import create_device_150, create_device_3051
+from hartsim.simulator import DeviceSimulator
+
+NOW = 1234.5
+
+
+def create_fleet(count: int = 3) -> DeviceFleet:
+    fleet = DeviceFleet()
+    for index in range(count):
+        device = create_device_3051() if index % 2 == 0 else create_device_150()
+        device.long_address += index
+        fleet.add(device)
+    return fleet
+
+
+class TestDeviceFleet(unittest.TestCase):
+
+    def test_replies_match_devices(self):
+        fleet = create_fleet(2)
+        with mock.patch('time.time', return_value=NOW):
+            for index, alone in enumerate((create_device_3051(), create_device_150())):
+                alone.long_address += index
+                for number, data in ((0, b''), (1, b''), (3, b''), (9, bytes([0, 1, 2])),
+                                     (15, b''), (20, b''), (48, b''), (54, bytes([1]))):
+                    self.assertEqual(handle_request(fleet[index], number, data),
+                                     handle_request(alone, number, data))
+
+    def test_fields_are_views_of_the_columns(self):
+        fleet = create_fleet()
+        device = fleet[1]
+        self.assertIsInstance(device.polling_address, U8View)
+        self.assertIsInstance(device.device_variables[0].value, F32View)
+        device.device_variables[0].value.set_value(2.5)
+        self.assertEqual(fleet[1].device_variables[0].value.get_value(), 2.5)
+        self.assertEqual(fleet[0].device_variables[0].value.get_value(), 1.2345)
+        self.assertIs(fleet[0].device_variables._indices, fleet[2].device_variables._indices)
+
+    def test_assignment_stores_value_and_invalidates_replies(self):
+        device = create_fleet()[0]
+        version = device.state_version
+        device.loop_current_mode = U8(0)
+        device.is_burst_mode = True
+        self.assertEqual(device.loop_current_mode.get_value(), 0)
+        self.assertIs(device.is_burst_mode, True)
+        self.assertEqual(device.state_version, version + 2)
+        device.touch()
+        self.assertEqual(device.state_version, version + 3)
+        with self.assertRaises(AttributeError):
+            device.unknown = 1
+
+    def test_writes_reach_the_columns(self):
+        fleet = create_fleet()
+        version = fleet[2].state_version
+        handle_request(fleet[2], 136, bytes([0x12, 0x34]))
+        self.assertEqual(fleet[2].display_parameters.get_value(), 0x1234)
+        self.assertGreater(fleet[2].state_version, version)
+        self.assertEqual(fleet[0].display_parameters.get_value(), 0xAAAA)
+        handle_request(fleet[2], 79, bytes([0, 1, 12]) + F32(42.0)._serialize() + bytes([0]))
+        self.assertEqual(fleet[2].device_variables[0].value.get_value(), 42.0)
+        self.assertIn(0, fleet[2].simulated_variables)
+        self.assertEqual(fleet[0].simulated_variables, {})
+
+    def test_added_devices_are_copied(self):
+        device = create_device_3051()
+        device.strapping_table()
+        view = DeviceFleet([device])[0]
+        handle_request(view, 159, bytes(3) + F32(5.0)._serialize() * 8)
+        view.hart_message.set_value('CHANGED')
+        view.simulate_variable(0, 42.0)
+        self.assertEqual(device.strappingTableLevel[0], create_device_3051().strappingTableLevel[0])
+        self.assertEqual(device.strapping_table().volume(10.0), 15.0)
+        self.assertEqual(device.hart_message.get_value(), create_device_3051().hart_message.get_value())
+        self.assertEqual(device.simulated_variables, {})
+        self.assertEqual(view.strappingTableLevel[0], 5.0)
+        self.assertIs(view.device_variables[0].signal, device.device_variables[0].signal)
+
+    def test_addresses_find_slots(self):
+        fleet = create_fleet()
+        address = create_device_3051().long_address + 2
+        self.assertEqual(fleet.find_unique(address), fleet[2])
+        self.assertIsNone(fleet.find_unique(0))
+        self.assertEqual([device.slot for device in fleet.find_polling(0)], [0, 2])
+        simulator = DeviceSimulator(fleet.find_polling(0)[:1], verbose=False)
+        self.assertEqual(simulator.unique_map[fleet[0].long_address], fleet[0])
+
+    def test_mismatched_devices_are_rejected(self):
+        fleet = create_fleet(1)
+        with self.assertRaises(ValueError):
+            fleet.add(create_device_3051())
+        device = HartDevice({0: DeviceVariable(urv=U8(65))}, {0: 0}, long_address=1)
+        with self.assertRaises(TypeError):
+            fleet.add(device)
+        engine_device = create_device_3051()
+        engine_device.long_address = 2
+        VariableEngine([engine_device])
+        with self.assertRaises(ValueError):
+            fleet.add(engine_device)
+        self.assertEqual(len(fleet), 1)
+        self.assertEqual(len(fleet.variables), len(create_device_3051().device_variables))
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
@@ -1,7 +1,8 @@
 import unittest
 
 from hartsim import HartFrame, FrameType
-from hartsim.framingutils import HartFrameBuilder
+from hartsim.framingutils import (MAX_FRAME_SIZE, HartFrameBuilder, HartFrameView,
+                                  reply_header, xor_check_sum)
 
 
 class TestFramingUtils(unittest.TestCase):
@@ -39,6 +40,36 @@ class TestFramingUtils(unittest.TestCase):
                            data=bytearray([0x01, 0x02, 0x03]))
         self.assertEqual(target.serialize(), expected)
 
+    def test_xor_check_sum(self):
+        for size in range(0, 40):
+            data = bytes((i * 37 + 11) & 0xFF for i in range(size))
+            expected = 0x5A
+            for item in data:
+                expected ^= item
+            self.assertEqual(xor_check_sum(data, 0x5A), expected, f'{size}')
+
+    def test_hart_frame_serialize_into_with_preambles(self):
+        buffer = bytearray(MAX_FRAME_SIZE)
+        target = HartFrame(FrameType.ACK,
+                           0,
+                           is_long_address=True,
+                           long_address=0x123456789A,
+                           is_burst=True,
+                           data=bytearray([0x01, 0x02, 0x03]))
+        end = target.serialize_into(buffer, 2, preambles=5)
+        self.assertEqual(end, 19)
+        self.assertEqual(buffer[2:end], bytes([0xFF] * 5) + target.serialize())
+        self.assertEqual(target.check_sum, 0xD7)
+
+    def test_reply_header_encode_into(self):
+        buffer = bytearray(MAX_FRAME_SIZE)
+        header = reply_header(FrameType.ACK, False, 42, True, False, 3)
+        end = header.encode_into(buffer, 0, bytes([0x01, 0x02, 0x03]))
+        self.assertEqual(
+            buffer[:end],
+            bytes([0xFF, 0xFF, 0xFF, 0x06, 0xaa, 0x00, 0x03, 0x01, 0x02, 0x03, 0xaf]))
+        self.assertIs(reply_header(FrameType.ACK, False, 42, True, False, 3), header)
+
     def test_hart_frame_short_address_deserialize(self):
         serialized = iter(
             bytearray([0xFF, 0x10, 0xFF, 0xFF, 0x06, 0xaa, 0x00, 0x03, 0x01, 0x02, 0x03,
@@ -87,6 +118,83 @@ class TestFramingUtils(unittest.TestCase):
         self.assertEqual(target.data, bytearray([]))
         self.assertEqual(target.check_sum, 0x97)
 
+    def test_hart_frame_builder_feed_returns_all_frames(self):
+        serialized = bytes([0xFF, 0xFF, 0x06, 0xaa, 0x00, 0x03, 0x01, 0x02, 0x03, 0xaf,
+                            0xFF, 0xFF, 0xFF, 0x86, 0x92, 0x34, 0x56, 0x78,
+                            0x9A, 0x00, 0x00, 0x97])
+        builder = HartFrameBuilder()
+        frames = builder.feed(serialized)
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[0].short_address, 42)
+        self.assertEqual(frames[0].data, bytearray([0x01, 0x02, 0x03]))
+        self.assertEqual(frames[1].is_long_address, True)
+        self.assertEqual(frames[1].long_address, 0x123456789A)
+        self.assertEqual(frames[1].check_sum, 0x97)
+
+    def test_hart_frame_builder_feed_split_frame(self):
+        serialized = bytes([0xFF, 0xFF, 0x06, 0xaa, 0x00, 0x03, 0x01, 0x02, 0x03, 0xaf])
+        builder = HartFrameBuilder()
+        for split in range(1, len(serialized)):
+            self.assertEqual(builder.feed(serialized[:split]), [])
+            frames = builder.feed(serialized[split:])
+            self.assertEqual(len(frames), 1, f'{split}')
+            self.assertEqual(frames[0].data, bytearray([0x01, 0x02, 0x03]))
+            self.assertEqual(frames[0].check_sum, 0xAF)
+
+    def test_hart_frame_builder_feed_skips_garbage(self):
+        serialized = bytes([0x12, 0xFF, 0x34, 0xFF, 0xFF, 0x10, 0x56,
+                            0xFF, 0xFF, 0x02, 0x80, 0x00, 0x00, 0x82])
+        builder = HartFrameBuilder()
+        frames = builder.feed(serialized)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0].type, FrameType.STX)
+        self.assertEqual(frames[0].short_address, 0)
+        self.assertEqual(frames[0].is_primary_master, True)
+        self.assertTrue(frames[0].is_valid())
+
+    def test_hart_frame_view_decodes_fields(self):
+        serialized = bytes([0xFF, 0xFF, 0x86, 0xD2, 0x34, 0x56, 0x78,
+                            0x9A, 0x00, 0x03, 0x01, 0x02, 0x03, 0xD7])
+        target = HartFrameBuilder().feed(serialized)[0]
+        self.assertIsInstance(target, HartFrameView)
+        self.assertEqual(target.type, FrameType.ACK)
+        self.assertEqual(target.is_long_address, True)
+        self.assertEqual(target.long_address, 0x123456789A)
+        self.assertEqual(target.short_address, 0)
+        self.assertEqual(target.is_primary_master, True)
+        self.assertEqual(target.is_burst, True)
+        self.assertEqual(target.command_number, 0)
+        self.assertEqual(target.byte_count, 3)
+        self.assertEqual(target.data, bytes([0x01, 0x02, 0x03]))
+        self.assertEqual(target.check_sum, 0xD7)
+        self.assertEqual(target.raw, serialized[2:])
+        self.assertTrue(target.is_valid())
+
+    def test_hart_frame_view_does_not_copy_data(self):
+        serialized = bytes([0xFF, 0xFF, 0x02, 0x80, 0x00, 0x02, 0x01, 0x02, 0x81])
+        target = HartFrameBuilder().feed(serialized)[0]
+        self.assertIs(target.data.obj, serialized)
+
+    def test_hart_frame_view_to_frame(self):
+        serialized = bytes([0xFF, 0xFF, 0x06, 0xaa, 0x00, 0x03, 0x01, 0x02, 0x03, 0xae])
+        view = HartFrameBuilder().feed(serialized)[0]
+        target = view.to_frame()
+        self.assertIsInstance(target, HartFrame)
+        self.assertEqual(target.short_address, 42)
+        self.assertEqual(target.data, bytearray([0x01, 0x02, 0x03]))
+        self.assertEqual(target.check_sum, 0xAE)
+        self.assertFalse(view.is_valid())
+        self.assertEqual(f'{view}', f'{target}')
+
+    def test_hart_frame_builder_collect_queues_all_frames(self):
+        serialized = iter(
+            bytearray([0xFF, 0xFF, 0x02, 0x80, 0x00, 0x00, 0x82,
+                       0xFF, 0xFF, 0x02, 0x81, 0x00, 0x00, 0x83]))
+        builder = HartFrameBuilder()
+        self.assertTrue(builder.collect(serialized))
+        self.assertEqual(builder.dequeue().short_address, 0)
+        self.assertEqual(builder.dequeue().short_address, 1)
+
     def test_hart_frame_default_constructor_format(self):
         expected = 'TYP(BACK) MST(PRI) MOD(POL) ADR(0) CMD(00123) SUM(???) DAT(NONE)'
         target = HartFrame(FrameType.BACK, 123)
@@ -0,0 +1,213 @@
+import asyncio
+import unittest
+
+from hartsim.framingutils import FrameType, HartFrame, HartFrameView
+from hartsim.hartip import (ACCESS_RESTRICTED, ALL_SESSIONS_IN_USE, HEADER,
+                            HEADER_SIZE, SESSION_INITIATE, HartIpServer,
+                            MessageId, MessageType, encode_message, parse_endpoint)
+from hartsim.logparser import LogResponseProvider
+from hartsim.logsim import LogReplayer
+from hartsim.profiles import create_devices
+from hartsim.simulator import DeviceSimulator
+
+
+def pdu(command_number: int = 0, short_address: int = 0) -> bytes:
+    frame = HartFrame(FrameType.STX, command_number,
+                      short_address=short_address, is_primary_master=True)
+    return bytes(frame.serialize())
+
+
+def initiate(sequence_number: int = 1, inactivity_limit: int = 60000) -> bytes:
+    return encode_message(MessageType.REQUEST, MessageId.SESSION_INITIATE, 0,
+                          sequence_number, SESSION_INITIATE.pack(1, inactivity_limit))
+
+
+def request(message_id: int, sequence_number: int, body: bytes = b'') -> bytes:
+    return encode_message(MessageType.REQUEST, message_id, 0, sequence_number, body)
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[tuple, bytes]:
+    header = await asyncio.wait_for(reader.readexactly(HEADER_SIZE), 5)
+    fields = HEADER.unpack(header)
+    return fields, await reader.readexactly(fields[5] - HEADER_SIZE)
+
+
+class UdpMaster(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    def datagram_received(self, data, address):
+        self.messages.put_nowait(data)
+
+
+def simulator_server(**kwargs) -> HartIpServer:
+    simulator = DeviceSimulator(create_devices(['3051']), verbose=False)
+    return HartIpServer(simulator.handle, **kwargs)
+
+
+class TestParseEndpoint(unittest.TestCase):
+
+    def test_port_only(self):
+        self.assertEqual(parse_endpoint('5094'), (None, 5094))
+
+    def test_host_and_port(self):
+        self.assertEqual(parse_endpoint('127.0.0.1:20004'), ('127.0.0.1', 20004))
+        self.assertEqual(parse_endpoint('[::1]:5094'), ('::1', 5094))
+
+    def test_invalid_port(self):
+        for spec in ('', 'localhost', 'localhost:http', '70000'):
+            with self.assertRaises(ValueError):
+                parse_endpoint(spec)
+
+
+class TestHartIpServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = simulator_server()
+        self.port = await self.server.start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        self.server.close()
+
+    async def test_tcp_session(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            writer.write(initiate(sequence_number=1))
+            fields, body = await read_message(reader)
+            self.assertEqual(fields[1:5], (MessageType.RESPONSE, MessageId.SESSION_INITIATE, 0, 1))
+            self.assertEqual(body, SESSION_INITIATE.pack(1, 60000))
+            self.assertEqual(len(self.server.sessions), 1)
+
+            writer.write(request(MessageId.TOKEN_PASSING_PDU, 2, pdu()))
+            fields, body = await read_message(reader)
+            self.assertEqual(fields[1:5], (MessageType.RESPONSE, MessageId.TOKEN_PASSING_PDU, 0, 2))
+            reply = HartFrameView(body)
+            self.assertEqual(reply.type, FrameType.ACK)
+            self.assertEqual(reply.command_number, 0)
+
+            writer.write(request(MessageId.KEEP_ALIVE, 3))
+            fields, _ = await read_message(reader)
+            self.assertEqual(fields[1:5], (MessageType.RESPONSE, MessageId.KEEP_ALIVE, 0, 3))
+
+            writer.write(request(MessageId.SESSION_CLOSE, 4))
+            fields, _ = await read_message(reader)
+            self.assertEqual(fields[1:5], (MessageType.RESPONSE, MessageId.SESSION_CLOSE, 0, 4))
+            self.assertEqual(await asyncio.wait_for(reader.read(), 5), b'')
+            self.assertEqual(self.server.sessions, {})
+        finally:
+            writer.close()
+        self.assertEqual(self.server.statistics.requests, 1)
+        self.assertEqual(self.server.statistics.replies, 1)
+
+    async def test_tcp_messages_split_and_coalesced(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            data = initiate() + request(MessageId.TOKEN_PASSING_PDU, 2, pdu())
+            writer.write(data[:5])
+            await writer.drain()
+            await asyncio.sleep(0.01)
+            writer.write(data[5:])
+            for sequence_number in (1, 2):
+                fields, _ = await read_message(reader)
+                self.assertEqual(fields[4], sequence_number)
+        finally:
+            writer.close()
+
+    async def test_pdu_without_session_is_rejected(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            writer.write(request(MessageId.TOKEN_PASSING_PDU, 7, pdu()))
+            fields, _ = await read_message(reader)
+            self.assertEqual(fields[1:5], (MessageType.ERROR, MessageId.TOKEN_PASSING_PDU,
+                                           ACCESS_RESTRICTED, 7))
+        finally:
+            writer.close()
+        self.assertEqual(self.server.statistics.requests, 0)
+
+    async def test_udp_session(self):
+        loop = asyncio.get_running_loop()
+        transport, master = await loop.create_datagram_endpoint(
+            UdpMaster, remote_addr=('127.0.0.1', self.port))
+        try:
+            transport.sendto(initiate())
+            message = await asyncio.wait_for(master.messages.get(), 5)
+            self.assertEqual(HEADER.unpack_from(message)[3], 0)
+            transport.sendto(request(MessageId.TOKEN_PASSING_PDU, 2, pdu(short_address=0)))
+            message = await asyncio.wait_for(master.messages.get(), 5)
+            reply = HartFrameView(message[HEADER_SIZE:])
+            self.assertEqual(reply.command_number, 0)
+            transport.sendto(request(MessageId.SESSION_CLOSE, 3))
+            await asyncio.wait_for(master.messages.get(), 5)
+            self.assertEqual(self.server.sessions, {})
+        finally:
+            transport.close()
+
+    async def test_many_concurrent_sessions(self):
+        async def session(index: int) -> int:
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            try:
+                writer.write(initiate(index) + request(MessageId.TOKEN_PASSING_PDU, index, pdu()))
+                await read_message(reader)
+                fields, _ = await read_message(reader)
+                return fields[4]
+            finally:
+                writer.close()
+
+        sequence_numbers = await asyncio.gather(*(session(index) for index in range(200)))
+        self.assertEqual(sequence_numbers, list(range(200)))
+        self.assertEqual(self.server.statistics.replies, 200)
+
+
+class TestHartIpSessionLimits(unittest.IsolatedAsyncioTestCase):
+
+    async def test_all_sessions_in_use(self):
+        server = simulator_server(max_sessions=1)
+        port = await server.start('127.0.0.1', 0)
+        connections = []
+        try:
+            for _ in range(2):
+                connections.append(await asyncio.open_connection('127.0.0.1', port))
+            statuses = []
+            for reader, writer in connections:
+                writer.write(initiate())
+                fields, _ = await read_message(reader)
+                statuses.append(fields[3])
+            self.assertEqual(statuses, [0, ALL_SESSIONS_IN_USE])
+        finally:
+            for _, writer in connections:
+                writer.close()
+            server.close()
+
+    async def test_inactive_session_is_closed(self):
+        server = simulator_server(sweep_interval=0.01)
+        port = await server.start('127.0.0.1', 0)
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(initiate(inactivity_limit=50))
+            await read_message(reader)
+            self.assertEqual(await asyncio.wait_for(reader.read(), 5), b'')
+            self.assertEqual(server.sessions, {})
+            writer.close()
+        finally:
+            server.close()
+
+    async def test_log_replayer_is_served(self):
+        frame = pdu()
+        response = bytes(HartFrame(FrameType.ACK, 0, is_primary_master=True,
+                                   data=bytearray([0, 0, 254])).serialize())
+        provider = LogResponseProvider({frame: [response]})
+        server = HartIpServer(LogReplayer(provider).handle)
+        port = await server.start('127.0.0.1', 0)
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(initiate() + request(MessageId.TOKEN_PASSING_PDU, 2, frame))
+            await read_message(reader)
+            _, body = await read_message(reader)
+            self.assertEqual(body, response)
+            writer.close()
+        finally:
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
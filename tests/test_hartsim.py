@@ -0,0 +1,36 @@
+import argparse
+import unittest
+
+import pytest
+
+from hartsim.hartsim import main, parse_port
+from hartsim.profiles import PROFILES
+
+
+class TestPortArguments(unittest.TestCase):
+
+    def test_port_without_profiles_hosts_all(self):
+        self.assertEqual(parse_port('COM3'), ('COM3', list(PROFILES)))
+
+    def test_port_with_profiles(self):
+        self.assertEqual(parse_port('/dev/ttyUSB0=3051,f9f5'), ('/dev/ttyUSB0', ['3051', 'f9f5']))
+
+    def test_unknown_profile_is_rejected(self):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_port('COM3=3051,9999')
+
+    def test_missing_name_is_rejected(self):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_port('=3051')
+
+    def test_duplicate_port_is_rejected(self):
+        with pytest.raises(SystemExit):
+            main(['--port', 'COM3=3051', '--port', 'COM3=150'])
+
+    def test_duplicate_address_is_rejected(self):
+        with pytest.raises(SystemExit):
+            main(['--port', 'COM3=3051,3051'])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
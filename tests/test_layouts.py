@@ -0,0 +1,142 @@
+import unittest
+
+from hartsim import commands
+from hartsim.commands import handle_request
+from hartsim.layouts import LayoutReply, LayoutTable, expand, register_layouts
+from hartsim.profiles import create_device_3051
+from hartsim.registry import CommandRegistry
+
+HEADER = [
+    {'name': 'response_code', 'type': 'U8'},
+    {'name': 'device_status', 'type': 'U8', 'from': 'device.device_status'},
+]
+
+
+class TestLayouts(unittest.TestCase):
+
+    def test_groups_are_unrolled_with_optional_repetitions(self):
+        fields = expand([{'repeat': 3, 'required': 1, 'fields': [
+            {'name': 'code', 'type': 'U8'},
+            {'name': 'value', 'type': 'F32'}]}])
+        self.assertEqual([(item['name'], item['optional']) for item in fields],
+                         [('code_1', False), ('value_1', False),
+                          ('code_2', True), ('value_2', True),
+                          ('code_3', True), ('value_3', True)])
+
+    def test_groups_take_suffixes(self):
+        fields = expand([{'repeat': 2, 'suffixes': 'ab', 'fields': [{'name': 'level', 'type': 'F32'}]}])
+        self.assertEqual([item['name'] for item in fields], ['level_a', 'level_b'])
+
+    def test_payload_classes_are_built_once_on_first_use(self):
+        table = LayoutTable({'ExampleRequest': [{'name': 'value', 'type': 'U16', 'value': 0x1234}]})
+        self.assertEqual(table.classes, {})
+        request = table.factory('ExampleRequest')()
+        self.assertEqual(request.pack(), bytes([0x12, 0x34]))
+        self.assertIs(table.payload_class('ExampleRequest'), type(request))
+
+    def test_optional_group_decodes_longest_prefix(self):
+        table = LayoutTable({'ExampleRequest': [
+            {'repeat': 4, 'required': 1, 'fields': [{'name': 'code', 'type': 'U8'}]}]})
+        request = table.factory('ExampleRequest')()
+        self.assertEqual(request.decode_from(bytes([5, 6])), 2)
+        self.assertEqual(request.pack(), bytes([5, 6]))
+        self.assertTrue(request.code_3.is_skipped())
+        self.assertIsNone(table.factory('ExampleRequest')().decode_from(b''))
+
+    def test_repeated_group_field(self):
+        table = LayoutTable({'ExampleRequest': [
+            {'name': 'slots', 'type': 'RepeatedGroup', 'min': 1, 'max': 3, 'fields': [
+                {'name': 'code', 'type': 'U8'},
+                {'name': 'value', 'type': 'U16'}]}]})
+        request = table.factory('ExampleRequest')()
+        self.assertEqual(request.decode_from(bytes([1, 0, 2, 3, 0, 4, 5])), 6)
+        self.assertEqual(request.slots.get_value(), [(1, 2), (3, 4)])
+
+    def test_reply_reads_sources_and_assigns_device(self):
+        table = LayoutTable({
+            'ExampleRequest': [{'name': 'display_parameters', 'type': 'U16'}],
+            'ExampleReply': [
+                *HEADER,
+                {'name': 'display_parameters', 'type': 'U16', 'from': 'device.display_parameters'},
+                {'name': 'units', 'type': 'U8', 'from': 'device.device_variables.4.units'},
+                {'name': 'reserved', 'type': 'Ascii', 'size': 3, 'value': '\0' * 3},
+            ],
+        })
+        device = create_device_3051()
+        request = table.factory('ExampleRequest')()
+        request.decode_from(bytes([0xBE, 0xEF]))
+        reply = LayoutReply(table, 'ExampleReply',
+                            {'device.display_parameters': 'request.display_parameters'})(device, request)
+        self.assertEqual(device.display_parameters.get_value(), 0xBEEF)
+        self.assertEqual(reply.pack(), bytes([0, device.device_status.get_value(), 0xBE, 0xEF,
+                                              device.device_variables[4].units.get_value(), 0, 0, 0]))
+
+    def test_unknown_source_is_rejected(self):
+        table = LayoutTable({'ExampleReply': [{'name': 'value', 'type': 'U8', 'from': 'frame.value'}]})
+        with self.assertRaises(ValueError):
+            LayoutReply(table, 'ExampleReply')(create_device_3051())
+
+    def test_commands_are_registered_from_data(self):
+        registry = CommandRegistry()
+        table = LayoutTable({
+            'ExampleRequest': [{'name': 'value', 'type': 'U8'}],
+            'ExampleReply': [*HEADER, {'name': 'value', 'type': 'U8', 'from': 'request.value'}],
+        })
+        register_layouts(registry, table, {140: {'request': 'ExampleRequest', 'reply': 'ExampleReply',
+                                                 'writes': True}})
+        device = create_device_3051()
+        entry = registry.lookup(device, 140)
+        self.assertTrue(entry.writes)
+        self.assertFalse(entry.cacheable)
+        self.assertEqual(table.classes, {})
+        self.assertEqual(entry.handle(device, bytes([0x41])).pack()[2:], bytes([0x41]))
+        self.assertIsNone(entry.handle(device, b''))
+
+
+class TestCommandLayouts(unittest.TestCase):
+
+    def test_layout_classes_are_module_attributes(self):
+        self.assertIs(commands.Cmd13Reply, commands.LAYOUTS.payload_class('Cmd13Reply'))
+        with self.assertRaises(AttributeError):
+            commands.Cmd999Reply
+
+    def test_cmd9_reports_requested_slots(self):
+        device = create_device_3051()
+        reply = handle_request(device, 9, bytearray([0, 1]))
+        # response code, device status, extended status, two slots and a time stamp
+        self.assertEqual(len(reply), 3 + 2 * 8 + 4)
+        self.assertEqual(reply[3:-4:8], bytes([0, 1]))
+
+    def test_cmd162_reads_strapping_point_set(self):
+        device = create_device_3051()
+        payload = commands.COMMANDS.lookup(device, 162).handle(device, bytes([1]))
+        self.assertEqual(list(payload.levels.get_value()), list(device.strappingTableLevel[10:20]))
+        self.assertEqual(payload.volumes.get_value()[-1], device.strappingTableVolume[19])
+
+    def test_cmd162_pads_the_last_point_set(self):
+        device = create_device_3051()
+        payload = commands.COMMANDS.lookup(device, 162).handle(device, bytes([5]))
+        self.assertEqual(list(payload.levels.get_value()),
+                         [*device.strappingTableLevel[50:], *[0.0] * 7])
+        self.assertEqual(payload.volumes.get_value()[2], device.strappingTableVolume[52])
+
+    def test_cmd162_point_set_past_the_table_is_invalid(self):
+        device = create_device_3051()
+        for point_set in (6, 255):
+            self.assertEqual(handle_request(device, 162, bytes([point_set])),
+                             bytes([commands.INVALID_SELECTION, 0]))
+
+    def test_cmd136_writes_display_parameters(self):
+        device = create_device_3051()
+        reply = handle_request(device, 136, bytearray([0x12, 0x34]))
+        self.assertEqual(reply[2:], bytes([0x12, 0x34]))
+        self.assertEqual(device.display_parameters.get_value(), 0x1234)
+        self.assertEqual(handle_request(device, 137, bytearray())[-2:], bytes([0x12, 0x34]))
+
+    def test_short_layout_request_is_too_few_data_bytes(self):
+        reply = handle_request(create_device_3051(), 140, bytearray([1]))
+        self.assertEqual(reply[0], commands.TOO_FEW_DATA_BYTES)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
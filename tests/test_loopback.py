@@ -0,0 +1,134 @@
+import asyncio
+import os
+import sys
+import unittest
+
+import pytest
+
+from hartsim.framingutils import FrameType, HartFrame, HartFrameBuilder
+from hartsim.logparser import LogResponseProvider
+from hartsim.logsim import LogReplayer
+from hartsim.profiles import create_devices
+from hartsim.simulator import DeviceSimulator
+from hartsim.transport import SerialLink, open_serial, serve_links
+from tests.frames import request
+
+if sys.platform != 'win32':
+    from hartsim.loopback import open_pty_pairs
+
+
+async def exchange(links: list[SerialLink], masters: list[int], data: bytes) -> list:
+    """Send `data` on every master fd and return the first reply of each."""
+    loop = asyncio.get_running_loop()
+    replies = {}
+    done = loop.create_future()
+
+    def on_readable(master, builder):
+        frames = builder.feed(os.read(master, 512))
+        if frames:
+            loop.remove_reader(master)
+            replies[master] = frames[0].to_frame()
+            if len(replies) == len(masters):
+                done.set_result(None)
+
+    serving = asyncio.ensure_future(serve_links(links))
+    for master in masters:
+        loop.add_reader(master, on_readable, master, HartFrameBuilder())
+        os.write(master, data)
+    try:
+        await asyncio.wait_for(done, 5)
+    finally:
+        for link in links:
+            link.close()
+        await serving
+    return [replies[master] for master in masters]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='PTY pairs need a POSIX system')
+class TestPtyPairs(unittest.TestCase):
+
+    def setUp(self):
+        self.pairs = open_pty_pairs(3)
+
+    def tearDown(self):
+        for pair in self.pairs:
+            pair.close()
+
+    def test_pairs_have_distinct_paths(self):
+        paths = [pair.path for pair in self.pairs]
+        self.assertEqual(len(set(paths)), 3)
+        for path in paths:
+            self.assertTrue(os.path.exists(path))
+
+    def test_port_reads_what_the_master_writes(self):
+        port = self.pairs[0].port
+        self.assertEqual(port.read(), b'')
+        os.write(self.pairs[0].slave_fd, b'\x01\x02\x03')
+        self.assertEqual(port.in_waiting, 3)
+        self.assertEqual(port.read(port.in_waiting), b'\x01\x02\x03')
+        port.write(b'\x04')
+        self.assertEqual(os.read(self.pairs[0].slave_fd, 16), b'\x04')
+
+    def test_full_pty_queues_writes(self):
+        pair = self.pairs[0]
+        data = bytes(range(256)) * 160
+
+        async def run():
+            received = bytearray()
+            loop = asyncio.get_running_loop()
+            done = loop.create_future()
+            # fills the PTY, the rest waits for the slave end to be read
+            self.assertEqual(pair.port.write(data[:30000]), 30000)
+            self.assertEqual(pair.port.write(memoryview(data)[30000:]), len(data) - 30000)
+            self.assertTrue(pair.port._pending)
+
+            def on_readable():
+                received.extend(os.read(pair.slave_fd, 4096))
+                if len(received) == len(data):
+                    done.set_result(None)
+            loop.add_reader(pair.slave_fd, on_readable)
+            try:
+                await asyncio.wait_for(done, 5)
+            finally:
+                loop.remove_reader(pair.slave_fd)
+            return received
+
+        self.assertEqual(asyncio.run(run()), data)
+        self.assertFalse(pair.port._pending)
+        self.assertEqual(pair.port.dropped, 0)
+
+    def test_in_process_masters_are_answered(self):
+        links = []
+        for index, pair in enumerate(self.pairs):
+            simulator = DeviceSimulator(create_devices(['f9f5']), pair.path, verbose=False)
+            links.append(SerialLink(pair.port, simulator.handle, key_dtr=False))
+        replies = asyncio.run(exchange(links, [pair.slave_fd for pair in self.pairs],
+                                       request(short_address=2)))
+        self.assertEqual([reply.type for reply in replies], [FrameType.ACK] * 3)
+        self.assertEqual([reply.short_address for reply in replies], [2] * 3)
+
+    def test_external_master_opens_path(self):
+        pair = self.pairs[0]
+        simulator = DeviceSimulator(create_devices(['3051']), verbose=False)
+        link = SerialLink(pair.port, simulator.handle, key_dtr=False)
+        client = open_serial(pair.path, key_dtr=False)
+        try:
+            replies = asyncio.run(exchange([link], [client.fileno()], request()))
+        finally:
+            client.close()
+        self.assertEqual(replies[0].command_number, 0)
+
+    def test_log_replayer_is_served(self):
+        frame = HartFrame(FrameType.STX, 0, short_address=0, is_primary_master=True)
+        response = bytes(HartFrame(FrameType.ACK, 0, is_primary_master=True,
+                                   data=bytearray([0, 0, 254])).serialize())
+        provider = LogResponseProvider({bytes(frame.serialize()): [response]})
+        pair = self.pairs[0]
+        link = SerialLink(pair.port, LogReplayer(provider, pair.path).handle, key_dtr=False)
+        replies = asyncio.run(exchange([link], [pair.slave_fd], request()))
+        self.assertEqual(bytes(replies[0].serialize()), response)
+        self.assertEqual([type(key) for key in provider._response_indices], [bytes])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
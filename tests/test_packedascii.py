@@ -0,0 +1,39 @@
+import unittest
+
+from hartsim import packedascii
+
+
+class TestPackedAscii(unittest.TestCase):
+
+    def test_fold_upper_cases_and_replaces(self):
+        self.assertEqual(packedascii.fold("`This~is a {test}.`\x01é€"),
+                         "?THIS?IS A ?TEST?.????")
+
+    def test_pack_groups(self):
+        self.assertEqual(packedascii.pack("1"), bytes([0xC4]))
+        self.assertEqual(packedascii.pack("1234"), bytes([0xC7, 0x2C, 0xF4]))
+        self.assertEqual(packedascii.pack("12345"), bytes([0xC7, 0x2C, 0xF4, 0xD4]))
+
+    def test_pack_pads_with_spaces_and_truncates(self):
+        self.assertEqual(packedascii.pack("AB", 4), packedascii.pack("AB  "))
+        self.assertEqual(packedascii.pack("ABCDEFGH", 4), packedascii.pack("ABCD"))
+
+    def test_pack_folds(self):
+        self.assertEqual(packedascii.pack("tag~"), packedascii.pack("TAG?"))
+
+    def test_unpack_round_trips(self):
+        text = "THIS IS A DESCRIPTOR OF 32 CHARS"
+        self.assertEqual(packedascii.unpack(packedascii.pack(text)), text)
+        self.assertEqual(packedascii.unpack(packedascii.pack("TAG 1", 8), 8), "TAG 1   ")
+        self.assertEqual(packedascii.unpack(packedascii.pack("12345"), 5), "12345")
+
+    def test_unpack_short_data_decodes_zero_bits(self):
+        self.assertEqual(packedascii.unpack(packedascii.pack("AB"), 4), "AB@@")
+
+    def test_packed_size(self):
+        self.assertEqual([packedascii.packed_size(size) for size in range(1, 9)],
+                         [1, 2, 3, 3, 4, 5, 6, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
@@ -1,11 +1,15 @@
+import copy
 import math
+import struct
 import unittest
+from array import array
+from unittest import mock
 
 from attr import dataclass
 import pytest
 
-from hartsim import Unsigned, U8, U16, U24, U32, PayloadSequence
-from hartsim.payloads import GreedyU8Array, Payload, F32, Ascii, PackedAscii
+from hartsim import Unsigned, U8, U16, U24, U32, PayloadSequence, payloads
+from hartsim.payloads import GreedyU8Array, Payload, F32, F32Array, Ascii, PackedAscii, RepeatedGroup
 
 
 @dataclass
@@ -29,6 +33,29 @@ class PayloadSequenceMiddleOptionalExample(PayloadSequence):
     third_word: U16 = U16()
 
 
+@dataclass
+class PayloadSequenceMixedExample(PayloadSequence):
+    code: U8 = U8()
+    id: U24 = U24()
+    value: F32 = F32()
+    tag: PackedAscii = PackedAscii(8)
+    name: Ascii = Ascii(4)
+    tail: GreedyU8Array = GreedyU8Array()
+
+
+@dataclass
+class SlotExample(PayloadSequence):
+    code: U8 = U8()
+    value: F32 = F32(1.5)
+
+
+@dataclass
+class RepeatedGroupExample(PayloadSequence):
+    status: U8 = U8()
+    slots: RepeatedGroup = RepeatedGroup(SlotExample, 1, 3)
+    timestamp: U16 = U16()
+
+
 class TestPayloads(unittest.TestCase):
 
     def test_abstract_serialize_does_nothing(self):
@@ -704,5 +731,329 @@ class TestPayloads(unittest.TestCase):
         self.assertEqual(expectedIndex, len(expected))
 
 
+    def test_payload_sequence_is_packed(self):
+        target = PayloadSequenceExample()
+        target.first_byte.set_value(0x04)
+        target.second_byte.set_value(0x03)
+        target.third_word.set_value(0x0201)
+        self.assertEqual(target.pack(), bytes([0x04, 0x03, 0x02, 0x01]))
+
+    def test_payload_sequence_is_packed_without_skipped(self):
+        target = PayloadSequenceMiddleOptionalExample()
+        target.first_byte.set_value(0x04)
+        target.second_byte.set_value(0x03)
+        target.third_word.set_value(0x0201)
+        target.second_byte.skip()
+        self.assertEqual(target.pack(), bytes([0x04, 0x02, 0x01]))
+        target.second_byte.include()
+        self.assertEqual(target.pack(), bytes([0x04, 0x03, 0x02, 0x01]))
+
+    def test_payload_sequence_pack_matches_serialization(self):
+        target = PayloadSequenceMixedExample(
+            U8(0x12), U24(0x345678), F32(1.5), PackedAscii(8, "TAG 1"),
+            Ascii(4, "ab"), GreedyU8Array(bytearray([1, 2, 3])))
+        packed = target.pack()
+        self.assertEqual(packed, bytes(
+            [*U8(0x12), *U24(0x345678), *F32(1.5), *PackedAscii(8, "TAG 1"),
+             *Ascii(4, "ab"), 1, 2, 3]))
+        target.tail.set_value(bytearray())
+        self.assertEqual(target.pack(), packed[:-3])
+
+    def test_payload_sequence_is_packed_into_buffer(self):
+        target = PayloadSequenceExample()
+        target.first_byte.set_value(0x04)
+        target.second_byte.set_value(0x03)
+        target.third_word.set_value(0x0201)
+        buffer = bytearray(8)
+        self.assertEqual(target.pack_into(buffer, 2), 6)
+        self.assertEqual(buffer, bytearray([0, 0, 0x04, 0x03, 0x02, 0x01, 0, 0]))
+
+    def test_payload_sequence_is_unpacked(self):
+        target = PayloadSequenceExample()
+        self.assertEqual(target.unpack_from(bytes([0xAA, 0x09, 0x08, 0x07, 0x06]), 1), 5)
+        self.assertEqual(target.first_byte.get_value(), 0x09)
+        self.assertEqual(target.second_byte.get_value(), 0x08)
+        self.assertEqual(target.third_word.get_value(), 0x0706)
+
+    def test_payload_sequence_unpack_skips_missing_optional(self):
+        target = PayloadSequenceOptionalExample()
+        self.assertEqual(target.unpack_from(bytes([0x09, 0x08])), 2)
+        self.assertTrue(target.third_word.is_skipped())
+        self.assertEqual(target.unpack_from(bytes([0x09, 0x08, 0x07, 0x06])), 4)
+        self.assertFalse(target.third_word.is_skipped())
+        self.assertEqual(target.third_word.get_value(), 0x0706)
+
+    def test_payload_sequence_unpack_raises_when_not_enough_bytes(self):
+        target = PayloadSequenceExample()
+        with pytest.raises(struct.error):
+            target.unpack_from(bytes([0x09, 0x08]))
+
+    def test_payload_sequence_rejects_wrong_field_types(self):
+        @dataclass
+        class Range(PayloadSequence):
+            upper: F32 = F32()
+            lower: F32 = F32()
+            name: Ascii = Ascii(4)
+
+        with pytest.raises(TypeError, match="Range.upper is a U8 packed as 'B', F32 'f' expected"):
+            Range(U8(65), F32(1.0))
+        with pytest.raises(TypeError, match='Range.lower'):
+            Range.acquire(lower=U8(65))
+        with pytest.raises(TypeError, match='Range.name'):
+            Range(name=Ascii(8)).pack()
+        self.assertEqual(Range(F32(2.0), F32(1.0), Ascii(4, 'ab')).pack(),
+                         struct.pack('>ff4s', 2.0, 1.0, b'ab  '))
+
+    def test_payload_sequence_unpack_round_trips(self):
+        source = PayloadSequenceMixedExample(
+            U8(0x12), U24(0x345678), F32(1.5), PackedAscii(8, "TAG 1"),
+            Ascii(4, "ab"), GreedyU8Array(bytearray([1, 2, 3])))
+        target = PayloadSequenceMixedExample(
+            U8(), U24(), F32(), PackedAscii(8), Ascii(4), GreedyU8Array())
+        packed = source.pack()
+        self.assertEqual(target.unpack_from(packed), len(packed))
+        self.assertEqual(target.id.get_value(), 0x345678)
+        self.assertEqual(target.value.get_value(), 1.5)
+        self.assertEqual(target.tag.get_value(), "TAG 1   ")
+        self.assertEqual(target.name.get_value(), "ab  ")
+        self.assertEqual(target.tail.get_value(), bytearray([1, 2, 3]))
+        self.assertEqual(target.pack(), packed)
+
+    def test_primitive_is_decoded_from_offset(self):
+        buffer = memoryview(bytes([0xAA, 0x12, 0x34, 0x56, 0x3F, 0xC0, 0x00, 0x00]))
+        target = U24()
+        self.assertEqual(target.decode_from(buffer, 1), 4)
+        self.assertEqual(target.get_value(), 0x123456)
+        value = F32()
+        self.assertEqual(value.decode_from(buffer, 4), 8)
+        self.assertEqual(value.get_value(), 1.5)
+
+    def test_primitive_decode_from_short_buffer_returns_none(self):
+        target = U16(0x0102)
+        self.assertIsNone(target.decode_from(bytes([0x09]), 0))
+        self.assertIsNone(target.decode_from(bytes([0x09, 0x08]), 1))
+        self.assertEqual(target.get_value(), 0x0102)
+
+    def test_greedy_array_is_decoded_from_slice(self):
+        target = GreedyU8Array()
+        self.assertEqual(target.decode_from(memoryview(bytes([1, 2, 3, 4])), 1), 4)
+        self.assertEqual(target.get_value(), bytearray([2, 3, 4]))
+
+    def test_payload_sequence_is_decoded(self):
+        target = PayloadSequenceOptionalExample()
+        self.assertEqual(target.decode_from(memoryview(bytes([0x09, 0x08]))), 2)
+        self.assertTrue(target.third_word.is_skipped())
+        self.assertEqual(target.decode_from(bytes([0xAA, 0x09, 0x08, 0x07, 0x06]), 1), 5)
+        self.assertFalse(target.third_word.is_skipped())
+        self.assertEqual(target.third_word.get_value(), 0x0706)
+
+    def test_payload_sequence_decode_from_short_buffer_returns_none(self):
+        target = PayloadSequenceExample(U8(1), U8(2), U16(3))
+        self.assertIsNone(target.decode_from(bytes([0x09, 0x08, 0x07])))
+        self.assertEqual(target.pack(), bytes([1, 2, 0, 3]))
+
+    def test_payload_sequence_instances_own_their_defaults(self):
+        first = PayloadSequenceMixedExample()
+        second = PayloadSequenceMixedExample()
+        first.code.set_value(7)
+        first.tag.set_value("OTHER")
+        first.tail.skip()
+        self.assertEqual(second.code.get_value(), 0)
+        self.assertEqual(second.tag.get_value(), "")
+        self.assertFalse(second.tail.is_skipped())
+        self.assertIsNot(first.id, second.id)
+
+    def test_payload_sequence_copies_strings_and_arrays_on_read(self):
+        target = PayloadSequenceMixedExample()
+        self.assertEqual(set(vars(target)) & {'tag', 'name', 'tail'}, set())
+        self.assertEqual(target.pack(), PayloadSequenceMixedExample().pack())
+        self.assertNotIn('tag', vars(target))
+        target.tag.set_value('OTHER')
+        self.assertIn('tag', vars(target))
+        self.assertEqual(PayloadSequenceMixedExample.tag.get_value(), '')
+        self.assertEqual(PayloadSequenceMixedExample().tag.get_value(), '')
+
+    def test_payload_sequence_keeps_given_fields(self):
+        code = U8(3)
+        target = PayloadSequenceExample(first_byte=code)
+        self.assertIs(target.first_byte, code)
+        self.assertIsNot(target.second_byte, PayloadSequenceExample().second_byte)
+
+    def test_copies_keep_value_and_flags(self):
+        for source in (U8(1, is_optional=True), U24(0x123456), F32(1.5), F32Array(2, [1.0, 2.0]),
+                       Ascii(4, "ab"), PackedAscii(8, "TAG"), GreedyU8Array(bytearray([1, 2]))):
+            source.skip()
+            target = copy.copy(source)
+            self.assertIsNot(target, source)
+            self.assertEqual(bytes(target), bytes(source))
+            self.assertEqual(target.is_optional(), source.is_optional())
+            self.assertTrue(target.is_skipped())
+
+    def test_column_view_copies_are_primitives(self):
+        class Tracked:
+            __slots__ = ()
+
+        class TrackedView(Tracked, payloads.U16View):
+            __slots__ = ()
+
+        view = TrackedView(array('H', [5]), 0)
+        clone = copy.copy(view)
+        self.assertIs(type(clone), U16)
+        self.assertEqual(clone.get_value(), 5)
+        self.assertIs(payloads.COLUMN_VIEWS[F32], payloads.F32View)
+
+    def test_primitives_have_no_instance_dict(self):
+        for target in (U8(), U16(), U24(), U32(), Unsigned(1, 3), F32(),
+                       F32Array(2), Ascii(4), PackedAscii(8), GreedyU8Array(),
+                       RepeatedGroup(SlotExample, 1)):
+            self.assertFalse(hasattr(target, '__dict__'), type(target).__name__)
+
+    def test_unsigned_with_size_is_sized_class(self):
+        target = Unsigned(0x123456, 3)
+        self.assertIsInstance(target, Unsigned)
+        self.assertEqual(target.get_size(), 3)
+        self.assertEqual(bytes(target), bytes([0x12, 0x34, 0x56]))
+
+    def test_iterators_are_independent(self):
+        target = U16(0x0102)
+        first = iter(target)
+        second = iter(target)
+        self.assertEqual(next(first), 0x01)
+        self.assertEqual(list(second), [0x01, 0x02])
+        self.assertEqual(list(first), [0x02])
+
+    def test_primitives_are_copied(self):
+        source = PackedAscii(8, "TAG", is_optional=True)
+        target = copy.copy(source)
+        target.set_value("OTHER")
+        self.assertEqual(source.get_value(), "TAG")
+        self.assertTrue(target.is_optional())
+        self.assertEqual(copy.deepcopy(U24(0x123456)).get_value(), 0x123456)
+
+    def test_f32_array_round_trips(self):
+        source = F32Array(3, [1.0, -2.5, 4.0])
+        data = bytes(source)
+        self.assertEqual(data, struct.pack('>3f', 1.0, -2.5, 4.0))
+        target = F32Array(3)
+        self.assertEqual(target.decode_from(bytes([0]) + data, 1), 13)
+        self.assertEqual(list(target.get_value()), [1.0, -2.5, 4.0])
+        self.assertIsNone(F32Array(3).decode_from(data[:-1]))
+
+    def test_f32_array_rejects_wrong_count(self):
+        with self.assertRaises(ValueError):
+            F32Array(3, [1.0])
+
+    def test_f32_array_value_is_a_copy(self):
+        target = F32Array(2, [1.0, 2.0])
+        values = target.get_value()
+        values[0] = 5.0
+        self.assertEqual(list(target.get_value()), [1.0, 2.0])
+
+    @unittest.skipIf(payloads.numpy is None, "NumPy is not installed")
+    def test_f32_array_keeps_read_only_big_endian_ndarray(self):
+        target = F32Array(2)
+        target.decode_from(struct.pack('>2f', 1.0, 2.0))
+        self.assertEqual(target._values.dtype, payloads.F32_ARRAY_DTYPE)
+        self.assertFalse(target._values.flags.writeable)
+        self.assertIs(copy.copy(target)._values, target._values)
+        self.assertTrue(target.get_value().flags.writeable)
+
+    def test_f32_array_without_numpy_uses_lists(self):
+        with mock.patch.object(payloads, 'numpy', None):
+            target = F32Array(2, [1.0, 2.0])
+            target.deserialize(iter(struct.pack('>2f', 3.0, 4.0)))
+            self.assertEqual(target.get_value(), [3.0, 4.0])
+            self.assertEqual(bytes(target), struct.pack('>2f', 3.0, 4.0))
+
+    def test_repeated_group_defaults_to_min_count_of_element_defaults(self):
+        target = RepeatedGroup(SlotExample, 2)
+        self.assertEqual(target.get_value(), [(0, 1.5), (0, 1.5)])
+        self.assertEqual(target.get_size(), 10)
+
+    def test_repeated_group_serializes_items(self):
+        target = RepeatedGroup(SlotExample, 1, 3, [(1, 1.0), (2, 2.0)])
+        self.assertEqual(bytes(target), bytes([1]) + struct.pack('>f', 1.0) + bytes([2]) + struct.pack('>f', 2.0))
+
+    def test_repeated_group_rejects_counts_out_of_range(self):
+        target = RepeatedGroup(SlotExample, 1, 2)
+        with self.assertRaises(ValueError):
+            target.set_value([])
+        with self.assertRaises(ValueError):
+            target.set_value([(1, 1.0)] * 3)
+
+    def test_repeated_group_decodes_whole_items_up_to_max(self):
+        target = RepeatedGroup(SlotExample, 1, 2)
+        data = bytes([1, 0, 0, 0, 0, 2, 0, 0, 0, 0, 3])
+        self.assertEqual(target.decode_from(data[:7]), 5)
+        self.assertEqual(target.get_count(), 1)
+        self.assertEqual(target.decode_from(data), 10)
+        self.assertEqual([code for code, _ in target.get_value()], [1, 2])
+        self.assertIsNone(target.decode_from(data[:4]))
+
+    def test_repeated_group_element_must_be_struct_scalars(self):
+        with self.assertRaises(TypeError):
+            RepeatedGroup(PayloadSequenceMixedExample, 1)
+
+    def test_sequence_with_repeated_group_round_trips(self):
+        source = RepeatedGroupExample(slots=RepeatedGroup(SlotExample, 1, 3, [(1, 1.0), (2, 2.0)]),
+                                      timestamp=U16(0x0102))
+        data = source.pack()
+        self.assertEqual(len(data), 1 + 2 * 5 + 2)
+        target = RepeatedGroupExample()
+        self.assertEqual(target.decode_from(data), len(data))
+        self.assertEqual(target.slots.get_value(), [(1, 1.0), (2, 2.0)])
+        self.assertEqual(target.timestamp.get_value(), 0x0102)
+        self.assertIsNone(RepeatedGroupExample().decode_from(data[:7]))
+
+    def test_repeated_group_deserializes_from_iterator(self):
+        target = RepeatedGroup(SlotExample, 1, 2)
+        target.deserialize(iter(bytes([7, 0, 0, 0, 0, 8])))
+        self.assertEqual(target.get_value(), [(7, 0.0)])
+
+    def test_repeated_groups_are_not_shared(self):
+        first = RepeatedGroupExample()
+        second = RepeatedGroupExample()
+        first.slots.set_value([(1, 1.0), (2, 2.0)])
+        self.assertEqual(second.slots.get_count(), 1)
+
+    def test_released_payload_is_reused_with_defaults(self):
+        pool = payloads.PayloadPool(RepeatedGroupExample)
+        first = pool.acquire()
+        first.status.set_value(7)
+        first.slots.set_value([(1, 1.0), (2, 2.0)])
+        first.release()
+        second = pool.acquire()
+        self.assertIs(second, first)
+        self.assertEqual(second.pack(), RepeatedGroupExample().pack())
+        self.assertEqual((pool.created, pool.reused), (1, 1))
+
+    def test_acquired_payload_keeps_given_fields_until_released(self):
+        code = U8(3)
+        first = PayloadSequenceExample.acquire(first_byte=code)
+        self.assertIs(first.first_byte, code)
+        first.release()
+        second = PayloadSequenceExample.acquire()
+        self.assertIs(second, first)
+        self.assertIsNot(second.first_byte, code)
+        self.assertEqual(second.first_byte.get_value(), 0)
+        self.assertEqual(code.get_value(), 3)
+        second.release()
+
+    def test_payload_is_released_once(self):
+        payload = PayloadSequenceMiddleOptionalExample.acquire()
+        payload.release()
+        payload.release()
+        PayloadSequenceMiddleOptionalExample().release()
+        self.assertEqual(len(payloads.payload_pool(PayloadSequenceMiddleOptionalExample)), 1)
+
+    def test_full_pool_discards_released_payloads(self):
+        pool = payloads.PayloadPool(PayloadSequenceExample, size=1)
+        first, second = pool.acquire(), pool.acquire()
+        first.release()
+        second.release()
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.statistics(), {'created': 2, 'reused': 0, 'discarded': 1})
+
+
 if __name__ == '__main__':
     unittest.main()  # pragma: no cover
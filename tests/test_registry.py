@@ -0,0 +1,230 @@
+import random
+import sys
+import threading
+import unittest
+from dataclasses import dataclass
+
+from hartsim.commands import COMMANDS, EXTENDED_COMMANDS, Cmd0Hart5Reply, Cmd7Reply, handle_request
+from hartsim.devices import HartDevice
+from hartsim.payloads import F32, U8, U16, PayloadSequence, payload_pool
+from hartsim.profiles import create_device_3051
+from hartsim.registry import CommandRegistry
+
+
+@dataclass
+class ExampleRequest(PayloadSequence):
+    value: U8 = U8()
+
+
+@dataclass
+class ExampleReply(PayloadSequence):
+    response_code: U8 = U8()
+    value: U8 = U8()
+
+    @classmethod
+    def create(cls, device: HartDevice, request: ExampleRequest):
+        return cls(value=U8(request.value.get_value() + 1))
+
+
+@dataclass
+class ExampleStatusReply(PayloadSequence):
+    response_code: U8 = U8()
+    device_status: U8 = U8()
+    value: U8 = U8()
+
+    @classmethod
+    def create(cls, device: HartDevice, request: ExampleRequest):
+        return cls(device_status=device.device_status, value=U8(request.value.get_value() + 1))
+
+
+def make_device(universal_revision: int = 7, device_type: int = 0x2606) -> HartDevice:
+    return HartDevice(device_variables={},
+                      dynamic_variables={},
+                      universal_revision=U8(universal_revision),
+                      expanded_device_type=U16(device_type),
+                      device_status=U8(0),
+                      pv_damping=F32(1.23))
+
+
+class TestCommandRegistry(unittest.TestCase):
+
+    def test_registered_class_is_created_from_request(self):
+        registry = CommandRegistry()
+        registry.register(130, ExampleRequest)(ExampleReply)
+        payload = registry.lookup(make_device(), 130).handle(make_device(), bytes([0x41]))
+        self.assertEqual(payload.pack(), bytes([0x00, 0x42]))
+
+    def test_registered_function_is_called_with_device(self):
+        registry = CommandRegistry()
+        device = make_device()
+
+        @registry.register(131)
+        def handler(target):
+            self.assertIs(target, device)
+            return ExampleReply(value=U8(7))
+
+        self.assertEqual(registry.lookup(device, 131).handle(device, b'').pack(), bytes([0, 7]))
+
+    def test_unknown_command_is_not_found(self):
+        self.assertIsNone(CommandRegistry().lookup(make_device(), 1))
+
+    def test_revision_gate_hides_command(self):
+        registry = CommandRegistry()
+        registry.register(130, ExampleRequest, min_revision=6)(ExampleReply)
+        self.assertIsNone(registry.lookup(make_device(5), 130))
+        self.assertIsNotNone(registry.lookup(make_device(6), 130))
+
+    def test_device_type_override_takes_precedence(self):
+        registry = CommandRegistry()
+        registry.register(130, ExampleRequest)(ExampleReply)
+
+        @registry.register(130, device_type=0xF9F5)
+        def override(device):
+            return ExampleReply(value=U8(0xEE))
+
+        self.assertEqual(registry.lookup(make_device(), 130).handler, ExampleReply.create)
+        self.assertIs(registry.lookup(make_device(device_type=0xF9F5), 130).handler, override)
+
+    def test_supported_commands_honor_revision_and_overrides(self):
+        registry = CommandRegistry()
+        registry.register(130, ExampleRequest)(ExampleReply)
+        registry.register(7, min_revision=6)(Cmd7Reply)
+        registry.register(140, device_type=0xF9F5)(Cmd7Reply)
+        self.assertEqual(registry.supported_commands(), [7, 130])
+        self.assertEqual(registry.supported_commands(make_device(5)), [130])
+        self.assertEqual(registry.supported_commands(make_device(7, 0xF9F5)), [7, 130, 140])
+
+
+class TestCommandDispatch(unittest.TestCase):
+
+    def test_commands_are_registered(self):
+        supported = COMMANDS.supported_commands()
+        for number in [0, 1, 2, 3, 7, 8, 9, 48, 236]:
+            self.assertIn(number, supported)
+        self.assertNotIn(31, supported)
+
+    def test_cmd0_depends_on_universal_revision(self):
+        reply = handle_request(make_device(5), 0, b'')
+        self.assertEqual(len(reply), len(Cmd0Hart5Reply().pack()))
+        self.assertEqual(reply[6], 5)
+        self.assertEqual(handle_request(make_device(7), 0, b'')[6], 7)
+
+    def test_revision_gated_command_is_not_implemented(self):
+        self.assertEqual(handle_request(make_device(5), 7, b''), bytes([64, 0]))
+        self.assertEqual(handle_request(make_device(7), 7, b'')[0], 0)
+
+    def test_unknown_command_is_not_implemented(self):
+        self.assertEqual(handle_request(make_device(), 250, b''), bytes([64, 0]))
+
+    def test_short_request_is_too_few_data_bytes(self):
+        self.assertEqual(handle_request(make_device(), 40, b''), bytes([5, 0]))
+
+    def test_cmd34_toggles_invalid_selection(self):
+        device = make_device()
+        request = bytes([0x3F, 0x80, 0x00, 0x00])
+        self.assertEqual(handle_request(device, 34, request), bytes([0, 0]) + request)
+        self.assertEqual(handle_request(device, 34, request), bytes([3, 0]))
+
+    def register_extended(self, number: int, reply_class: type[PayloadSequence],
+                          request_class: type[PayloadSequence] | None = None):
+        EXTENDED_COMMANDS.register(number, request_class)(reply_class)
+        self.addCleanup(EXTENDED_COMMANDS.entries.pop, number)
+
+    def test_extended_command_is_dispatched(self):
+        self.register_extended(0x0400, Cmd7Reply)
+        device = make_device()
+        reply = handle_request(device, 31, bytes([0x04, 0x00]))
+        self.assertEqual(reply, bytes([0, 0, 0x04, 0x00]) + handle_request(device, 7, b'')[2:])
+
+    def test_extended_request_data_follows_the_number(self):
+        self.register_extended(0x0401, ExampleStatusReply, ExampleRequest)
+        self.assertEqual(handle_request(make_device(), 31, bytes([0x04, 0x01, 0x41])),
+                         bytes([0, 0, 0x04, 0x01, 0x42]))
+        self.assertEqual(handle_request(make_device(), 31, bytes([0x04, 0x01])),
+                         bytes([5, 0, 0x04, 0x01]))
+
+    def test_extended_numbers_do_not_reach_8_bit_commands(self):
+        self.assertEqual(handle_request(make_device(), 31, bytes([0x00, 0x07])),
+                         bytes([64, 0, 0x00, 0x07]))
+
+    def test_extended_replies_are_cached_apart(self):
+        self.register_extended(0, Cmd7Reply)
+        device = make_device()
+        basic = handle_request(device, 0, b'')
+        self.assertEqual(handle_request(device, 31, bytes([0, 0]))[4:],
+                         handle_request(device, 7, b'')[2:])
+        self.assertEqual(handle_request(device, 0, b''), basic)
+
+    def test_cached_extended_replies_are_immutable(self):
+        self.register_extended(0, Cmd7Reply)
+        device = make_device()
+        replies = [handle_request(device, 31, bytes([0, 0])) for _ in range(2)]
+        self.assertIs(type(replies[0]), bytes)
+        self.assertIs(replies[1], replies[0])
+
+    def test_unknown_extended_command_is_not_implemented(self):
+        self.assertEqual(handle_request(make_device(), 31, bytes([0x12, 0x34])),
+                         bytes([64, 0, 0x12, 0x34]))
+
+    def test_short_extended_command_is_too_few_data_bytes(self):
+        self.assertEqual(handle_request(make_device(), 31, bytes([0x00])), bytes([5, 0]))
+
+    def test_replies_are_taken_from_pools(self):
+        device = make_device()
+        device.reply_cache.max_entries = 0
+        pool = payload_pool(Cmd7Reply)
+        reused = pool.reused
+        first = handle_request(device, 7, b'')
+        device.touch()
+        self.assertEqual(handle_request(device, 7, b''), first)
+        self.assertGreater(pool.reused, reused)
+
+    def test_request_is_decoded_from_memoryview(self):
+        device = make_device()
+        frame = memoryview(bytes([0xAA, 0x3F, 0x80, 0x00, 0x00]))
+        self.assertEqual(handle_request(device, 34, frame[1:]), bytes([0, 0]) + bytes(frame[1:]))
+
+
+class TestConcurrentDispatch(unittest.TestCase):
+
+    THREADS = 8
+    REQUESTS = 300
+
+    def setUp(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def test_threads_do_not_share_payloads(self):
+        codes = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def serve(seed: int):
+            device = create_device_3051()
+            generator = random.Random(seed)
+            start.wait()
+            for _ in range(self.REQUESTS):
+                request = bytes(generator.sample(codes, generator.randint(1, 8)))
+                reply = handle_request(device, 9, request)
+                # 3 status bytes, 8 bytes per variable and the time stamp
+                if len(reply) != 3 + 8 * len(request) + 4\
+                        or bytes(reply[3:-4:8]) != request:
+                    errors.append((request, reply))
+                number = generator.choice([7, 13, 20])
+                reply = handle_request(device, 31, bytes([0, number]))
+                if reply[2:4] != bytes([0, number]):
+                    errors.append((number, reply))
+
+        threads = [threading.Thread(target=serve, args=(seed,)) for seed in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors[:3], [])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
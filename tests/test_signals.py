@@ -0,0 +1,70 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from hartsim import signals
+from hartsim.signals import Noise, Periodic, Ramp, Signal, Sine, Square, Step, Trace
+
+
+class TestSignals(unittest.TestCase):
+
+    def test_sine_spans_low_to_high(self):
+        sine = Sine(-5.0, 255.0, 2 * math.pi * 32, 1.5)
+        for now in (0.0, 17.25, 1234.5, 1e9 + 0.3):
+            expected = -5.0 + (1 + math.sin((now - 1.5) / 32)) / 2 * 260.0
+            self.assertAlmostEqual(sine.value(now), expected)
+
+    def test_ramp_square_and_step(self):
+        ramp = Ramp(0.0, 10.0, 4.0)
+        self.assertEqual([ramp.value(now) for now in (0.0, 1.0, 3.0, 4.0)], [0.0, 2.5, 7.5, 0.0])
+        square = Square(1.0, 2.0, 4.0, duty=0.25)
+        self.assertEqual([square.value(now) for now in (0.0, 1.0, 5.5)], [2.0, 1.0, 1.0])
+        step = Step([3.0, 4.0, 5.0], 2.0)
+        self.assertEqual([step.value(now) for now in (0.0, 2.0, 5.0, 6.0)], [3.0, 4.0, 5.0, 3.0])
+
+    def test_signals_without_value_cannot_be_created(self):
+        class Constant(Signal):
+            __slots__ = ()
+
+        with self.assertRaises(TypeError):
+            Constant()
+        with self.assertRaises(TypeError):
+            Periodic(0.0, 1.0, 1.0)
+
+    def test_signals_add_up(self):
+        total = Step([1.0], 1.0) + Ramp(0.0, 4.0, 4.0)
+        self.assertEqual(total.value(1.0), 2.0)
+
+    def test_noise_is_seeded_and_drawn_in_batches(self):
+        noise = Noise(10.0, 2.0, seed=7, batch=4)
+        values = [noise.value(0.0) for _ in range(6)]
+        self.assertEqual(values, [Noise(10.0, 2.0, seed=7, batch=4).value(0.0)] + values[1:])
+        self.assertEqual(len(noise._values), 2)
+        self.assertNotEqual(values, [Noise(10.0, 2.0, seed=8, batch=4).value(0.0) for _ in range(6)])
+        with mock.patch.object(signals, 'numpy', None):
+            noise = Noise(seed=7, batch=4)
+            self.assertEqual(len({noise.value(0.0) for _ in range(5)}), 5)
+
+    def test_trace_interpolates_and_repeats(self):
+        trace = Trace([0.0, 2.0, 4.0], [0.0, 10.0, 0.0])
+        self.assertEqual([trace.value(now) for now in (1.0, 3.0, 5.0)], [5.0, 5.0, 5.0])
+        once = Trace([0.0, 2.0], [0.0, 10.0], repeat=False)
+        self.assertEqual([once.value(now) for now in (-1.0, 1.0, 9.0)], [0.0, 5.0, 10.0])
+        with self.assertRaises(ValueError):
+            Trace([1.0, 0.0], [0.0, 1.0])
+
+    def test_trace_is_read_from_csv(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('time,value\n0,1.5\n10,3.5\n')
+        try:
+            trace = Trace.from_csv(file.name, repeat=False)
+        finally:
+            os.unlink(file.name)
+        self.assertEqual(trace.times, [0.0, 10.0])
+        self.assertEqual(trace.value(5.0), 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,86 @@
+import math
+import struct
+import unittest
+
+from hartsim.commands import handle_request
+from hartsim.engine import VariableEngine
+from hartsim.profiles import create_device_3051, device_template
+from hartsim.tanks import (TANK_SPHERE, TANK_VERTICAL_CYLINDER, StrappingTable, horizontal_cylinder_volume,
+                           sphere_volume)
+
+NOW = 1234.5
+
+
+def cmd158(points: int, tank: int, length: float, radius: float) -> bytes:
+    return struct.pack('>BBff', points, tank, length, radius)
+
+
+def cmd159(point_set: int, levels, volumes) -> bytes:
+    return struct.pack('>BBB8f', point_set, 0, 0, *levels, *volumes)
+
+
+class TestTanks(unittest.TestCase):
+
+    def test_strapping_table_interpolates_and_clamps(self):
+        table = StrappingTable([0.0, 10.0, 20.0], [0.0, 100.0, 300.0])
+        self.assertEqual([table.volume(level) for level in (-1.0, 0.0, 5.0, 15.0, 20.0, 25.0)],
+                         [0.0, 0.0, 50.0, 200.0, 300.0, 300.0])
+        self.assertEqual(list(table.volumes_of([5.0, 15.0])), [50.0, 200.0])
+        with self.assertRaises(ValueError):
+            StrappingTable([1.0], [1.0])
+
+    def test_writes_update_the_table_in_place(self):
+        table = StrappingTable([0.0, 10.0, 20.0, 30.0], [0.0, 10.0, 20.0, 30.0])
+        table.write(2, [5.0, 40.0, 99.0], [50.0, 400.0, 990.0])
+        self.assertEqual(table.levels, [0.0, 10.0, 5.0, 40.0])
+        self.assertEqual(table.volume(7.5), 30.0)
+        table.write(2, [20.0], [20.0])
+        self.assertEqual(table.volume(30.0), 210.0)
+        self.assertIs(table._points()[0], table.levels)
+
+    def test_tank_formulas(self):
+        self.assertAlmostEqual(horizontal_cylinder_volume(1.0, 3.0, 1.0), 1.5 * math.pi)
+        self.assertAlmostEqual(horizontal_cylinder_volume(5.0, 3.0, 1.0), 3.0 * math.pi)
+        self.assertAlmostEqual(sphere_volume(2.0, 0.0, 1.0), 4 / 3 * math.pi)
+        device = create_device_3051()
+        handle_request(device, 158, cmd158(4, TANK_VERTICAL_CYLINDER, 10.0, 2.0))
+        self.assertAlmostEqual(device.tank_volume(3.0), 12.0 * math.pi, places=4)
+        handle_request(device, 158, cmd158(4, TANK_SPHERE, 0.0, 1.0))
+        self.assertAlmostEqual(device.tank_volume(1.0), 2 / 3 * math.pi, places=5)
+        handle_request(device, 158, cmd158(4, 0, 0.0, 1.0))
+        self.assertIsNone(device.tank_volume(1.0))
+
+    def test_volume_follows_level(self):
+        device = create_device_3051()
+        device.clock = lambda: NOW
+        handle_request(device, 159, cmd159(0, (0.0, 100.0, 200.0, 300.0), (0.0, 10.0, 20.0, 30.0)))
+        device.update_variables()
+        level = device.device_variables[4].value.get_value()
+        self.assertAlmostEqual(device.device_variables[5].value.get_value(), level / 10, places=3)
+        device.simulate_variable(4, 150.0)
+        device.device_variables[5].expires_at = 0
+        device.update_variables([5])
+        self.assertAlmostEqual(device.device_variables[5].value.get_value(), 15.0, places=4)
+
+    def test_point_sets_update_the_cached_table(self):
+        device = device_template('3051').instantiate()
+        table = device.strapping_table()
+        handle_request(device, 159, cmd159(0, (0.0, 1.0, 2.0, 3.0), (0.0, 2.0, 4.0, 6.0)))
+        self.assertIs(device.strapping_table(), table)
+        self.assertEqual(table.volume(2.5), 5.0)
+        handle_request(device, 158, cmd158(8, 5, 0.0, 0.0))
+        self.assertEqual(len(device.strapping_table()), 8)
+        self.assertEqual(create_device_3051().strapping_table().volume(2.5), 15.0)
+
+    def test_engine_feeds_volumes(self):
+        devices = [create_device_3051(), create_device_3051()]
+        handle_request(devices[1], 158, cmd158(4, TANK_VERTICAL_CYLINDER, 1e6, 1.0))
+        engine = VariableEngine(devices, clock=lambda: NOW)
+        engine.update()
+        self.assertEqual(devices[0].device_variables[5].value.get_value(), 60.0)
+        level = devices[1].device_variables[4].value.get_value()
+        self.assertAlmostEqual(devices[1].device_variables[5].value.get_value(), math.pi * level, places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
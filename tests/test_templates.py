@@ -0,0 +1,89 @@
+import unittest
+from copy import copy
+from unittest import mock
+
+from hartsim.commands import handle_request
+from hartsim.engine import VariableEngine
+from hartsim.payloads import U8, U24, F32View, PackedAscii, U8View
+from hartsim.profiles import create_device_3051, device_template
+from hartsim.templates import DeviceTemplate, DictView, TableView
+
+NOW = 1234.5
+
+
+class TestDeviceTemplates(unittest.TestCase):
+
+    def setUp(self):
+        self.template = DeviceTemplate('3051', create_device_3051)
+
+    def test_replies_match_devices(self):
+        device = self.template.instantiate()
+        alone = create_device_3051()
+        with mock.patch('time.time', return_value=NOW):
+            for number, data in ((0, b''), (3, b''), (9, bytes([0, 1, 2])), (13, b''),
+                                 (15, b''), (20, b''), (54, bytes([1])), (162, bytes([1]))):
+                self.assertEqual(handle_request(device, number, data), handle_request(alone, number, data))
+
+    def test_instances_store_only_overrides(self):
+        device = self.template.instantiate(long_address=0x2606000001, device_id=U24(1),
+                                           hart_tag=PackedAscii(8, 'PT-101'))
+        self.assertEqual(set(device.overrides), {'long_address', 'device_id', 'hart_tag'})
+        self.assertEqual(device.device_id.get_value(), 1)
+        self.assertEqual(device.hart_tag.get_value(), 'PT-101')
+        self.assertIsInstance(device.polling_address, U8View)
+        self.assertIsInstance(device.device_variables[0].value, F32View)
+        self.assertEqual(self.template.instantiate().device_id.get_value(), create_device_3051().device_id.get_value())
+        for number in (0, 12, 13, 20):
+            handle_request(device, number, b'')
+        self.assertEqual(set(device.overrides), {'long_address', 'device_id', 'hart_tag'})
+        self.assertEqual(device.hart_descriptor.get_value(), create_device_3051().hart_descriptor.get_value())
+        self.assertEqual(device.simulated_variables, {})
+        self.assertEqual(set(device.overrides), {'long_address', 'device_id', 'hart_tag'})
+
+    def test_writes_are_copied_on_write(self):
+        device, other = self.template.instantiate(), self.template.instantiate()
+        version = device.state_version
+        handle_request(device, 136, bytes([0x12, 0x34]))
+        device.device_variables[1].units.set_value(7)
+        device.loop_current_mode = U8(0)
+        self.assertGreater(device.state_version, version)
+        self.assertEqual(device.display_parameters.get_value(), 0x1234)
+        self.assertEqual(other.display_parameters.get_value(), 0xAAAA)
+        self.assertEqual(device.device_variables[1].units.get_value(), 7)
+        self.assertEqual(other.device_variables[1].units.get_value(), 32)
+        self.assertEqual(other.loop_current_mode.get_value(), 1)
+        self.assertEqual(other.overrides, {})
+
+    def test_tables_are_copied_on_first_write(self):
+        device, other = self.template.instantiate(), self.template.instantiate()
+        self.assertIsInstance(device.strappingTableLevel, TableView)
+        self.assertEqual(list(device.strappingTableLevel[:2]), [10.0, 20.0])
+        self.assertNotIn('strappingTableLevel', device.overrides)
+        device.strappingTableLevel[0] = 5.0
+        self.assertEqual(device.strappingTableLevel[0], 5.0)
+        self.assertEqual(other.strappingTableLevel[0], 10.0)
+
+    def test_objects_changed_in_place_are_copied_on_write(self):
+        device, other = self.template.instantiate(), self.template.instantiate()
+        message = device.hart_message
+        self.assertIsInstance(message, PackedAscii)
+        self.assertIsInstance(device.simulated_variables, DictView)
+        message.set_value('CHANGED')
+        device.simulate_variable(0, 42.0)
+        self.assertEqual(set(device.overrides), {'hart_message', 'simulated_variables', (0, 'value')})
+        self.assertEqual(message.get_value(), 'CHANGED')
+        self.assertIs(type(copy(message)), PackedAscii)
+        self.assertEqual(other.hart_message.get_value(), create_device_3051().hart_message.get_value())
+        self.assertEqual(other.simulated_variables, {})
+        self.assertEqual(other.device_variables[0].value.get_value(), 1.2345)
+
+    def test_profile_templates_are_built_once(self):
+        self.assertIs(device_template('150'), device_template('150'))
+        with self.assertRaises(AttributeError):
+            self.template.instantiate(reply_cache=None)
+        with self.assertRaises(TypeError):
+            VariableEngine([self.template.instantiate()])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
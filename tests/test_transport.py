@@ -0,0 +1,187 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tty
+import unittest
+
+import pytest
+
+from hartsim.framingutils import FrameType, HartFrame, HartFrameBuilder
+from hartsim.profiles import create_devices
+from hartsim.simulator import REPLY_PREAMBLES, DeviceSimulator
+from hartsim.transport import SerialLink, open_serial, serve_links
+from tests.frames import request
+
+
+class TestDeviceSimulator(unittest.TestCase):
+
+    def test_reply_is_routed_by_polling_address(self):
+        target = DeviceSimulator(create_devices(), verbose=False)
+        frame = HartFrameBuilder().feed(request(short_address=1))[0]
+        reply = bytes(target.handle(frame))
+        self.assertEqual(reply[:REPLY_PREAMBLES], b'\xff' * REPLY_PREAMBLES)
+        replies = HartFrameBuilder().feed(reply)
+        self.assertEqual(len(replies), 1)
+        self.assertEqual(replies[0].type, FrameType.ACK)
+        self.assertEqual(replies[0].short_address, 1)
+        self.assertTrue(replies[0].is_valid())
+
+    def test_unknown_address_gets_no_reply(self):
+        target = DeviceSimulator(create_devices(), verbose=False)
+        frame = HartFrameBuilder().feed(request(short_address=9))[0]
+        self.assertIsNone(target.handle(frame))
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='PTY pairs need a POSIX system')
+class TestSerialLink(unittest.TestCase):
+
+    def setUp(self):
+        self.master, slave = os.openpty()
+        tty.setraw(self.master)
+        self.port = open_serial(os.ttyname(slave), key_dtr=False)
+        os.close(slave)
+
+    def tearDown(self):
+        self.port.close()
+        if self.master is not None:
+            os.close(self.master)
+
+    def exchange(self, data: bytes, count: int) -> list:
+        async def master():
+            loop = asyncio.get_running_loop()
+            builder = HartFrameBuilder()
+            frames = []
+            received = loop.create_future()
+
+            def on_readable():
+                frames.extend(frame.to_frame() for frame in builder.feed(os.read(self.master, 512)))
+                if len(frames) >= count and not received.done():
+                    received.set_result(frames)
+
+            loop.add_reader(self.master, on_readable)
+            os.write(self.master, data)
+            try:
+                return await asyncio.wait_for(received, 5)
+            finally:
+                loop.remove_reader(self.master)
+
+        async def run():
+            serving = asyncio.ensure_future(self.link.serve())
+            try:
+                return await master()
+            finally:
+                self.link.close()
+                await serving
+
+        return asyncio.run(run())
+
+    def test_requests_are_answered(self):
+        simulator = DeviceSimulator(create_devices(), verbose=False)
+        self.link = SerialLink(self.port, simulator.handle, key_dtr=False)
+        replies = self.exchange(request(short_address=0) + request(short_address=2), 2)
+        self.assertEqual([reply.short_address for reply in replies], [0, 2])
+        self.assertEqual([reply.type for reply in replies], [FrameType.ACK, FrameType.ACK])
+
+    def test_handler_without_reply_sends_nothing(self):
+        handled = []
+
+        def handler(frame):
+            handled.append(frame.command_number)
+            return None if frame.command_number == 1 else b'\xff\xff' + bytes(
+                HartFrame(FrameType.ACK, frame.command_number).serialize())
+
+        self.link = SerialLink(self.port, handler, key_dtr=False)
+        replies = self.exchange(request(1) + request(2), 1)
+        self.assertEqual(handled, [1, 2])
+        self.assertEqual([reply.command_number for reply in replies], [2])
+
+    def test_failing_request_does_not_stop_serving(self):
+        def handler(frame):
+            if frame.command_number == 1:
+                raise KeyError(2)
+            return b'\xff\xff' + bytes(HartFrame(FrameType.ACK, frame.command_number).serialize())
+
+        self.link = SerialLink(self.port, handler, name='test', key_dtr=False)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            replies = self.exchange(request(1) + request(2), 1)
+        self.assertEqual([reply.command_number for reply in replies], [2])
+        self.assertEqual(self.link.statistics.failures, 1)
+        self.assertEqual(output.getvalue(), 'test: command 1 failed: KeyError(2)\n')
+
+    def test_statistics_are_counted(self):
+        simulator = DeviceSimulator(create_devices(), verbose=False)
+        self.link = SerialLink(self.port, simulator.handle, key_dtr=False)
+        data = request(short_address=0) + request(short_address=9) + request(short_address=1)
+        self.exchange(data, 2)
+        statistics = self.link.statistics
+        self.assertEqual((statistics.requests, statistics.replies), (3, 2))
+        self.assertEqual(statistics.bytes_received, len(data))
+        self.assertGreater(statistics.bytes_sent, 0)
+
+    def test_serve_fails_when_master_hangs_up(self):
+        self.link = SerialLink(self.port, lambda frame: None, key_dtr=False)
+
+        async def run():
+            serving = asyncio.ensure_future(self.link.serve())
+            await asyncio.sleep(0)
+            os.close(self.master)
+            self.master = None
+            await asyncio.wait_for(serving, 5)
+
+        with pytest.raises(OSError):
+            asyncio.run(run())
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='PTY pairs need a POSIX system')
+class TestServeLinks(unittest.TestCase):
+
+    def test_many_ports_share_one_loop(self):
+        count = 64
+        masters = []
+        links = []
+        for index in range(count):
+            master, slave = os.openpty()
+            tty.setraw(master)
+            port = open_serial(os.ttyname(slave), key_dtr=False)
+            os.close(slave)
+            simulator = DeviceSimulator(create_devices(['3051']), f'pty{index}', verbose=False)
+            masters.append(master)
+            links.append(SerialLink(port, simulator.handle, key_dtr=False))
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            pending = set(masters)
+            done = loop.create_future()
+
+            def on_readable(master, builder):
+                if builder.feed(os.read(master, 512)):
+                    loop.remove_reader(master)
+                    pending.discard(master)
+                    if not pending:
+                        done.set_result(None)
+
+            serving = asyncio.ensure_future(serve_links(links))
+            for master in masters:
+                loop.add_reader(master, on_readable, master, HartFrameBuilder())
+                os.write(master, request(short_address=0))
+            try:
+                await asyncio.wait_for(done, 10)
+            finally:
+                for link in links:
+                    link.close()
+                await serving
+
+        try:
+            asyncio.run(run())
+            self.assertEqual([link.statistics.replies for link in links], [1] * count)
+        finally:
+            for link in links:
+                link.port.close()
+            for master in masters:
+                os.close(master)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover